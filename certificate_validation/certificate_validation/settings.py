@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -87,6 +88,77 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'certificate_validation.wsgi.application'
+ASGI_APPLICATION = 'certificate_validation.asgi.application'
+
+# Threads available for PDF rendering and OCR in the upload view
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 2))
+# Uploads allowed to wait for a free OCR worker before new ones get a 429
+OCR_QUEUE_DEPTH = int(os.getenv('OCR_QUEUE_DEPTH', 8))
+
+# Verification profile (fast / balanced / accurate, see certificates/ocr_profiles.py);
+# uploads may pick another with a `profile` field. OCR_PROFILES overrides profile
+# options per deployment, e.g. {'accurate': {'dpi': 300}}.
+# Compare profiles with `manage.py benchmark_ocr_profiles`.
+OCR_PROFILE = os.getenv('OCR_PROFILE', 'balanced')
+OCR_PROFILES = {}
+
+# Budgets for reading one document (certificates/ocr_budget.py). Rendering and
+# OCR run in a pool of OCR_WORKERS long-lived worker processes (started through
+# a forkserver, not forked from the threaded server); a worker past the time or
+# memory budget is killed and replaced, and the upload is recorded as failed
+# with the reason. Documents longer than OCR_MAX_PAGES are read up to it, and
+# pages over OCR_MAX_PAGE_PIXELS are rendered at a lower resolution (no lower
+# than OCR_MIN_DPI).
+OCR_MAX_PAGES = 20
+OCR_MAX_PAGE_PIXELS = 25_000_000
+OCR_MAX_DOCUMENT_PIXELS = 150_000_000
+OCR_MIN_DPI = 50
+OCR_PAGE_TIMEOUT_SECONDS = 30
+OCR_DOCUMENT_TIMEOUT_SECONDS = 120
+OCR_WORKER_MEMORY_MB = 1024
+# 'thread' reads in the OCR thread itself, without the time and memory kill
+OCR_ISOLATION = os.getenv('OCR_ISOLATION', 'process')
+
+# Upload token buckets: burst size and sustained rate
+UPLOAD_USER_BURST = 10
+UPLOAD_USER_RATE_PER_MINUTE = 6
+UPLOAD_GLOBAL_BURST = 50
+UPLOAD_GLOBAL_RATE_PER_MINUTE = 120
+
+# Public verification API (api/verify/): per-client-address token bucket, and
+# how long answers and misses for a file hash stay cached
+PUBLIC_VERIFY_BURST = 30
+PUBLIC_VERIFY_RATE_PER_MINUTE = 60
+PUBLIC_VERIFY_CACHE_SECONDS = 300
+PUBLIC_VERIFY_MISS_CACHE_SECONDS = 60
+PUBLIC_VERIFY_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+# Behind a reverse proxy, key the per-client limit on the address it forwards, e.g.
+# 'HTTP_X_FORWARDED_FOR', counting TRUSTED_PROXIES proxies from the right (0 keys on REMOTE_ADDR)
+PUBLIC_VERIFY_CLIENT_ADDRESS_HEADER = os.getenv('PUBLIC_VERIFY_CLIENT_ADDRESS_HEADER')
+PUBLIC_VERIFY_TRUSTED_PROXIES = 1
+
+# In-process score index (certificates/ranking.py) serving ranks and leaderboards.
+# Other workers' writes are seen through a counter in the shared cache; without a
+# shared cache each worker rebuilds from the database after this many seconds.
+SCORE_INDEX_MAX_AGE_SECONDS = 60
+
+# Maximum number of files accepted by the batch upload endpoint. Each file
+# costs one upload token, so keep this at or below UPLOAD_USER_BURST.
+BATCH_UPLOAD_MAX_FILES = 10
+
+# Resumable chunked uploads: partial files are kept under CHUNKED_UPLOAD_DIR
+# until finalized. Chunks must fit in DATA_UPLOAD_MAX_MEMORY_SIZE (2.5 MB).
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'tmp', 'chunked_uploads')
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+# Leading pages OCRed while the rest of the file is still arriving
+CHUNKED_UPLOAD_EARLY_RENDER_PAGES = 5
+
+# Admin bulk actions (re-verify, re-score, status changes) are queued and run by
+# `manage.py run_background_jobs`; a running job without progress for
+# BACKGROUND_JOB_STALE_SECONDS is taken to have lost its worker and marked failed
+BACKGROUND_JOB_POLL_SECONDS = 5
+BACKGROUND_JOB_STALE_SECONDS = 600
 
 DATABASES = {
     'default': {
@@ -95,6 +167,20 @@ DATABASES = {
     }
 }
 
+# Upload and public-verification rate limits, verification answers and the score
+# index's generation counter live in the cache. The local-memory default is per
+# process: with several workers each enforces its own limits, so set REDIS_URL
+# (or another shared backend) in production. `manage.py check --deploy` warns
+# when the cache is not shared.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -135,6 +221,20 @@ SOCIAL_AUTH_PIPELINE = (
 LOGIN_REDIRECT_URL = '/'
 SOCIAL_AUTH_LOGIN_REDIRECT_URL = '/'
 
+# Load tests only: send Google sign-in to the local stand-in provider (see certificates/oauth_standin.py).
+# The stand-in signs anyone in as any account, so it also needs DEBUG or LOADTEST_MODE=1.
+LOADTEST_MODE = os.getenv('LOADTEST_MODE') == '1'
+SOCIAL_AUTH_GOOGLE_OAUTH2_STANDIN_URL = os.getenv('LOADTEST_OAUTH_STANDIN_URL')
+if SOCIAL_AUTH_GOOGLE_OAUTH2_STANDIN_URL:
+    if not (DEBUG or LOADTEST_MODE):
+        raise ImproperlyConfigured('LOADTEST_OAUTH_STANDIN_URL is set but neither DEBUG nor LOADTEST_MODE=1 is')
+    AUTHENTICATION_BACKENDS = (
+        'certificates.oauth_standin.StandInGoogleOAuth2',
+        'django.contrib.auth.backends.ModelBackend',
+    )
+    SOCIAL_AUTH_GOOGLE_OAUTH2_KEY = SOCIAL_AUTH_GOOGLE_OAUTH2_KEY or 'loadtest'
+    SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET = SOCIAL_AUTH_GOOGLE_OAUTH2_SECRET or 'loadtest'
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -145,6 +245,39 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Certificate files are content-addressed and sharded by SHA-256. Set
+    # CERTIFICATE_STORAGE_BACKEND=certificates.storage.LocalObjectStorage to
+    # run against the local object-storage stand-in instead of MEDIA_ROOT.
+    'certificates': {
+        'BACKEND': os.getenv('CERTIFICATE_STORAGE_BACKEND', 'certificates.storage.ShardedContentStorage'),
+    },
+}
+OBJECT_STORAGE_ROOT = BASE_DIR / 'object_store'
+
+# '' streams media from Django; 'x-sendfile' (Apache/lighttpd) or
+# 'x-accel-redirect' (nginx) hands the file transfer to the web server.
+MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Certificate files are only served to staff or on signed URLs from the owner's listings
+CERTIFICATE_FILE_URL_MAX_AGE_SECONDS = 300
+# Certificate thumbnails are served on signed URLs handed out in the owner's listings
+THUMBNAIL_URL_MAX_AGE_SECONDS = 3600
+# Missing thumbnails are rendered in an OCR worker killed after this long
+THUMBNAIL_RENDER_TIMEOUT_SECONDS = 15
+
+# Verified certificates are anchored in Merkle batches (manage.py anchor_certificates, run from cron).
+# The default ledger is a local append-only file; point the backend at a real network client in production.
+ANCHOR_LEDGER_BACKEND = os.getenv('ANCHOR_LEDGER_BACKEND', 'certificates.anchoring.LocalLedger')
+ANCHOR_LEDGER_PATH = BASE_DIR / 'ledger' / 'anchors.jsonl'
+ANCHOR_BATCH_SIZE = 4096
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
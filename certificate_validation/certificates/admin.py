@@ -1,7 +1,110 @@
-from django.contrib import admin
+import re
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
 from rest_framework.authtoken.models import Token
-from certificates.models import User, UserProfile, Certificate, Domain, RankHistory, BlockchainVerification
+from certificates.models import (
+    User, UserProfile, Certificate, Domain, RankHistory, BlockchainVerification, BackgroundJob,
+    WeightVersion, ScoringWeight, OCRExtraction, AnchorBatch
+)
+from certificates.events import notify_certificate_status
+from certificates.verification import forget as forget_verification
+from certificates.extraction import unpack_pages
+from certificates.jobs import enqueue
+from certificates.ranking import update_user_ranks
+from certificates.scoring import rebuild_domains
+
+HEX_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Avoids exact COUNT(*) on large tables: unfiltered PostgreSQL changelists
+    use the planner's row estimate, everything else counts at most COUNT_LIMIT rows.
+    """
+    COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > self.COUNT_LIMIT:
+                return row[0]
+        return queryset.order_by()[:self.COUNT_LIMIT].count()
+
+
+class ScaleSafeAdmin(admin.ModelAdmin):
+    """Changelist defaults for tables that can grow to millions of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class RankBucketFilter(admin.SimpleListFilter):
+    """Fixed rank ranges instead of a DISTINCT over every rank value."""
+    title = 'rank'
+    parameter_name = 'rank_bucket'
+    field = 'current_rank'
+    BUCKETS = {
+        'top10': (1, 10),
+        'top100': (11, 100),
+        'top1000': (101, 1000),
+        'rest': (1001, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [('top10', '1-10'), ('top100', '11-100'), ('top1000', '101-1000'), ('rest', '1001+')]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.BUCKETS:
+            return queryset
+        low, high = self.BUCKETS[self.value()]
+        queryset = queryset.filter(**{f'{self.field}__gte': low})
+        if high is not None:
+            queryset = queryset.filter(**{f'{self.field}__lte': high})
+        return queryset
+
+
+class HistoryRankBucketFilter(RankBucketFilter):
+    field = 'rank'
+
+
+class CachedValuesFilter(admin.SimpleListFilter):
+    """Choices from a DISTINCT query that is cached, so it runs once per CACHE_SECONDS rather than per page view."""
+    CACHE_SECONDS = 600
+
+    def lookups(self, request, model_admin):
+        key = f'admin-filter:{model_admin.model._meta.label}:{self.parameter_name}'
+        values = cache.get(key)
+        if values is None:
+            values = list(
+                model_admin.model.objects.exclude(**{self.parameter_name: ''})
+                .order_by(self.parameter_name).values_list(self.parameter_name, flat=True).distinct()[:200]
+            )
+            cache.set(key, values, self.CACHE_SECONDS)
+        return [(value, value) for value in values]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+class DomainValuesFilter(CachedValuesFilter):
+    title = 'domain'
+    parameter_name = 'domain'
+
+
+class CategoryValuesFilter(CachedValuesFilter):
+    title = 'category'
+    parameter_name = 'category'
 
 # Admin for User model
 class UserAdmin(BaseUserAdmin):
@@ -25,63 +128,228 @@ class UserAdmin(BaseUserAdmin):
 
 # Admin for UserProfile model
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ScaleSafeAdmin):
     list_display = ('user', 'department', 'join_date', 'current_rank', 'total_weightage')
-    search_fields = ('user__email', 'department')
-    list_filter = ('join_date', 'current_rank')
+    list_select_related = ('user',)
+    search_fields = ('=user__email', '^department')
+    list_filter = ('join_date', RankBucketFilter)
     fields = ('user', 'department', 'join_date', 'profile_image', 'current_rank', 'total_weightage')
     readonly_fields = ('join_date',)
     autocomplete_fields = ['user']
 
 # Admin for Certificate model
 @admin.register(Certificate)
-class CertificateAdmin(admin.ModelAdmin):
+class CertificateAdmin(ScaleSafeAdmin):
     list_display = ('name', 'user', 'issuer', 'domain', 'status', 'weightage', 'upload_date')
-    search_fields = ('name', 'user__email', 'issuer', 'domain')
-    list_filter = ('status', 'domain', 'upload_date', 'category')
+    list_select_related = ('user',)
+    search_fields = ('^name', '=user__email', '^issuer')
+    list_filter = ('status', DomainValuesFilter, 'upload_date', CategoryValuesFilter)
+    actions = ['mark_verified', 'mark_pending', 'mark_failed', 'rescore', 'reverify']
     fields = (
-        'user', 'name', 'issuer', 'category', 'domain', 'weightage', 'status',
+        'user', 'name', 'issuer', 'course_name', 'category', 'domain', 'weightage', 'status',
         'upload_date', 'verification_date', 'certificate_file', 'blockchain_tx_hash'
     )
     readonly_fields = ('upload_date', 'verification_date')
     autocomplete_fields = ['user']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Exact matches on unique/indexed columns skip the prefix scans entirely
+        term = search_term.strip()
+        if HEX_HASH_RE.match(term):
+            return queryset.filter(file_hash=term), False
+        if '@' in term and ' ' not in term:
+            return queryset.filter(user__email=term), False
+        return super().get_search_results(request, queryset, search_term)
+
+    # Dashboards no longer re-rank on read, so edits made here re-rank (and notify) themselves,
+    # and rebuild the per-domain aggregates of the users whose certificates changed
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        forget_verification([obj.file_hash])
+        if not change or 'status' in form.changed_data:
+            notify_certificate_status([(obj.pk, obj.user_id, obj.name, obj.status)])
+        if not change or {'user', 'domain', 'weightage'} & set(form.changed_data):
+            rebuild_domains({obj.user_id, form.initial.get('user', obj.user_id)})
+        if not change or {'user', 'weightage'} & set(form.changed_data):
+            update_user_ranks()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        forget_verification([obj.file_hash])
+        rebuild_domains([obj.user_id])
+        update_user_ranks()
+
+    def delete_queryset(self, request, queryset):
+        file_hashes, user_ids = [], set()
+        for file_hash, user_id in queryset.values_list('file_hash', 'user_id'):
+            file_hashes.append(file_hash)
+            user_ids.add(user_id)
+        super().delete_queryset(request, queryset)
+        forget_verification(file_hashes)
+        rebuild_domains(user_ids)
+        update_user_ranks()
+
+    def _enqueue(self, request, queryset, kind, description):
+        job = enqueue(kind, queryset, request.user)
+        self.message_user(request, f"{description} queued for {job.total} certificates as background job #{job.pk}.", messages.INFO)
+
+    @admin.action(description='Mark selected certificates as verified')
+    def mark_verified(self, request, queryset):
+        self._enqueue(request, queryset, 'mark_verified', 'Status change')
+
+    @admin.action(description='Mark selected certificates as pending')
+    def mark_pending(self, request, queryset):
+        self._enqueue(request, queryset, 'mark_pending', 'Status change')
+
+    @admin.action(description='Mark selected certificates as failed')
+    def mark_failed(self, request, queryset):
+        self._enqueue(request, queryset, 'mark_failed', 'Status change')
+
+    @admin.action(description='Re-score selected certificates')
+    def rescore(self, request, queryset):
+        self._enqueue(request, queryset, 'rescore', 'Re-scoring')
+
+    @admin.action(description='Re-verify selected certificates (OCR)')
+    def reverify(self, request, queryset):
+        self._enqueue(request, queryset, 'reverify', 'Re-verification')
+
 # Admin for Domain model
 @admin.register(Domain)
-class DomainAdmin(admin.ModelAdmin):
+class DomainAdmin(ScaleSafeAdmin):
     list_display = ('name', 'user', 'certificate_count', 'total_weightage')
-    search_fields = ('name', 'user__email')
+    list_select_related = ('user',)
+    search_fields = ('^name', '=user__email')
     list_filter = ('name',)
     fields = ('user', 'name', 'certificate_count', 'total_weightage')
     autocomplete_fields = ['user']
 
 # Admin for RankHistory model
 @admin.register(RankHistory)
-class RankHistoryAdmin(admin.ModelAdmin):
+class RankHistoryAdmin(ScaleSafeAdmin):
     list_display = ('user', 'month', 'rank')
-    search_fields = ('user__email',)
-    list_filter = ('month', 'rank')
+    list_select_related = ('user',)
+    search_fields = ('=user__email',)
+    list_filter = ('month', HistoryRankBucketFilter)
     fields = ('user', 'month', 'rank')
     autocomplete_fields = ['user']
 
 # Admin for BlockchainVerification model
 @admin.register(BlockchainVerification)
-class BlockchainVerificationAdmin(admin.ModelAdmin):
+class BlockchainVerificationAdmin(ScaleSafeAdmin):
     list_display = ('certificate', 'transaction_hash', 'blockchain_network', 'verified', 'verification_timestamp')
-    search_fields = ('certificate__name', 'transaction_hash')
+    list_select_related = ('certificate__user',)
+    search_fields = ('^certificate__name', '=transaction_hash')
     list_filter = ('verified', 'blockchain_network', 'verification_timestamp')
-    fields = ('certificate', 'transaction_hash', 'blockchain_network', 'verified', 'verification_timestamp')
-    readonly_fields = ('verification_timestamp',)
+    fields = (
+        'certificate', 'transaction_hash', 'blockchain_network', 'verified', 'verification_timestamp',
+        'batch', 'leaf_index', 'proof'
+    )
+    readonly_fields = ('verification_timestamp', 'batch', 'leaf_index', 'proof')
     autocomplete_fields = ['certificate']
 
+# Admin for AnchorBatch model; batches are written only by anchor_certificates
+@admin.register(AnchorBatch)
+class AnchorBatchAdmin(ScaleSafeAdmin):
+    list_display = ('merkle_root', 'leaf_count', 'transaction_hash', 'blockchain_network', 'created_at')
+    search_fields = ('=merkle_root', '=transaction_hash')
+    list_filter = ('blockchain_network', 'created_at')
+    readonly_fields = ('merkle_root', 'leaf_count', 'transaction_hash', 'blockchain_network', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
 # Admin for Token model
 @admin.register(Token)
-class TokenAdmin(admin.ModelAdmin):
+class TokenAdmin(ScaleSafeAdmin):
     list_display = ('key', 'user', 'created')
-    search_fields = ('user__email', 'key')
+    list_select_related = ('user',)
+    search_fields = ('=user__email', '=key')
     list_filter = ('created',)
     readonly_fields = ('created',)
     autocomplete_fields = ['user']
 
+# Admin for BackgroundJob model
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'processed', 'total', 'created_by', 'created_at', 'finished_at')
+    list_select_related = ('created_by',)
+    list_filter = ('status', 'kind')
+    readonly_fields = (
+        'kind', 'created_by', 'status', 'total', 'processed', 'message', 'created_at', 'heartbeat_at', 'finished_at'
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+# Admin for OCRExtraction model: dispute review works from what verification actually read
+@admin.register(OCRExtraction)
+class OCRExtractionAdmin(ScaleSafeAdmin):
+    list_display = ('user', 'certificate', 'accepted', 'match_scores', 'profile', 'extractor', 'page_count', 'duration_ms', 'failure_reason', 'extraction_date')
+    list_select_related = ('user', 'certificate')
+    search_fields = ('=user__email', '=file_hash')
+    list_filter = ('accepted', 'profile', 'extractor', 'extraction_date')
+    fields = (
+        'user', 'certificate', 'file_hash', 'accepted', 'match_scores', 'extracted_name', 'extracted_issuer',
+        'extracted_course', 'profile', 'extractor', 'page_count', 'duration_ms', 'failure_reason', 'extraction_date',
+        'page_texts'
+    )
+    readonly_fields = fields
+    actions = ['reverify']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='OCR text')
+    def page_texts(self, obj):
+        return format_html_join(
+            '', '<p><strong>Page {} ({}{}, {} ms)</strong></p><pre>{}</pre>',
+            (
+                (page['page'], page['source'], ' fallback' if page.get('fallback') else '', page['ms'], page['text'])
+                for page in unpack_pages(obj.pages)
+            )
+        ) or format_html('<em>{}</em>', 'No pages stored')
+
+    @admin.action(description='Re-verify certificates of selected extractions against current details')
+    def reverify(self, request, queryset):
+        job = enqueue('reverify', Certificate.objects.filter(ocr_extraction__in=queryset), request.user)
+        self.message_user(request, f"Re-verification queued for {job.total} certificates as background job #{job.pk}.", messages.INFO)
+
+class ScoringWeightInline(admin.TabularInline):
+    model = ScoringWeight
+    extra = 1
+    fields = ('kind', 'name', 'weight')
+
+    def _editable(self, obj):
+        # Activated versions are what stored weightages were computed from; change them via a new version
+        return obj is None or obj.activated_at is None
+
+    def has_add_permission(self, request, obj=None):
+        return self._editable(obj) and super().has_add_permission(request, obj)
+
+    def has_change_permission(self, request, obj=None):
+        return self._editable(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return self._editable(obj) and super().has_delete_permission(request, obj)
+
+# Admin for WeightVersion model; apply a version with `manage.py rescore_certificates --weight-version <id>`
+@admin.register(WeightVersion)
+class WeightVersionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'note', 'is_active', 'created_at', 'activated_at')
+    fields = ('note', 'is_active', 'created_at', 'activated_at')
+    readonly_fields = ('is_active', 'created_at', 'activated_at')
+    inlines = [ScoringWeightInline]
+    actions = ['copy_as_draft']
+
+    @admin.action(description='Copy selected version as a new draft')
+    def copy_as_draft(self, request, queryset):
+        for version in queryset:
+            draft = WeightVersion.objects.create(note=f"Copy of v{version.pk}")
+            ScoringWeight.objects.bulk_create([
+                ScoringWeight(version=draft, kind=weight.kind, name=weight.name, weight=weight.weight)
+                for weight in version.weights.all()
+            ])
+            self.message_user(request, f"Created draft weight version {draft.pk} from v{version.pk}.", messages.INFO)
+
 # Register the User model
 admin.site.register(User, UserAdmin)
\ No newline at end of file
@@ -0,0 +1,162 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# A bucket's read-modify-write holds a lock made with cache.add() (atomic on every
+# backend, SET NX on Redis); a crashed holder's lock expires after LOCK_SECONDS.
+LOCK_SECONDS = 2
+LOCK_WAIT_SECONDS = 0.5
+LOCK_POLL_SECONDS = 0.005
+
+
+class TokenBucket:
+    """
+    Token bucket kept in the Django cache, so limits are shared by every
+    worker when a shared cache backend (Redis, Memcached) is configured;
+    with the default local-memory cache each worker process has its own.
+    """
+
+    def __init__(self, prefix, capacity, refill_per_minute):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.refill_per_second = refill_per_minute / 60.0
+
+    @asynccontextmanager
+    async def _locked(self, cache_key):
+        """Hold the bucket's lock; yields False when it stayed busy for LOCK_WAIT_SECONDS."""
+        lock_key = f"{cache_key}:lock"
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while not await cache.aadd(lock_key, 1, timeout=LOCK_SECONDS):
+            if time.monotonic() > deadline:
+                yield False
+                return
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield True
+        finally:
+            await cache.adelete(lock_key)
+
+    async def _tokens(self, cache_key, now):
+        tokens, updated = await cache.aget(cache_key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    async def take(self, key='global', count=1):
+        """Consume `count` tokens; return 0 when allowed, otherwise seconds until enough are available."""
+        cache_key = f"{self.prefix}:{key}"
+        async with self._locked(cache_key) as locked:
+            if not locked:
+                # Contended beyond reason: refuse rather than risk admitting past the limit
+                return 1
+            now = time.time()
+            tokens = await self._tokens(cache_key, now)
+
+            if tokens < count:
+                await cache.aset(cache_key, (tokens, now), timeout=self.ttl())
+                if count > self.capacity:
+                    # Can never be satisfied in one go; tell the client to wait for a full bucket
+                    return math.ceil(self.capacity / self.refill_per_second)
+                return math.ceil((count - tokens) / self.refill_per_second)
+
+            await cache.aset(cache_key, (tokens - count, now), timeout=self.ttl())
+            return 0
+
+    async def refund(self, key='global', count=1):
+        """Return tokens taken for a request that another limit then refused."""
+        cache_key = f"{self.prefix}:{key}"
+        async with self._locked(cache_key) as locked:
+            if locked:
+                now = time.time()
+                tokens = await self._tokens(cache_key, now)
+                await cache.aset(cache_key, (min(self.capacity, tokens + count), now), timeout=self.ttl())
+
+    def ttl(self):
+        # Long enough for an empty bucket to refill completely; after that the default state is identical.
+        return math.ceil(self.capacity / self.refill_per_second) + 1
+
+
+class AdmissionController:
+    """
+    Bounds concurrent OCR work in this process.
+
+    Up to `workers` uploads run at once and up to `queue_depth` more wait for
+    the OCR executor; anything beyond that is rejected immediately so clients
+    get a fast 429 instead of piling onto a saturated node.
+    """
+
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.admitted_total = 0
+        self.rejected_saturated_total = 0
+        self.rejected_rate_limited_total = 0
+        self.completed_total = 0
+        self.avg_duration = 5.0  # seconds, exponentially weighted
+
+    def try_acquire(self, count=1):
+        """Reserve `count` slots; return a start timestamp for release(), or None when saturated."""
+        with self._lock:
+            if self.in_flight > 0 and self.in_flight + count > self.workers + self.queue_depth:
+                self.rejected_saturated_total += count
+                return None
+            self.in_flight += count
+            self.admitted_total += count
+        return time.monotonic()
+
+    def release(self, started, count=1):
+        # Batches run their files concurrently, so charge each file its share of the elapsed time
+        elapsed = (time.monotonic() - started) * min(count, self.workers) / count
+        with self._lock:
+            self.in_flight -= count
+            self.completed_total += count
+            self.avg_duration = 0.8 * self.avg_duration + 0.2 * elapsed
+
+    def record_rate_limited(self):
+        with self._lock:
+            self.rejected_rate_limited_total += 1
+
+    def retry_after(self):
+        """Rough seconds until a slot frees up, based on recent upload durations."""
+        with self._lock:
+            backlog = max(1, self.in_flight - self.workers + 1)
+            return max(1, math.ceil(self.avg_duration * backlog / self.workers))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_depth,
+                'in_flight': self.in_flight,
+                'running': min(self.in_flight, self.workers),
+                'queued': max(0, self.in_flight - self.workers),
+                'admitted_total': self.admitted_total,
+                'completed_total': self.completed_total,
+                'rejected_saturated_total': self.rejected_saturated_total,
+                'rejected_rate_limited_total': self.rejected_rate_limited_total,
+                'avg_duration_s': round(self.avg_duration, 2),
+            }
+
+
+user_upload_bucket = TokenBucket(
+    'upload-bucket:user',
+    capacity=getattr(settings, 'UPLOAD_USER_BURST', 10),
+    refill_per_minute=getattr(settings, 'UPLOAD_USER_RATE_PER_MINUTE', 6),
+)
+
+global_upload_bucket = TokenBucket(
+    'upload-bucket:global',
+    capacity=getattr(settings, 'UPLOAD_GLOBAL_BURST', 50),
+    refill_per_minute=getattr(settings, 'UPLOAD_GLOBAL_RATE_PER_MINUTE', 120),
+)
+
+upload_admission = AdmissionController(
+    workers=getattr(settings, 'OCR_WORKERS', 2),
+    queue_depth=getattr(settings, 'OCR_QUEUE_DEPTH', 8),
+)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AnchorBatch, BlockchainVerification, Certificate
+
+# Verified certificates are anchored in batches: their file hashes become the
+# leaves of a Merkle tree, only the root is written to the ledger, and each
+# certificate keeps the sibling path from its leaf to that root. Checking a
+# certificate is then log2(batch size) hashes plus one lookup of the batch root.
+BATCH_SIZE = getattr(settings, 'ANCHOR_BATCH_SIZE', 4096)
+
+# Leaves and inner nodes hash with different prefixes so an inner node can never pass as a leaf
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(file_hash):
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(file_hash)).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_tree(file_hashes):
+    """
+    Merkle root (hex) and one inclusion proof per leaf, in input order.
+
+    A proof is a list of [side, sibling hex] from the leaf upwards, side being
+    'L' or 'R' for where the sibling sits. A node without a sibling is carried
+    up unchanged rather than paired with itself.
+    """
+    if not file_hashes:
+        raise ValueError('Cannot build a Merkle tree without leaves')
+    level = [leaf_hash(file_hash) for file_hash in file_hashes]
+    positions = list(range(len(level)))  # index of each leaf's ancestor in the current level
+    proofs = [[] for _ in level]
+    while len(level) > 1:
+        for leaf, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                proofs[leaf].append(['L' if sibling < position else 'R', level[sibling].hex()])
+            positions[leaf] = position // 2
+        level = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+    return level[0].hex(), proofs
+
+
+def root_from_proof(file_hash, proof):
+    node = leaf_hash(file_hash)
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        node = node_hash(sibling, node) if side == 'L' else node_hash(node, sibling)
+    return node.hex()
+
+
+def verify_proof(file_hash, proof, merkle_root):
+    try:
+        return root_from_proof(file_hash, proof) == merkle_root
+    except (ValueError, TypeError):
+        return False
+
+
+class LocalLedger:
+    """
+    Local stand-in for a blockchain: an append-only JSON-lines file where each
+    entry commits to the previous one, and the entry's hash is its transaction
+    hash. Swap in a real network by pointing ANCHOR_LEDGER_BACKEND at a class
+    with the same `network`, `submit(root)` and `lookup(tx_hash)`.
+    """
+    network = 'local'
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = os.fspath(path or getattr(settings, 'ANCHOR_LEDGER_PATH', 'ledger/anchors.jsonl'))
+
+    def _entries(self):
+        try:
+            with open(self.path) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def submit(self, merkle_root):
+        with self._lock:
+            entries = self._entries()
+            entry = {
+                'previous': entries[-1]['tx_hash'] if entries else '0' * 64,
+                'merkle_root': merkle_root,
+                'timestamp': timezone.now().isoformat(),
+            }
+            entry['tx_hash'] = hashlib.sha256(json.dumps(entry, sort_keys=True).encode()).hexdigest()
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry, sort_keys=True) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        return entry['tx_hash']
+
+    def lookup(self, tx_hash):
+        """The Merkle root recorded by a transaction, or None."""
+        for entry in self._entries():
+            if entry['tx_hash'] == tx_hash:
+                return entry['merkle_root']
+        return None
+
+
+def get_ledger():
+    return import_string(getattr(settings, 'ANCHOR_LEDGER_BACKEND', 'certificates.anchoring.LocalLedger'))()
+
+
+def pending_certificates():
+    """Verified certificates with a file hash that no batch has anchored yet."""
+    return Certificate.objects.filter(
+        status='verified', file_hash__isnull=False, blockchainverification__isnull=True
+    ).exclude(file_hash='').order_by('pk')
+
+
+def anchor_batch(certificates, ledger):
+    """Anchor (pk, file_hash) pairs as one batch: one ledger write, one row per certificate."""
+    from .verification import forget as forget_verification
+
+    merkle_root, proofs = build_tree([file_hash for _, file_hash in certificates])
+    tx_hash = ledger.submit(merkle_root)
+    # The root is on the ledger before anything is recorded here; if the transaction
+    # below fails the certificates simply stay pending and the orphaned root is harmless.
+    with transaction.atomic():
+        batch = AnchorBatch.objects.create(
+            merkle_root=merkle_root, leaf_count=len(certificates),
+            transaction_hash=tx_hash, blockchain_network=ledger.network,
+        )
+        BlockchainVerification.objects.bulk_create([
+            BlockchainVerification(
+                certificate_id=pk, batch=batch, leaf_index=index, proof=proof,
+                transaction_hash=tx_hash, blockchain_network=ledger.network, verified=True,
+            )
+            for index, ((pk, _), proof) in enumerate(zip(certificates, proofs))
+        ])
+        Certificate.objects.filter(pk__in=[pk for pk, _ in certificates]).update(blockchain_tx_hash=tx_hash)
+        # Cached public answers for these hashes predate the anchor
+        forget_verification(file_hash for _, file_hash in certificates)
+    return batch
+
+
+def anchor_pending(batch_size=BATCH_SIZE, ledger=None):
+    """Anchor every pending certificate, batch_size leaves per ledger write. Returns the new batches."""
+    ledger = ledger or get_ledger()
+    batches = []
+    while True:
+        # Anchored certificates drop out of pending_certificates(), so each pass takes the next ones
+        certificates = list(pending_certificates().values_list('pk', 'file_hash')[:batch_size])
+        if not certificates:
+            return batches
+        batches.append(anchor_batch(certificates, ledger))
+
+
+def inclusion_proof(verification):
+    """What a third party needs to check an anchored certificate without trusting this server."""
+    batch = verification.batch
+    return {
+        'file_hash': verification.certificate.file_hash,
+        'merkle_root': batch.merkle_root,
+        'leaf_index': verification.leaf_index,
+        'proof': verification.proof,
+        'transaction_hash': batch.transaction_hash,
+        'blockchain_network': batch.blockchain_network,
+        'anchored_at': batch.created_at,
+    }
+
+
+def check_anchor(verification, ledger=None):
+    """
+    True when the certificate's file hash hashes up to its batch root and
+    (when a ledger is given) that root is what the ledger transaction recorded.
+    """
+    batch = verification.batch
+    if batch is None or not verify_proof(verification.certificate.file_hash, verification.proof, batch.merkle_root):
+        return False
+    return ledger is None or ledger.lookup(batch.transaction_hash) == batch.merkle_root
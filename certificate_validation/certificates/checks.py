@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Cache backends whose contents are private to one worker process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """Rate limits are only global when every worker uses the same cache."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Warning(
+            'The default cache is local to each process, so upload and verification rate limits are per worker.',
+            hint='Set REDIS_URL or configure a shared cache backend in CACHES.',
+            id='certificates.W001',
+        )]
+    return []
+
+
+@register(Tags.security)
+def trusted_proxies_check(app_configs, **kwargs):
+    """Counting proxies from the right only works for a count of zero or more."""
+    trusted_proxies = getattr(settings, 'PUBLIC_VERIFY_TRUSTED_PROXIES', 1)
+    if not isinstance(trusted_proxies, int) or trusted_proxies < 0:
+        return [Error(
+            'PUBLIC_VERIFY_TRUSTED_PROXIES must be a whole number of proxies, zero or more.',
+            hint='Use 0 to key the public verification rate limit on REMOTE_ADDR.',
+            id='certificates.E001',
+        )]
+    return []
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+import fitz  # PyMuPDF
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChunkedUpload
+from .ocr_budget import run_isolated
+
+logger = logging.getLogger(__name__)
+
+DATA_FILENAME = 'data.part'
+PAGES_DIRNAME = 'pages'
+
+# Running SHA-256 per upload, so each chunk is hashed once as it arrives.
+# Lost on restart or when chunks land on another worker; rebuilt from disk then.
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+# Uploads with an early render currently running in this process
+_early_renders = {}
+
+
+def upload_dir(upload_id):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, str(upload_id))
+
+
+def data_path(upload_id):
+    return os.path.join(upload_dir(upload_id), DATA_FILENAME)
+
+
+def create_upload(user, filename, name, issuer, course_name, total_size):
+    upload = ChunkedUpload.objects.create(
+        user=user, filename=filename, name=name, issuer=issuer,
+        course_name=course_name, total_size=total_size
+    )
+    os.makedirs(os.path.join(upload_dir(upload.id), PAGES_DIRNAME), exist_ok=True)
+    open(data_path(upload.id), 'wb').close()
+    return upload
+
+
+def _hasher_at(upload_id, offset):
+    """Return a SHA-256 object that has consumed exactly the first `offset` bytes of the upload."""
+    with _hashers_lock:
+        state = _hashers.get(upload_id)
+    if state and state[0] == offset:
+        return state[1]
+
+    hasher = hashlib.sha256()
+    with open(data_path(upload_id), 'rb') as f:
+        remaining = offset
+        while remaining > 0:
+            block = f.read(min(1024 * 1024, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append_chunk(upload, offset, chunk):
+    """
+    Write `chunk` at `offset` and advance the upload.
+
+    Returns the new offset, or None when `offset` does not match the stored one
+    (a retried or out-of-order chunk); the client should resume from upload.offset.
+    """
+    if offset != upload.offset or offset + len(chunk) > upload.total_size:
+        return None
+
+    # Claiming the offset with a conditional UPDATE takes the row's write lock (on
+    # SQLite, the database's) before anything is read, so claiming, writing and
+    # advancing are one step and a request that loses a race for the same offset
+    # waits, matches no row and never touches the file
+    with transaction.atomic():
+        if not ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(updated_at=timezone.now()):
+            return None
+        hasher = _hasher_at(upload.id, offset)
+        with open(data_path(upload.id), 'r+b') as f:
+            f.seek(offset)
+            f.write(chunk)
+            f.truncate()
+        new_offset = offset + len(chunk)
+        # update() skips auto_now; purge_chunked_uploads goes by updated_at
+        ChunkedUpload.objects.filter(pk=upload.pk).update(offset=new_offset, updated_at=timezone.now())
+    hasher.update(chunk)
+    with _hashers_lock:
+        _hashers[upload.id] = (new_offset, hasher)
+    upload.offset = new_offset
+    return new_offset
+
+
+def finish_hash(upload):
+    hasher = _hasher_at(upload.id, upload.offset)
+    with _hashers_lock:
+        _hashers.pop(upload.id, None)
+    return hasher.hexdigest()
+
+
+def discard_upload(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+    shutil.rmtree(upload_dir(upload_id), ignore_errors=True)
+    ChunkedUpload.objects.filter(pk=upload_id).delete()
+
+
+def page_complete(doc, page):
+    """Whether every content and image stream of `page` is present in a (possibly partial) document."""
+    xrefs = list(page.get_contents()) + [image[0] for image in page.get_images(full=True)]
+    return bool(page.get_contents()) and all(doc.xref_is_stream(xref) for xref in xrefs)
+
+
+def page_digest(doc, page):
+    """
+    Fingerprint of everything a page's rendering depends on: its content
+    streams, images and fonts. Equal digests mean an early render of a
+    partial file saw the same page as the finished upload.
+    """
+    digest = hashlib.sha1()
+    xrefs = list(page.get_contents())
+    xrefs += [image[0] for image in page.get_images(full=True)]
+    xrefs += [font[0] for font in page.get_fonts(full=True)]
+    for xref in xrefs:
+        if xref <= 0:
+            continue  # built-in fonts have no object of their own
+        digest.update(str(xref).encode())
+        if doc.xref_is_stream(xref):
+            digest.update(doc.xref_stream_raw(xref))
+        else:
+            digest.update(doc.xref_object(xref, compressed=True).encode())
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    """OCR text of pages rendered before the upload finished, keyed by page number and digest."""
+
+    def __init__(self, upload_id):
+        self.directory = os.path.join(upload_dir(upload_id), PAGES_DIRNAME)
+
+    def _path(self, page_number):
+        return os.path.join(self.directory, f"{page_number}.json")
+
+    def _load(self, page_number):
+        try:
+            with open(self._path(page_number)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def digest(self, page_number):
+        cached = self._load(page_number)
+        return cached['digest'] if cached else None
+
+    def lookup(self, page):
+        cached = self._load(page.number)
+        if cached is None or cached['digest'] != page_digest(page.parent, page):
+            return None
+        return cached['text']
+
+    def store(self, page, text, digest=None):
+        tmp_path = self._path(page.number) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'digest': digest or page_digest(page.parent, page), 'text': text}, f)
+        os.replace(tmp_path, self._path(page.number))
+
+
+def early_render(upload_id, ocr_page, max_pages):
+    """
+    OCR whichever leading pages can already be parsed from a partial PDF.
+
+    Truncated PDFs usually lack their xref table; MuPDF repairs them by
+    scanning objects, so complete early pages are often readable. The file is
+    opened in place, so MuPDF reads only the objects the pages need; bytes
+    appended meanwhile can only add objects, and pages whose digests change by
+    the time the upload finishes are simply re-OCRed.
+    """
+    try:
+        doc = fitz.open(data_path(upload_id), filetype='pdf')
+    except Exception:
+        return
+
+    cache = PageTextCache(upload_id)
+    try:
+        for page_number in range(min(len(doc), max_pages)):
+            try:
+                page = doc.load_page(page_number)
+                if not page_complete(doc, page):
+                    break
+                digest = page_digest(doc, page)
+                if cache.digest(page_number) != digest:
+                    cache.store(page, ocr_page(page), digest)
+            except Exception as e:
+                logger.debug(f"Early render of page {page_number} for upload {upload_id} stopped: {e}")
+                break
+    finally:
+        doc.close()
+
+
+def isolated_early_render(upload_id, ocr_page, max_pages):
+    """early_render() in a worker process within the OCR budgets; a partial file that overruns them is left alone."""
+    try:
+        run_isolated(early_render, upload_id, ocr_page, max_pages)
+    except Exception as e:
+        logger.debug(f"Early render for upload {upload_id} stopped: {e}")
+
+
+def schedule_early_render(upload_id, executor, ocr_page, max_pages):
+    """Start an early render on `executor` unless one is already running for this upload."""
+    if upload_id in _early_renders:
+        return
+    future = executor.submit(isolated_early_render, upload_id, ocr_page, max_pages)
+    _early_renders[upload_id] = future
+    # Registered after the entry exists, so a render that already finished still clears it
+    future.add_done_callback(lambda _: _early_renders.pop(upload_id, None))
+
+
+def pending_early_render(upload_id):
+    return _early_renders.get(upload_id)
@@ -0,0 +1,94 @@
+import re
+
+from .normalization import normalize
+
+DEFAULT_DOMAIN = 'General'
+DEFAULT_CATEGORY = 'Course Completion'
+
+# Course catalog: entered course names that decide the domain outright
+COURSE_DOMAINS = {
+    'python': 'Programming',
+    'java': 'Programming',
+    'ruby': 'Programming',
+    'sql': 'Databases',
+    'mongodb': 'Databases',
+}
+
+# Keyword rules, checked against the course name and the OCR text of the certificate
+DOMAIN_KEYWORDS = {
+    'Programming': [
+        'python', 'java', 'javascript', 'typescript', 'ruby', 'c\\+\\+', 'c#', 'golang', 'rust', 'kotlin',
+        'programming', 'software development', 'object oriented', 'data structures', 'algorithms',
+    ],
+    'Web Development': [
+        'html', 'css', 'react', 'angular', 'vue', 'node\\.?js', 'django', 'flask', 'web development',
+        'frontend', 'front end', 'backend', 'back end', 'full stack', 'responsive web design',
+    ],
+    'Databases': ['sql', 'mysql', 'postgresql', 'mongodb', 'database', 'nosql', 'oracle database'],
+    'Data Science': [
+        'data science', 'data analysis', 'data analytics', 'data visualization', 'pandas', 'statistics',
+        'tableau', 'power bi', 'big data', 'excel',
+    ],
+    'AI & Machine Learning': [
+        'machine learning', 'deep learning', 'artificial intelligence', 'neural networks', 'tensorflow',
+        'pytorch', 'natural language processing', 'computer vision', 'generative ai',
+    ],
+    'Cloud Computing': [
+        'aws', 'amazon web services', 'azure', 'google cloud', 'gcp', 'cloud computing', 'cloud practitioner',
+        'kubernetes', 'docker', 'devops', 'serverless',
+    ],
+    'Cybersecurity': [
+        'cybersecurity', 'cyber security', 'information security', 'network security', 'ethical hacking',
+        'penetration testing', 'security\\+', 'cissp',
+    ],
+    'Networking': ['networking', 'ccna', 'tcp/ip', 'network fundamentals'],
+    'Project Management': ['project management', 'pmp', 'agile', 'scrum', 'prince2', 'itil'],
+    'Marketing': ['digital marketing', 'marketing', 'seo', 'social media', 'content marketing', 'inbound'],
+}
+
+# First matching rule wins, so more specific credential types come first
+CATEGORY_KEYWORDS = [
+    ('Professional Certification', ['professional certificate', 'certification exam', 'pmp', 'itil']),
+    ('Specialization', ['specialization', 'nanodegree']),
+    ('Internship', ['internship', 'intern']),
+    ('Workshop', ['workshop', 'bootcamp', 'hackathon', 'webinar']),
+    ('Participation', ['participation', 'participated', 'attendance']),
+]
+
+# A hit in the course name counts more than one anywhere in the OCR text
+COURSE_MATCH_WEIGHT = 3
+
+
+def _compile(keywords):
+    return re.compile(r'(?<!\w)(?:' + '|'.join(keywords) + r')(?!\w)', re.IGNORECASE)
+
+
+DOMAIN_PATTERNS = [(domain, _compile(keywords)) for domain, keywords in DOMAIN_KEYWORDS.items()]
+CATEGORY_PATTERNS = [(category, _compile(keywords)) for category, keywords in CATEGORY_KEYWORDS]
+
+
+def classify_domain(course_name, text=''):
+    """Catalog lookup on the entered course, else the domain with the most keyword hits."""
+    course = course_name or ''
+    catalog_key = normalize(course)
+    if catalog_key in COURSE_DOMAINS:
+        return COURSE_DOMAINS[catalog_key]
+
+    best, best_score = DEFAULT_DOMAIN, 0
+    for domain, pattern in DOMAIN_PATTERNS:
+        score = COURSE_MATCH_WEIGHT * len(pattern.findall(course)) + len(pattern.findall(text or ''))
+        if score > best_score:
+            best, best_score = domain, score
+    return best
+
+
+def classify_category(course_name, text=''):
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(course_name or '') or pattern.search(text or ''):
+            return category
+    return DEFAULT_CATEGORY
+
+
+def classify(course_name, text=''):
+    """(domain, category) for a certificate from its course name and OCR text."""
+    return classify_domain(course_name, text), classify_category(course_name, text)
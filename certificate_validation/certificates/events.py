@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+QUEUE_SIZE = getattr(settings, 'EVENTS_QUEUE_SIZE', 100)
+MAX_STREAMS_PER_USER = getattr(settings, 'EVENTS_MAX_STREAMS_PER_USER', 5)
+HEARTBEAT_SECONDS = getattr(settings, 'EVENTS_HEARTBEAT_SECONDS', 15)
+
+
+class TooManyStreams(Exception):
+    pass
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe for per-user events.
+
+    Subscribers are SSE streams running on an event loop; publishers may be
+    request threads, the OCR executor or admin jobs, so delivery goes through
+    call_soon_threadsafe. Each stream has a bounded queue and loses its
+    oldest events rather than growing when a client stops reading. Events
+    only reach streams served by the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            streams = self._subscribers.setdefault(user_id, [])
+            if len(streams) >= MAX_STREAMS_PER_USER:
+                raise TooManyStreams()
+            streams.append(entry)
+        return entry
+
+    def unsubscribe(self, user_id, entry):
+        with self._lock:
+            streams = self._subscribers.get(user_id, [])
+            if entry in streams:
+                streams.remove(entry)
+            if not streams:
+                self._subscribers.pop(user_id, None)
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            streams = list(self._subscribers.get(user_id, ()))
+        if not streams:
+            return
+        message = (next(self._ids), event, data)
+        for loop, queue in streams:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                pass  # the stream's loop has shut down
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(streams) for streams in self._subscribers.values())
+
+
+def _offer(queue, message):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+broker = EventBroker()
+
+
+def publish_on_commit(user_id, event, data):
+    """Publish once the surrounding transaction commits, so clients never see rolled-back changes."""
+    if broker.has_subscribers(user_id):
+        transaction.on_commit(lambda: broker.publish(user_id, event, data))
+
+
+def notify_certificate_status(rows):
+    """rows: iterable of (certificate id, user id, name, status)."""
+    for certificate_id, user_id, name, status in rows:
+        publish_on_commit(user_id, 'certificate.status', {'id': certificate_id, 'name': name, 'status': status})
+
+
+def notify_rank(user_id, rank, previous_rank, total_weightage):
+    publish_on_commit(user_id, 'rank', {
+        'current_rank': rank, 'previous_rank': previous_rank, 'total_weightage': float(total_weightage),
+    })
+
+
+def format_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def event_stream(user_id, entry):
+    """SSE body: queued events as they arrive, a comment line as heartbeat when idle."""
+    _, queue = entry
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(*message)
+    finally:
+        broker.unsubscribe(user_id, entry)
@@ -0,0 +1,123 @@
+import csv
+import json
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Certificate, Course, UserProfile
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object whose write() returns the value, so csv.writer yields lines instead of buffering them."""
+
+    def write(self, value):
+        return value
+
+
+def csv_safe(value):
+    """Quote a user-controlled text cell that a spreadsheet would otherwise evaluate as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def parse_filters(params):
+    """Normalise date_from/date_to (YYYY-MM-DD, inclusive), domain and status from query params or options."""
+    filters = {}
+    for key in ('date_from', 'date_to'):
+        value = params.get(key)
+        if value:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"{key} must be a date in YYYY-MM-DD format")
+            boundary = time.min if key == 'date_from' else time.max
+            filters[key] = timezone.make_aware(datetime.combine(day, boundary))
+    for key in ('domain', 'status'):
+        if params.get(key):
+            filters[key] = params[key]
+    return filters
+
+
+def certificate_q(filters, prefix=''):
+    """Q object applying the export filters to certificates, optionally through a relation prefix."""
+    q = Q()
+    if 'date_from' in filters:
+        q &= Q(**{f'{prefix}upload_date__gte': filters['date_from']})
+    if 'date_to' in filters:
+        q &= Q(**{f'{prefix}upload_date__lte': filters['date_to']})
+    if 'domain' in filters:
+        q &= Q(**{f'{prefix}domain': filters['domain']})
+    if 'status' in filters:
+        q &= Q(**{f'{prefix}status': filters['status']})
+    return q
+
+
+def certificate_rows(filters):
+    columns = ['id', 'user__email', 'name', 'issuer', 'category', 'domain', 'weightage', 'status',
+               'upload_date', 'verification_date', 'file_hash']
+    queryset = Certificate.objects.filter(certificate_q(filters)).order_by('pk').values_list(*columns)
+    return columns, queryset.iterator(chunk_size=CHUNK_SIZE)
+
+
+def course_rows(filters):
+    # Courses carry no date, domain or status of their own; those filters select users with matching certificates.
+    columns = ['id', 'user__email', 'username', 'course_name', 'issuer']
+    queryset = Course.objects.order_by('pk')
+    if filters:
+        queryset = queryset.filter(user__in=Certificate.objects.filter(certificate_q(filters)).values('user'))
+    return columns, queryset.values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+
+
+def leaderboard_rows(filters):
+    """Standings over the filtered certificates, ranked the same way as update_user_ranks()."""
+    columns = ['rank', 'email', 'department', 'certificate_count', 'total_weightage']
+    cert_filter = certificate_q(filters, prefix='user__certificate__')
+    queryset = UserProfile.objects.annotate(
+        export_certificate_count=Count('user__certificate', filter=cert_filter),
+        export_total_weightage=Coalesce(
+            Sum('user__certificate__weightage', filter=cert_filter),
+            Decimal('0.0'),
+            output_field=DecimalField()
+        )
+    ).order_by('-export_total_weightage', 'user__email').values_list(
+        'user__email', 'department', 'export_certificate_count', 'export_total_weightage'
+    )
+    if filters:
+        queryset = queryset.filter(export_certificate_count__gt=0)
+
+    def ranked():
+        for rank, row in enumerate(queryset.iterator(chunk_size=CHUNK_SIZE), 1):
+            yield (rank, *row)
+
+    return columns, ranked()
+
+
+EXPORTS = {
+    'certificates': certificate_rows,
+    'courses': course_rows,
+    'leaderboard': leaderboard_rows,
+}
+
+
+def stream_export(kind, fmt, filters):
+    """Yield the export as encoded lines; memory use is one DB chunk regardless of table size."""
+    columns, rows = EXPORTS[kind](filters)
+    columns = [column.replace('__', '_') for column in columns]
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([csv_safe(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
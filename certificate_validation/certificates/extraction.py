@@ -0,0 +1,56 @@
+import json
+import zlib
+
+from .models import OCRExtraction
+
+COMPRESSION_LEVEL = 6
+
+# Entered detail -> OCRExtraction field holding the OCR line that matched it best
+EXTRACTED_FIELDS = {
+    'name': 'extracted_name',
+    'issuer': 'extracted_issuer',
+    'course': 'extracted_course',
+}
+
+
+def pack_pages(pages):
+    return zlib.compress(json.dumps(pages).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def unpack_pages(blob):
+    if not blob:
+        return []
+    return json.loads(zlib.decompress(bytes(blob)).decode('utf-8'))
+
+
+def pages_text(pages):
+    return ''.join(page['text'] for page in pages)
+
+
+def extraction_fields(pages, matches, extractor, duration_ms, profile=''):
+    """
+    OCRExtraction field values for one run of the pipeline.
+
+    `pages` are the per-page dicts from extract_pages(), including any
+    'fallback' reading of the same pages; `matches` maps
+    'name', 'issuer' and 'course' to the (score, best line) from similarity();
+    `profile` is the name of the OCR profile that read the pages.
+    """
+    fields = {
+        'pages': pack_pages(pages),
+        'page_count': len({page['page'] for page in pages}),
+        'extractor': extractor,
+        'profile': profile,
+        'duration_ms': int(duration_ms),
+        'failure_reason': '',
+        'match_scores': {key: score for key, (score, _) in matches.items()},
+    }
+    for key, (_, line) in matches.items():
+        fields[EXTRACTED_FIELDS[key]] = line.strip()[:255]
+    return fields
+
+
+def stored_pages(certificate):
+    """Per-page OCR output saved when `certificate` was verified, or None if there is none."""
+    blob = OCRExtraction.objects.filter(certificate=certificate).values_list('pages', flat=True).first()
+    return unpack_pages(blob) if blob else None
@@ -0,0 +1,130 @@
+import io
+import logging
+import os
+from itertools import combinations
+
+import fitz  # PyMuPDF
+from django.conf import settings
+from django.db.models import Q
+from PIL import Image
+
+from .models import Certificate
+from .ocr_budget import OCRFailed, fit_page
+
+logger = logging.getLogger(__name__)
+
+# 64-bit dHash split into four 16-bit bands for multi-index hashing.
+HASH_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = HASH_BITS // BAND_COUNT
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Maximum Hamming distance for two fingerprints to count as the same certificate.
+MAX_DISTANCE = getattr(settings, 'CERTIFICATE_PHASH_MAX_DISTANCE', 7)
+
+
+def render_first_page(document, filename='certificate.pdf', zoom=1.0):
+    """
+    Render the first page of a PDF (or image) upload to a PIL image, scaled down
+    to the OCR pixel budget. `document` is the file's bytes or its path on disk.
+    """
+    filetype = os.path.splitext(filename)[1].lstrip('.').lower() or 'pdf'
+    try:
+        if isinstance(document, (bytes, bytearray)):
+            doc = fitz.open(stream=document, filetype=filetype)
+        else:
+            doc = fitz.open(document, filetype=filetype)
+    except fitz.FileDataError as e:
+        raise OCRFailed(f"The document could not be opened: {e}")
+    try:
+        if not len(doc):
+            raise OCRFailed('The document has no pages')
+        page = doc.load_page(0)
+        dpi, _ = fit_page(page, round(72 * zoom))
+        pix = page.get_pixmap(dpi=dpi)
+        return Image.open(io.BytesIO(pix.tobytes('png'))).convert('RGB')
+    finally:
+        doc.close()
+
+
+def dhash(image, hash_size=8):
+    """Difference hash: compare horizontally adjacent pixels of a tiny greyscale thumbnail."""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_to_hex(value):
+    return f"{value:0{HASH_BITS // 4}x}"
+
+
+def hex_to_hash(hex_value):
+    return int(hex_value, 16)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def split_bands(value):
+    """Split a 64-bit hash into BAND_COUNT integers, most significant band first."""
+    return [
+        (value >> (BAND_BITS * (BAND_COUNT - 1 - i))) & BAND_MASK
+        for i in range(BAND_COUNT)
+    ]
+
+
+def band_fields(value):
+    """Model field values for storing a fingerprint on a Certificate."""
+    fields = {'perceptual_hash': hash_to_hex(value)}
+    for i, band in enumerate(split_bands(value)):
+        fields[f'phash_band_{i}'] = band
+    return fields
+
+
+def _neighbours(band, radius):
+    """All band values within Hamming distance `radius` of `band`."""
+    values = [band]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), r):
+            flipped = band
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+def find_near_duplicates(value, max_distance=MAX_DISTANCE, exclude_pk=None, user_id=None):
+    """
+    Return certificates whose fingerprint is within `max_distance` bits of
+    `value`, only `user_id`'s when given.
+
+    By the pigeonhole principle, two hashes within distance d agree to within
+    d // BAND_COUNT bits on at least one band, so probing each band's indexed
+    column for its near neighbours finds every candidate without a table scan.
+
+    Certificates printed from one issuer template differ in little more than
+    the name and date lines, so across users a match is only a candidate;
+    see confirmed_copies() in views.
+    """
+    radius = max_distance // BAND_COUNT
+    query = Q()
+    for i, band in enumerate(split_bands(value)):
+        query |= Q(**{f'phash_band_{i}__in': _neighbours(band, radius)})
+
+    candidates = Certificate.objects.filter(query).exclude(perceptual_hash=None)
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+    if user_id is not None:
+        candidates = candidates.filter(user_id=user_id)
+
+    matches = []
+    for certificate in candidates.only('id', 'user_id', 'name', 'perceptual_hash', 'file_hash'):
+        if hamming_distance(value, hex_to_hash(certificate.perceptual_hash)) <= max_distance:
+            matches.append(certificate)
+    return matches
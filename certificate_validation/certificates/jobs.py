@@ -0,0 +1,221 @@
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .events import notify_certificate_status
+from .extraction import extraction_fields, stored_pages
+from .models import BackgroundJob, Certificate, OCRExtraction
+from .ocr_budget import OCRFailed
+from .ocr_profiles import get_profile
+from .ranking import update_user_ranks
+from .scoring import active_weights, rescore_atomically
+from .verification import forget as forget_verification
+
+logger = logging.getLogger(__name__)
+
+# Admin bulk actions are queued as BackgroundJob rows and run by `manage.py
+# run_background_jobs`, so they survive restarts of the web server. A running
+# job whose worker stops sending heartbeats for STALE_SECONDS is marked failed
+# and loses its claim; a worker that was only slow then stops at its next
+# heartbeat instead of finishing the job.
+BATCH_SIZE = 500
+POLL_SECONDS = getattr(settings, 'BACKGROUND_JOB_POLL_SECONDS', 5)
+STALE_SECONDS = getattr(settings, 'BACKGROUND_JOB_STALE_SECONDS', 600)
+
+
+class JobInterrupted(Exception):
+    """The job was failed as orphaned while this worker still ran it."""
+
+
+def job_queryset(job):
+    """The certificates selected when the job was queued that still exist."""
+    return Certificate.objects.filter(pk__in=job.certificate_ids)
+
+
+def _batches(job):
+    """Primary keys of the job's certificates, BATCH_SIZE at a time in key order; deleted ones are skipped."""
+    ids = sorted(job.certificate_ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = list(
+            Certificate.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).order_by('pk').values_list('pk', flat=True)
+        )
+        if batch:
+            yield batch
+
+
+def _held(job):
+    return BackgroundJob.objects.filter(pk=job.pk, status='running', claim=job.claim)
+
+
+def _progress(job, count):
+    if not _held(job).update(processed=F('processed') + count, heartbeat_at=timezone.now()):
+        raise JobInterrupted(f"Background job {job.pk} was failed as orphaned while it was running")
+
+
+def set_status(job, new_status):
+    """Set-based status change, one UPDATE per batch."""
+    fields = {'status': new_status}
+    if new_status == 'verified':
+        fields['verification_date'] = timezone.now()
+    total = 0
+    for batch in _batches(job):
+        Certificate.objects.filter(pk__in=batch).update(**fields)
+        changed = list(Certificate.objects.filter(pk__in=batch).values_list('pk', 'user_id', 'name', 'file_hash'))
+        notify_certificate_status((pk, user_id, name, new_status) for pk, user_id, name, _ in changed)
+        forget_verification(file_hash for *_, file_hash in changed)
+        _progress(job, len(batch))
+        total += len(batch)
+    return f"Marked {total} certificates as {new_status}"
+
+
+def rescore(job):
+    """Recompute weightage from the active weight version, then re-rank once."""
+    weights = active_weights()
+    total = changed = 0
+    for batch in _batches(job):
+        changed += rescore_atomically(Certificate.objects.filter(pk__in=batch), weights)[1]
+        _progress(job, len(batch))
+        total += len(batch)
+    update_user_ranks()
+    return f"Re-scored {total} certificates, {changed} changed"
+
+
+def stored_file_pages(certificate, profile=None):
+    """OCR a stored certificate file within the OCR budgets; works for storage backends without local paths."""
+    from .views import read_pages
+
+    suffix = os.path.splitext(certificate.certificate_file.name)[1] or '.pdf'
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        with certificate.certificate_file.open('rb') as f:
+            for chunk in f.chunks():
+                tmp.write(chunk)
+    try:
+        return read_pages(tmp.name, profile=profile)
+    finally:
+        os.remove(tmp.name)
+
+
+def reverify(job):
+    """
+    Re-match certificates against their owner's current details and record the outcome.
+
+    Uses the OCR output stored at upload time; only certificates verified
+    before extractions were kept have their files OCRed again (once).
+    """
+    from .views import extractor_path, match_extraction
+
+    profile = get_profile()
+    verified = failed = 0
+    certificates = (
+        certificate
+        for batch in _batches(job)
+        for certificate in Certificate.objects.filter(pk__in=batch).select_related('user').order_by('pk')
+    )
+    for certificate in certificates:
+        try:
+            pages = stored_pages(certificate)
+            reused = pages is not None
+            started = time.monotonic()
+            if not reused:
+                pages = stored_file_pages(certificate, profile)
+            ok, matches = match_extraction(
+                certificate.user, certificate.issuer, certificate.course_name, pages, profile.match_threshold
+            )
+            fields = extraction_fields(
+                pages, matches, extractor_path(pages), (time.monotonic() - started) * 1000, profile.name
+            )
+            if reused:
+                # Pages and timings stay those of the original run; only the match results change
+                fields = {
+                    key: value for key, value in fields.items()
+                    if key not in ('pages', 'duration_ms', 'extractor', 'profile')
+                }
+            OCRExtraction.objects.update_or_create(
+                certificate=certificate,
+                defaults={'user': certificate.user, 'file_hash': certificate.file_hash or '', 'accepted': ok, **fields}
+            )
+        except OCRFailed as e:
+            logger.warning(f"Re-verification of certificate {certificate.pk} failed: {str(e)}")
+            OCRExtraction.objects.update_or_create(
+                certificate=certificate,
+                defaults={'user': certificate.user, 'file_hash': certificate.file_hash or '', 'accepted': False,
+                          'profile': profile.name, 'failure_reason': str(e)[:255]}
+            )
+            ok = False
+        except Exception as e:
+            logger.error(f"Re-verification of certificate {certificate.pk} failed: {str(e)}")
+            ok = False
+        Certificate.objects.filter(pk=certificate.pk).update(
+            status='verified' if ok else 'failed', verification_date=timezone.now()
+        )
+        notify_certificate_status([(certificate.pk, certificate.user_id, certificate.name, 'verified' if ok else 'failed')])
+        forget_verification([certificate.file_hash])
+        verified += ok
+        failed += not ok
+        _progress(job, 1)
+    return f"Re-verified {verified + failed} certificates: {verified} verified, {failed} failed"
+
+
+JOB_HANDLERS = {
+    'mark_verified': lambda job: set_status(job, 'verified'),
+    'mark_pending': lambda job: set_status(job, 'pending'),
+    'mark_failed': lambda job: set_status(job, 'failed'),
+    'rescore': rescore,
+    'reverify': reverify,
+}
+
+
+def run_job(job):
+    close_old_connections()
+    try:
+        message = JOB_HANDLERS[job.kind](job)
+        _held(job).update(status='done', message=message, finished_at=timezone.now())
+    except JobInterrupted as e:
+        logger.warning(str(e))
+    except Exception as e:
+        logger.error(f"Background job {job.pk} ({job.kind}) failed: {str(e)}", exc_info=True)
+        _held(job).update(status='failed', message=str(e), finished_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+def claim_next_job():
+    """Mark the oldest queued job as running under a new claim and return it, or None; safe with several workers."""
+    for job in BackgroundJob.objects.filter(status='queued').order_by('pk')[:10]:
+        claim = uuid.uuid4()
+        if BackgroundJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', claim=claim, heartbeat_at=timezone.now()
+        ):
+            job.status, job.claim = 'running', claim
+            return job
+    return None
+
+
+def fail_orphaned_jobs(stale_seconds=STALE_SECONDS):
+    """Mark running jobs failed when their worker has not reported progress for `stale_seconds`."""
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True)
+    return BackgroundJob.objects.filter(stale, status='running').update(
+        status='failed', claim=None, message='Interrupted: the worker running this job stopped',
+        finished_at=timezone.now()
+    )
+
+
+def enqueue(kind, queryset, user=None):
+    """
+    Queue `kind` over the certificates `queryset` selects now. Their primary
+    keys are stored, so rows created or changed to match the admin's filter
+    after the action was taken are left alone.
+    """
+    certificate_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    return BackgroundJob.objects.create(
+        kind=kind, created_by=user, total=len(certificate_ids), certificate_ids=certificate_ids
+    )
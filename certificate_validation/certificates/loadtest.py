@@ -0,0 +1,247 @@
+import math
+import random
+import statistics
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .oauth_standin import encode_identity
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of latencies."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    # The smallest sample with at least pct% of samples at or below it
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def outcome(response, expected=()):
+    """'ok' for 2xx and `expected` statuses, 'rejected' for other 4xx, 'error' for 5xx and connection errors."""
+    if response is None or response.status_code >= 500:
+        return 'error'
+    if 200 <= response.status_code < 300 or response.status_code in expected:
+        return 'ok'
+    return 'rejected'
+
+
+def run_load(method, url, total, concurrency, headers=None, expected=(), **request_kwargs):
+    """
+    Fire `total` requests at `url` from `concurrency` client threads.
+
+    Returns throughput and latency percentiles in milliseconds over the
+    successful responses (2xx and `expected` statuses); rejections and
+    errors are counted separately so fast 4xx answers cannot flatter the
+    numbers. Each thread keeps its own HTTP session so connection setup is
+    not measured per request.
+    """
+    latencies = []
+    counts = defaultdict(int)
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+    def worker(count):
+        session = requests.Session()
+        results = []
+        for _ in range(count):
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, headers=headers, timeout=60, **request_kwargs)
+            except requests.RequestException:
+                response = None
+            results.append((time.perf_counter() - start, outcome(response, expected)))
+        return results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for results in pool.map(worker, per_worker):
+            for elapsed, result in results:
+                counts[result] += 1
+                if result == 'ok':
+                    latencies.append(elapsed * 1000)
+    duration = time.perf_counter() - started
+    return summarize(latencies, counts['rejected'], counts['error'], duration)
+
+
+def summarize(latencies, rejected, errors, duration):
+    """`latencies` are those of the successful requests only."""
+    total = len(latencies)
+    return {
+        'requests': total + rejected + errors,
+        'ok': total,
+        'rejected': rejected,
+        'errors': errors,
+        'duration_s': round(duration, 3),
+        'throughput_rps': round(total / duration, 1) if duration else 0.0,
+        'mean_ms': round(statistics.fmean(latencies), 1) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+    }
+
+
+class Recorder:
+    """Successful latencies, rejections, errors and the active time window per endpoint, shared by all client threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.rejected = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.windows = {}
+
+    def request(self, session, label, method, url, expected=(), **kwargs):
+        """
+        Send one request and record it under `label`; returns the response, or
+        None on a connection error. 2xx and `expected` statuses count as successes.
+        """
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=60, **kwargs)
+        except requests.RequestException:
+            response = None
+        end = time.perf_counter()
+        result = outcome(response, expected)
+        with self._lock:
+            if result == 'ok':
+                self.latencies[label].append((end - start) * 1000)
+            self.rejected[label] += result == 'rejected'
+            self.errors[label] += result == 'error'
+            first, last = self.windows.get(label, (start, end))
+            self.windows[label] = (min(first, start), max(last, end))
+        return response
+
+    def report(self):
+        """summarize() per endpoint; throughput is over the time that endpoint was being exercised."""
+        return {
+            label: summarize(self.latencies[label], self.rejected[label], self.errors[label], last - first)
+            for label, (first, last) in self.windows.items()
+        }
+
+
+SYNTHETIC_COURSES = [
+    ('Coursera', 'Python'),
+    ('Udemy', 'Java'),
+    ('edX', 'SQL'),
+    ('Google', 'Machine Learning'),
+]
+
+
+def synthetic_users(count, run_id, kind='password'):
+    return [
+        {
+            'email': f"loadtest-{run_id}-{kind}-{index}@example.test",
+            'password': f"loadtest-{run_id}-{index}",
+            'first_name': 'Load',
+            'last_name': f"Tester{index}",
+            'session': requests.Session(),
+            'token': None,
+        }
+        for index in range(count)
+    ]
+
+
+def synthetic_certificate(user, issuer, course):
+    """
+    A one-page PDF carrying the details the verifier looks for, with a
+    per-user block pattern so near-duplicate detection tells them apart.
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    page = doc.new_page()
+    rng = random.Random(user['email'])
+    for _ in range(12):
+        x, y = rng.uniform(0, 500), rng.uniform(330, 760)
+        page.draw_rect(fitz.Rect(x, y, x + rng.uniform(20, 120), y + rng.uniform(20, 120)), fill=(0, 0, 0))
+    lines = ['Certificate of Completion', f"{user['first_name']} {user['last_name']}",
+             f"has completed {course}", f"offered by {issuer}"]
+    for index, line in enumerate(lines):
+        page.insert_text((72, 120 + index * 48), line, fontsize=24)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def auth_headers(user):
+    return {'Authorization': f"Token {user['token']}"}
+
+
+def scenario_signup(recorder, base_url, user, **options):
+    response = recorder.request(user['session'], 'POST api/signup/', 'POST', base_url + 'api/signup/', json={
+        key: user[key] for key in ('email', 'password', 'first_name', 'last_name')
+    })
+    if response is not None and response.status_code == 201:
+        user['token'] = response.json()['token']
+
+
+def scenario_signin(recorder, base_url, user, **options):
+    response = recorder.request(user['session'], 'POST api/signin/', 'POST', base_url + 'api/signin/', json={
+        'email': user['email'], 'password': user['password']
+    })
+    if response is not None and response.status_code == 200:
+        user['token'] = response.json()['token']
+
+
+def scenario_google_signin(recorder, base_url, user, **options):
+    """Google sign-in against the stand-in provider: begin, authorize (not timed), app callback."""
+    session = user['session']
+    begin = recorder.request(session, 'GET login/google-oauth2/', 'GET', base_url + 'login/google-oauth2/',
+                             expected=(302,), allow_redirects=False)
+    if begin is None or 'Location' not in begin.headers:
+        return
+    hint = encode_identity(user['email'], user['first_name'], user['last_name'])
+    authorize = session.get(f"{begin.headers['Location']}&login_hint={hint}", allow_redirects=False, timeout=60)
+    callback = recorder.request(session, 'GET auth/google/callback/', 'GET', authorize.headers['Location'],
+                                expected=(302,), allow_redirects=False)
+    if callback is not None and 'Location' in callback.headers:
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(callback.headers['Location']).query)
+        user['token'] = query.get('token', [None])[0]
+
+
+def scenario_dashboard(recorder, base_url, user, dashboard_polls=5, poll_interval=0.0, **options):
+    for _ in range(dashboard_polls):
+        recorder.request(user['session'], 'GET api/dashboard/', 'GET', base_url + 'api/dashboard/',
+                         headers=auth_headers(user))
+        if poll_interval:
+            time.sleep(poll_interval)
+
+
+def scenario_upload(recorder, base_url, user, **options):
+    index = int(user['last_name'].removeprefix('Tester'))
+    issuer, course = SYNTHETIC_COURSES[index % len(SYNTHETIC_COURSES)]
+    recorder.request(
+        user['session'], 'POST api/certificates/upload/', 'POST', base_url + 'api/certificates/upload/',
+        headers=auth_headers(user),
+        data={'issuer': issuer, 'course_name': course, 'name': f"{course} ({issuer})"},
+        files={'certificate_file': ('certificate.pdf', synthetic_certificate(user, issuer, course), 'application/pdf')},
+    )
+
+
+def scenario_leaderboard(recorder, base_url, user, **options):
+    recorder.request(user['session'], 'GET api/leaderboard/', 'GET', base_url + 'api/leaderboard/',
+                     headers=auth_headers(user))
+    recorder.request(user['session'], 'GET api/leaderboard/?domain=', 'GET', base_url + 'api/leaderboard/',
+                     headers=auth_headers(user), params={'domain': 'Programming'})
+
+
+# Run in this order; later scenarios use the tokens obtained by earlier ones
+SCENARIOS = {
+    'signup': scenario_signup,
+    'signin': scenario_signin,
+    'google': scenario_google_signin,
+    'dashboard': scenario_dashboard,
+    'upload': scenario_upload,
+    'leaderboard': scenario_leaderboard,
+}
+
+
+def run_scenario(scenario, recorder, base_url, users, concurrency, **options):
+    """Run `scenario` once per synthetic user, `concurrency` users at a time."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda user: scenario(recorder, base_url, user, **options), users))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from certificates.anchoring import BATCH_SIZE, anchor_pending, check_anchor, get_ledger, pending_certificates
+from certificates.models import BlockchainVerification
+
+
+class Command(BaseCommand):
+    help = (
+        'Anchor verified certificates that are not yet on the ledger: one Merkle root per batch, '
+        'with an inclusion proof stored per certificate. Meant to run on a schedule, e.g. hourly from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Certificates per ledger transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many certificates are pending')
+        parser.add_argument('--check', action='store_true',
+                            help='Re-check every stored proof against its batch root and the ledger instead')
+
+    def handle(self, *args, **options):
+        ledger = get_ledger()
+        if options['check']:
+            return self.check(ledger)
+
+        if options['dry_run']:
+            self.stdout.write(f"{pending_certificates().count()} certificates waiting to be anchored")
+            return
+
+        batches = anchor_pending(options['batch_size'], ledger)
+        for batch in batches:
+            self.stdout.write(f"Anchored {batch.leaf_count} certificates: root {batch.merkle_root} tx {batch.transaction_hash}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Anchored {sum(batch.leaf_count for batch in batches)} certificates in {len(batches)} batches "
+            f"on {ledger.network}"
+        ))
+
+    def check(self, ledger):
+        # Ledger lookups are per batch, not per certificate
+        roots = {}
+        failed = checked = 0
+        verifications = BlockchainVerification.objects.filter(batch__isnull=False).select_related('certificate', 'batch')
+        for verification in verifications.iterator(chunk_size=1000):
+            batch = verification.batch
+            if batch.pk not in roots:
+                roots[batch.pk] = ledger.lookup(batch.transaction_hash) == batch.merkle_root
+            ok = roots[batch.pk] and check_anchor(verification)
+            checked += 1
+            if not ok:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Certificate {verification.certificate_id} does not match its anchor"))
+        style = self.style.ERROR if failed else self.style.SUCCESS
+        self.stdout.write(style(f"Checked {checked} anchored certificates in {len(roots)} batches, {failed} failed"))
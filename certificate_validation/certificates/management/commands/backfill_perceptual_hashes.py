@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from certificates.fingerprint import render_first_page, dhash, band_fields
+from certificates.models import Certificate
+
+
+class Command(BaseCommand):
+    help = 'Compute perceptual fingerprints for certificates uploaded before near-duplicate detection existed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        pending = Certificate.objects.filter(perceptual_hash=None).exclude(certificate_file='')
+        updated = failed = 0
+        for certificate in pending.iterator(chunk_size=options['batch_size']):
+            try:
+                with certificate.certificate_file.open('rb') as f:
+                    image = render_first_page(f.read(), certificate.certificate_file.name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Skipping certificate {certificate.pk}: {e}")
+                continue
+            Certificate.objects.filter(pk=certificate.pk).update(**band_fields(dhash(image)))
+            updated += 1
+        self.stdout.write(self.style.SUCCESS(f"Fingerprinted {updated} certificates ({failed} failed)"))
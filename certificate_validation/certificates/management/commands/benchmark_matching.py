@@ -0,0 +1,89 @@
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from fuzzywuzzy import fuzz
+
+from certificates.extraction import pages_text, unpack_pages
+from certificates.loadtest import percentile
+from certificates.models import OCRExtraction
+from certificates.normalization import NormalizedText
+from certificates.views import similarity
+
+SYNTHETIC_TEXT = (
+    "CERTIFICATE OF COMPLETION\n"
+    "This is to certify that\n"
+    "A1ice Smith\n"
+    "has successfully completed the online course\n"
+    "Machine Learning with Pyth0n\n"
+    "offered by Coursera in partnership with Stanford Unıversity\n"
+    "Issued on 14 March 2O24 | Certiﬁcate ID 7XK2-99QF\n"
+    "Verify at coursera.org/verify/7XK299QF\n"
+) * 3
+SYNTHETIC_NEEDLES = ('Alice Smith', 'Coursera', 'Machine Learning with Python')
+
+
+def legacy_clean_text(text):
+    return re.sub(r'\W+', ' ', text).strip().lower()
+
+
+def legacy_is_similar(needle, haystack, threshold=70):
+    """The matcher before certificates.normalization, kept here as the baseline."""
+    needle_clean = legacy_clean_text(needle)
+    if fuzz.partial_ratio(needle_clean, legacy_clean_text(haystack)) >= threshold:
+        return True
+    for line in haystack.splitlines():
+        if fuzz.partial_ratio(needle_clean, legacy_clean_text(line)) >= threshold:
+            return True
+    return False
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-upload text normalisation and matching cost on stored OCR extractions '
+        '(or a synthetic certificate when none are stored), against the previous clean_text matcher.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=200, help='Stored extractions to use')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per sample')
+
+    def samples(self, limit):
+        rows = OCRExtraction.objects.exclude(pages=b'').order_by('-pk').values_list(
+            'pages', 'extracted_name', 'extracted_issuer', 'extracted_course'
+        )[:limit]
+        samples = [(pages_text(unpack_pages(pages)), needles) for pages, *needles in rows]
+        return samples or [(SYNTHETIC_TEXT, SYNTHETIC_NEEDLES)]
+
+    def handle(self, *args, **options):
+        samples = self.samples(options['samples'])
+        timings = {'legacy_match': [], 'normalize': [], 'match': []}
+        disagreements = 0
+
+        for _ in range(options['repeat']):
+            for text, needles in samples:
+                legacy, legacy_ms = timed(lambda: [legacy_is_similar(needle, text) for needle in needles])
+                normalized, normalize_ms = timed(NormalizedText, text)
+                decisions, match_ms = timed(lambda: [similarity(needle, normalized)[0] >= 70 for needle in needles])
+                timings['legacy_match'].append(legacy_ms)
+                timings['normalize'].append(normalize_ms)
+                timings['match'].append(normalize_ms + match_ms)
+                disagreements += sum(old != new for old, new in zip(legacy, decisions))
+
+        self.stdout.write(f"{len(samples)} samples x {options['repeat']} runs, "
+                          f"{statistics.mean(len(text) for text, _ in samples):.0f} characters of OCR text on average")
+        self.stdout.write(f"{'per upload':<34} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for label, key in (('previous matcher (clean_text)', 'legacy_match'),
+                           ('normalisation only', 'normalize'),
+                           ('normalisation + matching', 'match')):
+            values = timings[key]
+            self.stdout.write(f"{label:<34} {statistics.mean(values):>9.3f} "
+                              f"{percentile(values, 50):>9.3f} {percentile(values, 95):>9.3f}")
+        self.stdout.write(f"Field matches that differ from the previous matcher: {disagreements}")
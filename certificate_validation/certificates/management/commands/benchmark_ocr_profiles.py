@@ -0,0 +1,161 @@
+import csv
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+
+from certificates.loadtest import percentile
+from certificates.ocr_profiles import PROFILES, get_profile
+from certificates.views import read_and_match
+
+MANIFEST = 'manifest.csv'
+MANIFEST_COLUMNS = ('file', 'first_name', 'last_name', 'issuer', 'course', 'expected')
+
+FIRST_NAMES = ['Alice', 'Ravi', 'Meera', 'John', 'Fatima', 'Chen', 'Lucas', 'Priya', 'Omar', 'Sofia']
+LAST_NAMES = ['Smith', 'Kumar', 'Iyer', 'Okafor', 'Nguyen', 'Garcia', 'Rossi', 'Haddad', 'Novak', 'Brown']
+ISSUERS = ['Coursera', 'Udemy', 'edX', 'NPTEL', 'Google', 'Microsoft', 'AWS']
+COURSES = ['Machine Learning', 'Python for Data Science', 'Cloud Practitioner', 'Java Programming',
+           'Deep Learning Specialization', 'SQL Fundamentals', 'Web Development Bootcamp']
+
+
+def scanned_pdf(lines, rng):
+    """A one-page PDF that looks scanned: text rendered to a noisy, slightly rotated low-resolution image."""
+    import fitz  # PyMuPDF
+    from PIL import Image, ImageFilter
+
+    doc = fitz.open()
+    page = doc.new_page()
+    for index, line in enumerate(lines):
+        page.insert_text((60, 140 + index * 44), line, fontsize=rng.choice([16, 20, 24]))
+    pix = page.get_pixmap(dpi=rng.choice([90, 110, 130]))
+    doc.close()
+
+    image = Image.open(io.BytesIO(pix.tobytes())).convert('L')
+    noise = Image.effect_noise(image.size, rng.uniform(20, 60))
+    image = Image.blend(image, noise, 0.15).rotate(rng.uniform(-1.5, 1.5), fillcolor=255, expand=False)
+    image = image.filter(ImageFilter.GaussianBlur(rng.uniform(0, 0.8)))
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, format='PDF', resolution=pix.xres)
+    return buffer.getvalue()
+
+
+def synthetic_sample_set(directory, count, seed=7):
+    """
+    Write `count` labeled certificates plus manifest.csv to `directory`. About
+    half claim the details printed on the certificate ('accept'); the rest claim
+    someone else's name or a different course from the same issuer ('reject').
+    """
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        issuer, course = rng.choice(ISSUERS), rng.choice(COURSES)
+        lines = ['CERTIFICATE OF COMPLETION', 'This is to certify that', f"{first} {last}",
+                 'has successfully completed', course, f"offered by {issuer}",
+                 f"Certificate ID {rng.randrange(10 ** 8):08d}"]
+        claimed = {'first_name': first, 'last_name': last, 'issuer': issuer, 'course': course, 'expected': 'accept'}
+        if index % 2:
+            if rng.random() < 0.5:
+                claimed['first_name'] = rng.choice([n for n in FIRST_NAMES if n != first])
+                claimed['last_name'] = rng.choice([n for n in LAST_NAMES if n != last])
+            else:
+                claimed['course'] = rng.choice([c for c in COURSES if c != course])
+            claimed['expected'] = 'reject'
+        filename = f"sample_{index:04d}.pdf"
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(scanned_pdf(lines, rng))
+        rows.append({'file': filename, **claimed})
+
+    with open(os.path.join(directory, MANIFEST), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_samples(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        raise CommandError(f"{path} not found; expected columns: {', '.join(MANIFEST_COLUMNS)}")
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        if row.get('expected') not in ('accept', 'reject'):
+            raise CommandError(f"{row.get('file')}: expected must be 'accept' or 'reject'")
+        row['path'] = os.path.join(directory, row['file'])
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Run each OCR profile over a labeled sample set and report throughput and false accept/reject rates. '
+        f"The set is a directory of certificates with a {MANIFEST} ({', '.join(MANIFEST_COLUMNS)}; "
+        "expected is 'accept' when the claimed details are genuinely on the certificate, otherwise 'reject'). "
+        'Without --samples a synthetic scanned-looking set is generated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', help=f"Directory with the labeled certificates and {MANIFEST}")
+        parser.add_argument('--synthetic', type=int, default=20, help='Size of the generated set when --samples is not given')
+        parser.add_argument('--write-synthetic', metavar='DIR', help='Generate the synthetic set into DIR (and keep it)')
+        parser.add_argument('--profile', action='append', dest='profiles', choices=list(PROFILES),
+                            help='Profile to benchmark (repeatable); defaults to all')
+
+    def handle(self, *args, **options):
+        directory = options['samples'] or options['write_synthetic']
+        temporary = None
+        if not options['samples']:
+            if directory is None:
+                temporary = tempfile.TemporaryDirectory()
+                directory = temporary.name
+            os.makedirs(directory, exist_ok=True)
+            synthetic_sample_set(directory, options['synthetic'])
+        try:
+            samples = load_samples(directory)
+            positives = sum(sample['expected'] == 'accept' for sample in samples)
+            self.stdout.write(f"{len(samples)} samples ({positives} genuine, {len(samples) - positives} mismatched) "
+                              f"from {options['samples'] or 'a synthetic set'}")
+            self.stdout.write(f"{'profile':<10} {'docs/s':>7} {'pages/s':>8} {'mean ms':>9} {'p95 ms':>9} "
+                              f"{'false acc':>10} {'false rej':>10} {'errors':>7}")
+            for name in options['profiles'] or list(PROFILES):
+                self.report(get_profile(name), samples)
+        finally:
+            if temporary:
+                temporary.cleanup()
+
+    def run(self, profile, sample):
+        user = SimpleNamespace(first_name=sample['first_name'], last_name=sample['last_name'])
+        pages, accepted, _ = read_and_match(user, sample['issuer'], sample['course'], sample['path'], None, profile)
+        return accepted, len(pages)
+
+    def report(self, profile, samples):
+        latencies = []
+        pages = errors = false_accepts = false_rejects = 0
+        started = time.perf_counter()
+        for sample in samples:
+            sample_started = time.perf_counter()
+            try:
+                accepted, page_count = self.run(profile, sample)
+            except Exception as e:
+                self.stderr.write(f"{profile.name}: {sample['file']} failed: {e}")
+                errors += 1
+                accepted, page_count = False, 0
+            latencies.append((time.perf_counter() - sample_started) * 1000)
+            pages += page_count
+            false_accepts += accepted and sample['expected'] == 'reject'
+            false_rejects += not accepted and sample['expected'] == 'accept'
+        elapsed = time.perf_counter() - started
+
+        positives = sum(sample['expected'] == 'accept' for sample in samples)
+        negatives = len(samples) - positives
+        far = false_accepts / negatives if negatives else 0.0
+        frr = false_rejects / positives if positives else 0.0
+        self.stdout.write(
+            f"{profile.name:<10} {len(samples) / elapsed:>7.2f} {pages / elapsed:>8.2f} "
+            f"{statistics.mean(latencies):>9.1f} {percentile(latencies, 95):>9.1f} "
+            f"{far:>10.1%} {frr:>10.1%} {errors:>7}"
+        )
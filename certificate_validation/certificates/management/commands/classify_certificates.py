@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from certificates.classification import classify
+from certificates.extraction import pages_text, unpack_pages
+from certificates.models import Certificate, Domain
+from certificates.scoring import rebuild_domains
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Assign domain and category to certificates uploaded before classification existed, '
+        'then rebuild the per-domain aggregates from the certificates.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reclassify every certificate, not just unclassified ones')
+
+    def handle(self, *args, **options):
+        queryset = Certificate.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(domain='')
+
+        # Classify from the stored OCR text; uploads from before extractions were kept fall back to the name
+        assignments = defaultdict(list)
+        rows = queryset.values_list('pk', 'course_name', 'name', 'ocr_extraction__pages')
+        for pk, course_name, name, pages in rows.iterator(chunk_size=BATCH_SIZE):
+            text = pages_text(unpack_pages(pages)) if pages else name
+            assignments[classify(course_name, text)].append(pk)
+
+        classified = 0
+        for (domain, category), ids in assignments.items():
+            for start in range(0, len(ids), BATCH_SIZE):
+                classified += Certificate.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).update(
+                    domain=domain, category=category
+                )
+
+        rebuild_domains()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Classified {classified} certificates; rebuilt {Domain.objects.count()} domain aggregates"
+        ))
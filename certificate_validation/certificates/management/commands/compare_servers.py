@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from certificates.loadtest import run_load
+
+READ_ENDPOINTS = ['api/dashboard/', 'api/certificates/', 'api/leaderboard/', 'api/profile/']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare read-endpoint throughput of a WSGI and an ASGI deployment of this project, e.g.\n'
+        '  gunicorn certificate_validation.wsgi -w 4 -b :8001\n'
+        '  uvicorn certificate_validation.asgi:application --workers 4 --port 8002\n'
+        '  python manage.py compare_servers --token <key>'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi-url', default='http://127.0.0.1:8001/')
+        parser.add_argument('--asgi-url', default='http://127.0.0.1:8002/')
+        parser.add_argument('--token', required=True, help='API token of an existing user')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint per server')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Endpoint path to test (repeatable); defaults to all read endpoints')
+
+    def handle(self, *args, **options):
+        headers = {'Authorization': f"Token {options['token']}"}
+        endpoints = options['endpoints'] or READ_ENDPOINTS
+
+        self.stdout.write(f"{'server':<6} {'endpoint':<22} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'rejected':>8} {'errors':>7}")
+        for label in ('wsgi', 'asgi'):
+            base_url = options[f'{label}_url'].rstrip('/') + '/'
+            for endpoint in endpoints:
+                stats = run_load('GET', base_url + endpoint.lstrip('/'), options['requests'],
+                                 options['concurrency'], headers=headers)
+                self.stdout.write(
+                    f"{label:<6} {endpoint:<22} {stats['throughput_rps']:>8} {stats['p50_ms']:>8} "
+                    f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['rejected']:>8} {stats['errors']:>7}"
+                )
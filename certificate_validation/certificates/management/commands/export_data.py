@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from certificates.exports import EXPORTS, FORMATS, parse_filters, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Stream certificates, courses or leaderboard standings to CSV or JSONL with constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write; defaults to stdout')
+        parser.add_argument('--date-from', help='Only certificates uploaded on or after YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Only certificates uploaded on or before YYYY-MM-DD')
+        parser.add_argument('--domain')
+        parser.add_argument('--status', choices=['verified', 'pending', 'failed'])
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_filters(options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for line in stream_export(options['kind'], options['format'], filters):
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from certificates.chunked import discard_upload
+from certificates.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete resumable uploads that have not received a chunk recently, along with their partial files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, default=24)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['older_than_hours'])
+        stale = ChunkedUpload.objects.filter(updated_at__lt=cutoff).values_list('id', flat=True)
+        count = 0
+        for upload_id in stale.iterator():
+            discard_upload(upload_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} stale chunked uploads"))
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from certificates.models import Certificate, WeightVersion
+from certificates.scoring import (
+    DEFAULT_WEIGHT, activate_version, active_version_id, affected_certificates, apply_rescore,
+    load_weights, lock_certificates, plan_rescore, weight_changes
+)
+from certificates.ranking import update_user_ranks
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-score certificates against a weight version and make it the active one. '
+        'When switching versions only certificates whose issuer or course weight changed are '
+        'considered, unless --all is given; re-scoring the active version corrects every '
+        'certificate whose stored weightage differs from it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weight-version', type=int, help='Weight version to apply (default: the active one)')
+        parser.add_argument('--all', action='store_true',
+                            help='Re-score every certificate, not just those whose weights changed')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing them')
+
+    def handle(self, *args, **options):
+        current_id = active_version_id()
+        target_id = options['weight_version'] or current_id
+        if target_id is None:
+            raise CommandError('No weight version is active; pass --weight-version')
+        try:
+            target = WeightVersion.objects.get(pk=target_id)
+        except WeightVersion.DoesNotExist:
+            raise CommandError(f"Weight version {target_id} does not exist")
+
+        old_weights = load_weights(current_id) if current_id else ({}, {})
+        new_weights = load_weights(target.pk)
+        self.report_weight_changes(old_weights, new_weights, current_id, target.pk)
+
+        if options['all'] or target.pk == current_id:
+            # The plan only holds (issuer, course) groups whose stored weightage differs from the table
+            queryset = Certificate.objects.all()
+        else:
+            queryset = affected_certificates(old_weights, new_weights)
+
+        if options['dry_run']:
+            self.report_plan(plan_rescore(queryset, new_weights))
+            self.stdout.write('Dry run: nothing was written.')
+            return
+
+        # Planned and applied under the certificates' row locks, so edits in between cannot skew the deltas
+        with transaction.atomic():
+            lock_certificates(queryset)
+            plan = plan_rescore(queryset, new_weights)
+            self.report_plan(plan)
+            updated = apply_rescore(plan, queryset)
+            if target.pk != current_id:
+                activate_version(target)
+        update_user_ranks()
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-scored {updated} certificates; weight version {target.pk} is active"
+        ))
+
+    def report_weight_changes(self, old_weights, new_weights, old_id, new_id):
+        if old_id == new_id:
+            return
+        self.stdout.write(f"Weight changes (v{old_id} -> v{new_id}):")
+        for kind, old, new, names in zip(('issuer', 'course'), old_weights, new_weights,
+                                         weight_changes(old_weights, new_weights)):
+            for name in sorted(names):
+                self.stdout.write(
+                    f"  {kind:<7}{name:<40}{old.get(name, DEFAULT_WEIGHT):>6} -> {new.get(name, DEFAULT_WEIGHT)}"
+                )
+
+    def report_plan(self, plan):
+        if not plan['groups']:
+            self.stdout.write('No certificate weightages change.')
+            return
+        self.stdout.write('Certificates to re-score:')
+        for (issuer, course), group in sorted(plan['groups'].items()):
+            self.stdout.write(
+                f"  {issuer} / {course or '-'}: {group['certificates']} certificates -> "
+                f"{group['weightage']} each ({group['delta']:+} total)"
+            )
+        total_delta = sum(group['delta'] for group in plan['groups'].values())
+        self.stdout.write(
+            f"Users affected: {len(plan['user_deltas'])}, domains affected: {len(plan['domain_deltas'])}, "
+            f"total weightage change: {total_delta:+}"
+        )
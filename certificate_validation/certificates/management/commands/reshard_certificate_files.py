@@ -0,0 +1,43 @@
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from certificates.models import Certificate
+from certificates.storage import certificate_storage, content_path
+
+
+class Command(BaseCommand):
+    help = 'Move certificate files from the flat certificates/ directory into the content-addressed store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-old', action='store_true', help='Remove the original file after copying')
+
+    def handle(self, *args, **options):
+        storage = certificate_storage()
+        moved = skipped = 0
+        for certificate in Certificate.objects.exclude(certificate_file='').iterator(chunk_size=500):
+            old_name = certificate.certificate_file.name
+            source = storage if storage.exists(old_name) else default_storage
+            if not source.exists(old_name):
+                skipped += 1
+                self.stderr.write(f"Missing file for certificate {certificate.pk}: {old_name}")
+                continue
+
+            with source.open(old_name, 'rb') as f:
+                data = f.read()
+            file_hash = certificate.file_hash or hashlib.sha256(data).hexdigest()
+            new_name = content_path(file_hash, os.path.splitext(old_name)[1])
+            if new_name == old_name:
+                continue
+
+            if not storage.exists(new_name):
+                with source.open(old_name, 'rb') as f:
+                    storage.save(new_name, f)
+            Certificate.objects.filter(pk=certificate.pk).update(certificate_file=new_name, file_hash=file_hash)
+            if options['delete_old']:
+                source.delete(old_name)
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Re-sharded {moved} certificate files ({skipped} missing)"))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from certificates.jobs import POLL_SECONDS, claim_next_job, fail_orphaned_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued admin bulk actions (status changes, re-scoring, re-verification) until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-seconds', type=float, default=POLL_SECONDS)
+
+    def handle(self, *args, **options):
+        while True:
+            orphaned = fail_orphaned_jobs()
+            if orphaned:
+                self.stdout.write(self.style.WARNING(f"Marked {orphaned} interrupted jobs as failed"))
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_seconds'])
+                continue
+            self.stdout.write(f"Running {job.kind} job #{job.pk}")
+            run_job(job)
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+from certificates.warmup import HEAVY_MODULES
+
+STARTUP_SCRIPT = (
+    "import django; django.setup(); "
+    "from certificate_validation.wsgi import application; "
+    "import certificates.views"
+)
+
+
+def parse_importtime(stderr):
+    """Rows of (self_us, cumulative_us, module) from `python -X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+        # One separator space, then two more per level of nesting
+        rows.append((int(self_us), int(cumulative_us), module[1:].rstrip()))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Start a fresh interpreter the way a web worker does (Django setup, WSGI app, certificate views) '
+        'and report what each import costs, using python -X importtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Number of most expensive imports to list')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'certificate_validation.settings'
+        ))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            capture_output=True, text=True, env=env, cwd=os.getcwd()
+        )
+        rows = parse_importtime(result.stderr)
+        if result.returncode != 0:
+            self.stderr.write(result.stderr.splitlines()[-1] if result.stderr else 'Startup failed')
+
+        top_level = [row for row in rows if not row[2].startswith(' ')]
+        total_us = sum(cumulative for _, cumulative, _ in top_level)
+        self.stdout.write(f"Worker start-up imports: {total_us / 1000:.0f} ms across {len(rows)} modules")
+
+        self.stdout.write(f"\n{'top-level import':<40} {'cumulative ms':>14}")
+        for _, cumulative, module in sorted(top_level, key=lambda row: -row[1])[:options['top']]:
+            self.stdout.write(f"{module.strip():<40} {cumulative / 1000:>14.1f}")
+
+        self.stdout.write(f"\n{'module (self time)':<40} {'self ms':>14}")
+        for self_us, _, module in sorted(rows, key=lambda row: -row[0])[:options['top']]:
+            self.stdout.write(f"{module.strip():<40} {self_us / 1000:>14.1f}")
+
+        heavy = {module.strip(): cumulative for _, cumulative, module in rows if module.strip() in HEAVY_MODULES}
+        self.stdout.write(f"\n{'preloaded by the warm-start hook':<40} {'cumulative ms':>14}")
+        for module in HEAVY_MODULES:
+            cost = f"{heavy[module] / 1000:.1f}" if module in heavy else 'not imported'
+            self.stdout.write(f"{module:<40} {cost:>14}")
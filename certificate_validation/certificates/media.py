@@ -0,0 +1,170 @@
+import mimetypes
+import re
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .storage import CERTIFICATE_PREFIX, certificate_storage
+from .streaming import streaming_content
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Media is served without authentication only for profile images. Certificate
+# files (content-addressed: certificates/ab/cd/abcd<60 hex>.pdf) name their
+# holder and their SHA-256 is handed to third parties by public verification,
+# so they are served to staff sessions or on short-lived signed URLs from
+# certificate_file_url(). Thumbnails (signed URLs, see previews.py), flat
+# legacy names (move them with reshard_certificate_files) and OCR copies are
+# not served here.
+CONTENT_NAME_RE = re.compile(rf'^{CERTIFICATE_PREFIX}/([0-9a-f]{{2}})/([0-9a-f]{{2}})/\1\2[0-9a-f]{{60}}(\.[a-z0-9]+)?$')
+PUBLIC_PREFIXES = ('profile_images/',)
+FILE_URL_MAX_AGE_SECONDS = getattr(settings, 'CERTIFICATE_FILE_URL_MAX_AGE_SECONDS', 300)
+signer = signing.Signer(salt='certificate-file')
+
+
+def is_public(name):
+    return name.startswith(PUBLIC_PREFIXES)
+
+
+def file_signature(name, expires):
+    return signer.signature(f"{name}/{expires}")
+
+
+def certificate_file_url(request, name):
+    """Absolute media URL for a certificate file, signed for FILE_URL_MAX_AGE_SECONDS."""
+    if not name:
+        return None
+    expires = int(time.time()) + FILE_URL_MAX_AGE_SECONDS
+    query = urlencode({'expires': expires, 'signature': file_signature(name, expires)})
+    return request.build_absolute_uri(f"{settings.MEDIA_URL}{name}?{query}")
+
+
+def signed_for(request, name):
+    """Seconds left on the request's signed URL for `name`, or None when it is missing, wrong or expired."""
+    try:
+        expires = int(request.GET.get('expires'))
+    except (TypeError, ValueError):
+        return None
+    remaining = expires - int(time.time())
+    if remaining <= 0 or not constant_time_compare(file_signature(name, expires), request.GET.get('signature') or ''):
+        return None
+    return remaining
+
+
+def may_read(request, name):
+    if is_public(name):
+        return True
+    if not CONTENT_NAME_RE.match(name):
+        return False
+    return signed_for(request, name) is not None or getattr(request.user, 'is_staff', False)
+
+
+def storage_for(name):
+    """Certificate files come from the certificate backend; everything else from default storage."""
+    if name.startswith(f"{CERTIFICATE_PREFIX}/"):
+        return certificate_storage()
+    return default_storage
+
+
+def parse_range(header, size):
+    """Parse a single-range `Range: bytes=a-b` header into an inclusive (start, end), or None."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def iter_file(f, start, length):
+    try:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def offload_response(storage, name, content_type):
+    """Hand the file to the front-end web server when configured and the backend has local paths."""
+    mode = getattr(settings, 'MEDIA_OFFLOAD', '')
+    if not mode:
+        return None
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-sendfile':
+        response['X-Sendfile'] = path
+    elif mode == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + name
+    else:
+        return None
+    return response
+
+
+def serve_media(request, path):
+    """
+    Serve an uploaded file with HTTP range support.
+
+    Replaces django.conf.urls.static.static(): files are streamed in chunks
+    (or offloaded via X-Sendfile / X-Accel-Redirect) instead of read whole.
+    Only public names, and certificate files on a signed URL or to staff,
+    are served (see may_read()).
+    """
+    storage = storage_for(path)
+    if '..' in path.split('/') or not may_read(request, path) or not storage.exists(path):
+        raise Http404('File not found')
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    response = offload_response(storage, path, content_type)
+
+    if response is None:
+        size = storage.size(path)
+        byte_range = None
+        if 'Range' in request.headers:
+            byte_range = parse_range(request.headers['Range'], size)
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f"bytes */{size}"
+                return response
+
+        start, end = byte_range or (0, size - 1)
+        length = max(0, end - start + 1)
+        response = StreamingHttpResponse(
+            streaming_content(request, iter_file(storage.open(path, 'rb'), start, length), thread_sensitive=False),
+            content_type=content_type,
+            status=206 if byte_range else 200,
+        )
+        response['Content-Length'] = str(length)
+        if byte_range:
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+
+    response['Accept-Ranges'] = 'bytes'
+    if storage is certificate_storage():
+        # Certificate names embed their SHA-256, so the bytes behind a URL never change;
+        # they still name a person, so only the requesting browser keeps a copy, until the URL expires
+        response['Cache-Control'] = f"private, max-age={signed_for(request, path) or 0}"
+    return response
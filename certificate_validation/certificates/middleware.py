@@ -1,10 +1,26 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 
 class DisableCsrfForApiMiddleware:
+    # Both sync and async, so async views under ASGI are not routed through a thread per request
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.exempt(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.exempt(request)
+        return await self.get_response(request)
+
+    def exempt(self, request):
         if request.path.startswith('/api/'):
-            setattr(request, '_dont_enforce_csrf_checks', True)
-        return self.get_response(request)
\ No newline at end of file
+            setattr(request, '_dont_enforce_csrf_checks', True)
\ No newline at end of file
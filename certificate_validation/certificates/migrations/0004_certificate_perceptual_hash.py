@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0003_certificate_file_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="certificate",
+            name="perceptual_hash",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band_0",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band_1",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band_2",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band_3",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
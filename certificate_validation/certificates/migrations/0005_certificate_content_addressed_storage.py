@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-19 18:50
+
+import certificates.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0004_certificate_perceptual_hash"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="certificate",
+            name="certificate_file",
+            field=models.FileField(
+                storage=certificates.storage.certificate_storage,
+                upload_to=certificates.storage.certificate_upload_to,
+            ),
+        ),
+    ]
@@ -0,0 +1,183 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:00
+
+import django.db.models.deletion
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+# The weights that used to be hard-coded in certificates/scoring.py, published as version 1
+INITIAL_ISSUER_WEIGHTS = {
+    "Coursera": 9.5,
+    "Udemy": 7.0,
+    "LinkedIn Learning": 8.5,
+    "Microsoft Learn": 8.5,
+    "Amazon Web Services (AWS)": 9.0,
+    "edX": 9.5,
+    "Udacity": 9.0,
+    "PMP": 10.0,
+    "ITIL": 9.0,
+    "HubSpot Academy": 7.0,
+    "FutureLearn": 6.5,
+    "Great Learning": 7.5,
+    "Skillshare": 6.0,
+    "Alison": 6.5,
+    "freeCodeCamp": 8.0,
+    "CodeSignal": 8.5,
+    "OpenLearn": 6.5,
+    "NPTEL": 8.5,
+    "SWAYAM": 8.0,
+    "Google": 9.0,
+    "LetsUpgrade": 7.0,
+}
+
+INITIAL_COURSE_WEIGHTS = {
+    "python": 7.0,
+    "java": 7.5,
+    "ruby": 6.0,
+    "sql": 7.0,
+    "mongodb": 7.5,
+}
+
+
+def seed_weights(apps, schema_editor):
+    WeightVersion = apps.get_model("certificates", "WeightVersion")
+    ScoringWeight = apps.get_model("certificates", "ScoringWeight")
+    version = WeightVersion.objects.create(
+        note="Initial weights", is_active=True, activated_at=django.utils.timezone.now()
+    )
+    ScoringWeight.objects.bulk_create(
+        [
+            ScoringWeight(version=version, kind="issuer", name=name, weight=weight)
+            for name, weight in INITIAL_ISSUER_WEIGHTS.items()
+        ]
+        + [
+            ScoringWeight(version=version, kind="course", name=name, weight=weight)
+            for name, weight in INITIAL_COURSE_WEIGHTS.items()
+        ]
+    )
+
+
+def pair_course_names(Certificate, Course):
+    """
+    ({certificate pk: course entered at upload}, [ambiguous certificate pks]).
+
+    Uploads created the Certificate and then its Course, so within one
+    (user, issuer) the n-th certificate by pk goes with the n-th course.
+    Deleting a certificate left its Course behind, so a group whose counts
+    differ can only be resolved when all its courses have the same name.
+    """
+    courses = {}
+    for user_id, issuer, course_name in Course.objects.order_by("pk").values_list(
+        "user_id", "issuer", "course_name"
+    ):
+        courses.setdefault((user_id, issuer), []).append(course_name)
+    certificates = {}
+    for pk, user_id, issuer in Certificate.objects.order_by("pk").values_list(
+        "pk", "user_id", "issuer"
+    ):
+        certificates.setdefault((user_id, issuer), []).append(pk)
+
+    paired, ambiguous = {}, []
+    for key, pks in certificates.items():
+        names = courses.get(key, [])
+        if len(set(names)) == 1:
+            paired.update(dict.fromkeys(pks, names[0]))
+        elif len(names) == len(pks):
+            paired.update(zip(pks, names))
+        elif names:
+            ambiguous.extend(pks)
+    return paired, ambiguous
+
+
+def backfill_course_names(apps, schema_editor):
+    """Copy the course entered at upload time from its Course row; ambiguous ones stay blank and are listed."""
+    Certificate = apps.get_model("certificates", "Certificate")
+    Course = apps.get_model("certificates", "Course")
+    paired, ambiguous = pair_course_names(Certificate, Course)
+    for pk, course_name in paired.items():
+        Certificate.objects.filter(pk=pk).update(course_name=course_name)
+    if ambiguous:
+        print(
+            f"\n  {len(ambiguous)} certificates left without a course name (set them in the admin, "
+            f"then run rescore_certificates): {sorted(ambiguous)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0007_admin_indexes_backgroundjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoringWeight",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("issuer", "Issuer"), ("course", "Course")],
+                        max_length=10,
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("weight", models.DecimalField(decimal_places=2, max_digits=4)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="WeightVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("note", models.CharField(blank=True, max_length=255)),
+                ("is_active", models.BooleanField(db_index=True, default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("activated_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="course_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name="certificate",
+            index=models.Index(
+                django.db.models.functions.text.Lower("course_name"),
+                name="certificate_course_key_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scoringweight",
+            name="version",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="weights",
+                to="certificates.weightversion",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="scoringweight",
+            constraint=models.UniqueConstraint(
+                fields=("version", "kind", "name"), name="unique_weight_per_version"
+            ),
+        ),
+        migrations.RunPython(seed_weights, migrations.RunPython.noop),
+        migrations.RunPython(backfill_course_names, migrations.RunPython.noop),
+    ]
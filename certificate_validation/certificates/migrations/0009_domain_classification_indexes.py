@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0008_versioned_scoring_weights"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="certificate",
+            index=models.Index(
+                fields=["user", "domain"], name="certificate_user_domain_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="domain",
+            index=models.Index(
+                fields=["name", "-total_weightage", "certificate_count"],
+                name="domain_leaderboard_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="domain",
+            index=models.Index(fields=["user", "name"], name="domain_user_name_idx"),
+        ),
+    ]
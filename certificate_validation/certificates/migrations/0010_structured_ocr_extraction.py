@@ -0,0 +1,80 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0009_domain_classification_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="accepted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="certificate",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ocr_extraction",
+                to="certificates.certificate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="duration_ms",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="extractor",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="file_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="match_scores",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="page_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="pages",
+            field=models.BinaryField(blank=True, default=b""),
+        ),
+        migrations.AlterField(
+            model_name="ocrextraction",
+            name="certificate_file",
+            field=models.FileField(blank=True, upload_to="ocr_extracted_certificates/"),
+        ),
+        migrations.AlterField(
+            model_name="ocrextraction",
+            name="extracted_course",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="ocrextraction",
+            name="extracted_issuer",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="ocrextraction",
+            name="extracted_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0010_structured_ocr_extraction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnchorBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("merkle_root", models.CharField(db_index=True, max_length=64)),
+                ("leaf_count", models.PositiveIntegerField()),
+                ("transaction_hash", models.CharField(db_index=True, max_length=255)),
+                ("blockchain_network", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="blockchainverification",
+            name="leaf_index",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="blockchainverification",
+            name="proof",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="blockchainverification",
+            name="batch",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="verifications",
+                to="certificates.anchorbatch",
+            ),
+        ),
+    ]
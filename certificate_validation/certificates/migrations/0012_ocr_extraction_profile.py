@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0011_merkle_anchoring"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="profile",
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
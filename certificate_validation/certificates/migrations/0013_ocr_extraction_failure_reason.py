@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0012_ocr_extraction_profile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocrextraction",
+            name="failure_reason",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:48
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# Admin '^field' searches run UPPER(field) LIKE 'TERM%'. On PostgreSQL only an
+# index on UPPER(field) with text_pattern_ops serves that under a non-C
+# collation, and operator classes are PostgreSQL syntax, so these are created
+# here rather than declared on the models.
+PREFIX_SEARCH_INDEXES = [
+    ('certificate_name_prefix_idx', 'certificates_certificate', 'name'),
+    ('certificate_issuer_prefix_idx', 'certificates_certificate', 'issuer'),
+    ('userprofile_department_prefix_idx', 'certificates_userprofile', 'department'),
+    ('domain_name_prefix_idx', 'certificates_domain', 'name'),
+]
+
+
+def create_prefix_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in PREFIX_SEARCH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_prefix_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in PREFIX_SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("certificates", "0013_ocr_extraction_failure_reason"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backgroundjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="backgroundjob",
+            name="query",
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                django.db.models.functions.text.Upper("email"),
+                name="user_email_upper_idx",
+            ),
+        ),
+        migrations.RunPython(create_prefix_search_indexes, drop_prefix_search_indexes),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:51
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_domains(apps, schema_editor):
+    """Concurrent first uploads could each create a row; both took increments, so their sums are the totals."""
+    Domain = apps.get_model("certificates", "Domain")
+    duplicates = (
+        Domain.objects.values("user_id", "name")
+        .annotate(rows=Count("id"), count=Sum("certificate_count"), total=Sum("total_weightage"))
+        .filter(rows__gt=1)
+    )
+    for duplicate in list(duplicates):
+        rows = Domain.objects.filter(user_id=duplicate["user_id"], name=duplicate["name"]).order_by("pk")
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+        Domain.objects.filter(pk=keep.pk).update(
+            certificate_count=duplicate["count"], total_weightage=duplicate["total"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0014_background_job_query_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_domains, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="domain",
+            name="domain_user_name_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="domain",
+            constraint=models.UniqueConstraint(
+                fields=("user", "name"), name="unique_domain_per_user"
+            ),
+        ),
+    ]
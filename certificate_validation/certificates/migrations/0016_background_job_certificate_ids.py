@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-19 21:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_jobs_without_selection(apps, schema_editor):
+    """Jobs queued with a stored filter have no primary-key snapshot; they are failed rather than re-run on today's rows."""
+    BackgroundJob = apps.get_model("certificates", "BackgroundJob")
+    BackgroundJob.objects.filter(status__in=["queued", "running"]).update(
+        status="failed",
+        message="Queued before job selections were stored; run the action again",
+        finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0015_unique_domain_per_user"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backgroundjob",
+            name="certificate_ids",
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="backgroundjob",
+            name="claim",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fail_jobs_without_selection, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="backgroundjob",
+            name="query",
+        ),
+    ]
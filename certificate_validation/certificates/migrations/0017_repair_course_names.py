@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-19 21:20
+
+from importlib import import_module
+
+from django.db import migrations
+
+pair_course_names = import_module(
+    "certificates.migrations.0008_versioned_scoring_weights"
+).pair_course_names
+
+
+def repair_course_names(apps, schema_editor):
+    """
+    0008 used to give every certificate of a (user, issuer) the first course
+    entered for that issuer. Re-pair them by creation order; groups that
+    cannot be paired are listed rather than guessed.
+    """
+    Certificate = apps.get_model("certificates", "Certificate")
+    Course = apps.get_model("certificates", "Course")
+    paired, ambiguous = pair_course_names(Certificate, Course)
+    repaired = 0
+    for pk, course_name in paired.items():
+        repaired += Certificate.objects.filter(pk=pk).exclude(course_name=course_name).update(
+            course_name=course_name
+        )
+    if repaired:
+        print(f"\n  Corrected the course name of {repaired} certificates; run rescore_certificates")
+    if ambiguous:
+        print(
+            f"\n  {len(ambiguous)} certificates could not be matched to the course entered at upload; "
+            f"check their course names in the admin: {sorted(ambiguous)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificates", "0016_background_job_certificate_ids"),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_course_names, migrations.RunPython.noop),
+    ]
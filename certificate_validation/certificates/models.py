@@ -1,6 +1,9 @@
+import uuid
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models.functions import Lower, Upper
 from django.conf import settings
+from .storage import certificate_upload_to, certificate_storage
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -30,6 +33,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            # Admin '=user__email' searches compare UPPER(email)
+            models.Index(Upper('email'), name='user_email_upper_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -38,7 +47,7 @@ class UserProfile(models.Model):
     department = models.CharField(max_length=100, blank=True)
     join_date = models.DateField(auto_now_add=True)
     profile_image = models.ImageField(upload_to='profile_images/', null=True, blank=True)
-    current_rank = models.IntegerField(default=0)
+    current_rank = models.IntegerField(default=0, db_index=True)
     total_weightage = models.DecimalField(max_digits=6, decimal_places=2, default=0.0)
 
     def __str__(self):
@@ -52,17 +61,31 @@ class Certificate(models.Model):
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    name = models.CharField(max_length=255)
-    issuer = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
+    issuer = models.CharField(max_length=255, db_index=True)
     category = models.CharField(max_length=100)
-    domain = models.CharField(max_length=100)
+    domain = models.CharField(max_length=100, db_index=True)
     weightage = models.DecimalField(max_digits=5, decimal_places=2)
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
-    upload_date = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    upload_date = models.DateTimeField(auto_now_add=True, db_index=True)
     verification_date = models.DateTimeField(null=True, blank=True)
-    certificate_file = models.FileField(upload_to='certificates/')
+    certificate_file = models.FileField(upload_to=certificate_upload_to, storage=certificate_storage)
+    course_name = models.CharField(max_length=255, blank=True)
     blockchain_tx_hash = models.CharField(max_length=255, null=True, blank=True)
-    file_hash = models.CharField(max_length=64, null=True, blank=True)
+    file_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # 64-bit dHash of the first rendered page, plus its four 16-bit bands for near-duplicate lookups
+    perceptual_hash = models.CharField(max_length=16, null=True, blank=True)
+    phash_band_0 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band_1 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band_2 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band_3 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Course weights are keyed case-insensitively; lets re-scoring find certificates by course
+            models.Index(Lower('course_name'), name='certificate_course_key_idx'),
+            models.Index(fields=['user', 'domain'], name='certificate_user_domain_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.user.email})"
@@ -73,6 +96,16 @@ class Domain(models.Model):
     certificate_count = models.IntegerField(default=0)
     total_weightage = models.DecimalField(max_digits=6, decimal_places=2, default=0.0)
 
+    class Meta:
+        indexes = [
+            # Per-domain leaderboards read these rows directly, in rank order
+            models.Index(fields=['name', '-total_weightage', 'certificate_count'], name='domain_leaderboard_idx'),
+        ]
+        constraints = [
+            # One aggregate row per user and domain; its index also serves per-user lookups
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_domain_per_user'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.user.email})"
 
@@ -84,12 +117,27 @@ class RankHistory(models.Model):
     def __str__(self):
         return f"Rank {self.rank} for {self.user.email} ({self.month})"
 
+class AnchorBatch(models.Model):
+    """One ledger transaction recording the Merkle root over a batch of verified certificate hashes."""
+    merkle_root = models.CharField(max_length=64, db_index=True)
+    leaf_count = models.PositiveIntegerField()
+    transaction_hash = models.CharField(max_length=255, db_index=True)
+    blockchain_network = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Anchor {self.merkle_root[:12]} ({self.leaf_count} certificates)"
+
 class BlockchainVerification(models.Model):
     certificate = models.OneToOneField(Certificate, on_delete=models.CASCADE)
     transaction_hash = models.CharField(max_length=255)
     verification_timestamp = models.DateTimeField(auto_now_add=True)
     blockchain_network = models.CharField(max_length=100)
     verified = models.BooleanField(default=False)
+    # Inclusion proof: the certificate's leaf position and sibling path up to the batch's Merkle root
+    batch = models.ForeignKey(AnchorBatch, null=True, blank=True, on_delete=models.PROTECT, related_name='verifications')
+    leaf_index = models.PositiveIntegerField(null=True, blank=True)
+    proof = models.JSONField(default=list, blank=True)
 
     def __str__(self):
         return f"Verification for {self.certificate.name}"
@@ -112,16 +160,118 @@ class Course(models.Model):
 
 
 class OCRExtraction(models.Model):
+    """
+    What verification read from an uploaded file. Kept for rejected uploads
+    too (certificate is then empty) so disputes can be reviewed, and reused
+    by re-verification instead of running OCR on the stored file again.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    certificate_file = models.FileField(upload_to='ocr_extracted_certificates/')
-    extracted_name = models.CharField(max_length=255)
-    extracted_issuer = models.CharField(max_length=255)
-    extracted_course = models.CharField(max_length=255)
+    certificate = models.OneToOneField(
+        Certificate, on_delete=models.CASCADE, null=True, blank=True, related_name='ocr_extraction'
+    )
+    certificate_file = models.FileField(upload_to='ocr_extracted_certificates/', blank=True)
+    file_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Best-matching OCR line for each entered detail
+    extracted_name = models.CharField(max_length=255, blank=True)
+    extracted_issuer = models.CharField(max_length=255, blank=True)
+    extracted_course = models.CharField(max_length=255, blank=True)
+    match_scores = models.JSONField(default=dict, blank=True)
+    accepted = models.BooleanField(default=False)
+    extractor = models.CharField(max_length=100, blank=True)
+    # OCR profile (certificates/ocr_profiles.py) the pages were read with
+    profile = models.CharField(max_length=20, blank=True)
+    # Why the file could not be read (over an OCR budget, unreadable); see certificates/ocr_budget.py
+    failure_reason = models.CharField(max_length=255, blank=True)
+    page_count = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+    # zlib-compressed JSON list of {page, text, source, ms}; see certificates/extraction.py
+    pages = models.BinaryField(blank=True, default=b'')
     extraction_date = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"OCR Data for {self.user.email} on {self.extraction_date.date()}"
 
 
+class ChunkedUpload(models.Model):
+    """A resumable upload in progress; the received bytes live in CHUNKED_UPLOAD_DIR/<id>/."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    issuer = models.CharField(max_length=255)
+    course_name = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.id} for {self.user.email} ({self.offset}/{self.total_size} bytes)"
+
+
+class BackgroundJob(models.Model):
+    """Bulk work started from the admin and run outside the request, with progress for the changelist."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    message = models.TextField(blank=True)
+    # Primary keys of the certificates selected when the job was queued (see jobs.enqueue)
+    certificate_ids = models.JSONField(default=list, editable=False)
+    # Set by the worker that claimed the job; its writes only land while it still holds the claim
+    claim = models.UUIDField(null=True, blank=True, editable=False)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} job #{self.pk} ({self.status})"
+
+
+
+class WeightVersion(models.Model):
+    """
+    A published table of issuer and course weights. New certificates are
+    scored against the active version; its rows must not change once it has
+    been activated, so edits go into a new version that is re-scored in.
+    """
+    note = models.CharField(max_length=255, blank=True)
+    is_active = models.BooleanField(default=False, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Weights v{self.pk}{' (active)' if self.is_active else ''}"
+
+
+class ScoringWeight(models.Model):
+    KIND_CHOICES = [
+        ('issuer', 'Issuer'),
+        ('course', 'Course'),
+    ]
+
+    version = models.ForeignKey(WeightVersion, on_delete=models.CASCADE, related_name='weights')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=255)  # course names are stored lower-case
+    weight = models.DecimalField(max_digits=4, decimal_places=2)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['version', 'kind', 'name'], name='unique_weight_per_version'),
+        ]
 
+    def save(self, *args, **kwargs):
+        if self.kind == 'course':
+            self.name = self.name.lower()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.kind} {self.name}: {self.weight} (v{self.version_id})"
@@ -0,0 +1,85 @@
+import re
+import unicodedata
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+LETTER_RE = re.compile(r'[^\W\d_]')
+DIGIT_RE = re.compile(r'\d')
+
+# Characters NFKD folding leaves alone but OCR output and certificate fonts produce
+CHARACTER_MAP = str.maketrans({
+    'æ': 'ae', 'Æ': 'ae', 'œ': 'oe', 'Œ': 'oe', 'ø': 'o', 'Ø': 'o', 'ł': 'l', 'Ł': 'l',
+    'đ': 'd', 'Đ': 'd', 'ı': 'i', 'ß': 'ss',
+    '|': 'l',  # vertical bars are almost always a misread l or I
+})
+
+# OCR confusions, resolved per token by what the rest of the token is
+DIGIT_TO_LETTER = str.maketrans({'0': 'o', '1': 'l', '5': 's', '8': 'b'})
+LETTER_TO_DIGIT = str.maketrans({'o': '0', 'l': '1', 'i': '1', 's': '5', 'b': '8'})
+
+
+def fold(text):
+    """Lower-case, expand ligatures (NFKD) and strip accents, so 'Certiﬁcate Ré' -> 'certificate re'."""
+    text = unicodedata.normalize('NFKD', text.translate(CHARACTER_MAP))
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+
+
+def fix_confusions(token):
+    """'A1ice' -> 'alice' and '2O24' -> '2024': minority digits/letters take the majority's reading."""
+    letters = len(LETTER_RE.findall(token))
+    digits = len(DIGIT_RE.findall(token))
+    if not letters or not digits:
+        return token
+    if letters >= digits:
+        return token.translate(DIGIT_TO_LETTER)
+    return token.translate(LETTER_TO_DIGIT)
+
+
+def tokenize(text):
+    return [fix_confusions(token) for token in NON_WORD_RE.split(fold(text)) if token]
+
+
+def normalize(text):
+    """Normalised single string, for short inputs such as the entered name, issuer or course."""
+    return ' '.join(tokenize(text))
+
+
+class NormalizedText:
+    """
+    OCR output normalised once per upload: the token list, the index of each
+    line's first token, the joined full text and lines the matcher compares
+    against, and which lines each token occurs on.
+    """
+
+    __slots__ = ('tokens', 'line_offsets', 'text', 'lines', 'raw_lines', 'token_lines')
+
+    def __init__(self, text):
+        self.tokens = []
+        self.line_offsets = []
+        self.raw_lines = []
+        for raw_line in text.splitlines():
+            line_tokens = tokenize(raw_line)
+            if not line_tokens:
+                continue
+            self.line_offsets.append(len(self.tokens))
+            self.tokens.extend(line_tokens)
+            self.raw_lines.append(raw_line)
+        self.line_offsets.append(len(self.tokens))
+        self.text = ' '.join(self.tokens)
+        self.lines = [
+            ' '.join(self.tokens[start:end]) for start, end in zip(self.line_offsets, self.line_offsets[1:])
+        ]
+        self.token_lines = {}
+        for index, (start, end) in enumerate(zip(self.line_offsets, self.line_offsets[1:])):
+            for token in self.tokens[start:end]:
+                self.token_lines.setdefault(token, set()).add(index)
+
+    def line_tokens(self, index):
+        return self.tokens[self.line_offsets[index]:self.line_offsets[index + 1]]
+
+    def candidate_lines(self, tokens, limit=3):
+        """Indexes of the lines sharing the most tokens with `tokens`, best first."""
+        counts = {}
+        for token in set(tokens):
+            for index in self.token_lines.get(token, ()):
+                counts[index] = counts.get(index, 0) + 1
+        return sorted(counts, key=lambda index: (-counts[index], index))[:limit]
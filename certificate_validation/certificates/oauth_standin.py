@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from social_core.backends.google import GoogleOAuth2
+
+# Local stand-in for Google's OAuth2 endpoints, so the Google sign-in path (social-auth
+# pipeline, google_auth_complete, re-ranking) can be load-tested offline. The server
+# uses it when LOADTEST_OAUTH_STANDIN_URL is set; `manage.py loadtest --oauth-standin` runs it.
+AUTHORIZE_PATH = '/o/oauth2/auth'
+TOKEN_PATH = '/o/oauth2/token'
+USERINFO_PATH = '/oauth2/v3/userinfo'
+
+
+def encode_identity(email, first_name='', last_name=''):
+    """Opaque login hint carrying the synthetic account the stand-in should sign in as."""
+    payload = json.dumps({'email': email, 'given_name': first_name, 'family_name': last_name})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_identity(value):
+    return json.loads(base64.urlsafe_b64decode(value.encode()))
+
+
+class StandInGoogleOAuth2(GoogleOAuth2):
+    """
+    GoogleOAuth2 pointed at the stand-in provider. Keeps the 'google-oauth2'
+    name, and returns to the app's own callback, so views and URLs are the
+    ones used in production. Refuses to run outside DEBUG or LOADTEST_MODE,
+    since it signs anyone in as whichever account they name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if not (settings.DEBUG or getattr(settings, 'LOADTEST_MODE', False)):
+            raise ImproperlyConfigured('The stand-in Google OAuth2 backend needs DEBUG or LOADTEST_MODE')
+        super().__init__(*args, **kwargs)
+
+    def standin_url(self, path):
+        return self.setting('STANDIN_URL').rstrip('/') + path
+
+    def authorization_url(self):
+        return self.standin_url(AUTHORIZE_PATH)
+
+    def access_token_url(self):
+        return self.standin_url(TOKEN_PATH)
+
+    def get_redirect_uri(self, state=None):
+        return self.strategy.build_absolute_uri(reverse('social-auth-complete'))
+
+    def user_data(self, access_token, *args, **kwargs):
+        return self.get_json(self.standin_url(USERINFO_PATH), headers={'Authorization': f"Bearer {access_token}"})
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Authorize redirects straight back with a code; the code is also the access token and encodes the user."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == AUTHORIZE_PATH:
+            query = urllib.parse.urlencode({'code': params.get('login_hint', ''), 'state': params.get('state', '')})
+            self.send_response(302)
+            self.send_header('Location', f"{params.get('redirect_uri', '')}?{query}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif url.path == USERINFO_PATH:
+            try:
+                identity = decode_identity(self.headers.get('Authorization', '').removeprefix('Bearer '))
+            except ValueError:
+                return self.send_json({'error': 'invalid_token'}, status=401)
+            self.send_json({
+                'sub': hashlib.sha256(identity['email'].encode()).hexdigest()[:21],
+                'email': identity['email'],
+                'email_verified': True,
+                'given_name': identity.get('given_name', ''),
+                'family_name': identity.get('family_name', ''),
+                'name': f"{identity.get('given_name', '')} {identity.get('family_name', '')}".strip(),
+            })
+        else:
+            self.send_json({'error': 'not_found'}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        params = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode()))
+        if urllib.parse.urlsplit(self.path).path != TOKEN_PATH or not params.get('code'):
+            return self.send_json({'error': 'invalid_request'}, status=400)
+        self.send_json({'access_token': params['code'], 'token_type': 'Bearer', 'expires_in': 3600})
+
+
+class StandInOAuthServer:
+    def __init__(self, host='127.0.0.1', port=8765):
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
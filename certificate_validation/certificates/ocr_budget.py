@@ -0,0 +1,244 @@
+import importlib
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Budgets for reading one uploaded document. A malformed or oversized PDF must
+# not hold an OCR worker or the server's memory: pages past MAX_PAGES are not
+# read, oversized pages are rendered at a lower resolution, and rendering and
+# OCR run in a pooled worker process that is killed (and replaced) when it goes
+# over time or memory. A document that cannot be read within budget fails with a reason.
+MAX_PAGES = getattr(settings, 'OCR_MAX_PAGES', 20)
+MAX_PAGE_PIXELS = getattr(settings, 'OCR_MAX_PAGE_PIXELS', 25_000_000)
+MAX_DOCUMENT_PIXELS = getattr(settings, 'OCR_MAX_DOCUMENT_PIXELS', 150_000_000)
+# Lowest resolution an oversized page is scaled down to before it is refused
+MIN_DPI = getattr(settings, 'OCR_MIN_DPI', 50)
+PAGE_TIMEOUT_SECONDS = getattr(settings, 'OCR_PAGE_TIMEOUT_SECONDS', 30)
+DOCUMENT_TIMEOUT_SECONDS = getattr(settings, 'OCR_DOCUMENT_TIMEOUT_SECONDS', 120)
+# Address space a worker may add to what it holds once its OCR engines are loaded (0: unlimited)
+WORKER_MEMORY_MB = getattr(settings, 'OCR_WORKER_MEMORY_MB', 1024)
+# 'process' (pooled worker processes, killed past a budget) or 'thread' (in the calling
+# thread, budgets other than wall-clock and memory still apply)
+ISOLATION = getattr(settings, 'OCR_ISOLATION', 'process')
+# Worker processes per server process, one for each OCR thread
+WORKERS = getattr(settings, 'OCR_WORKERS', os.cpu_count() or 2)
+# How workers are started: 'forkserver' (spawn where unavailable) or 'spawn'; never
+# forked straight from the threaded server process
+START_METHOD = getattr(settings, 'OCR_WORKER_START_METHOD', 'forkserver')
+# Modules a worker imports before its first job; certificates.views builds the OCR engines
+WORKER_PRELOAD = getattr(settings, 'OCR_WORKER_PRELOAD', ['certificates.views'])
+WORKER_START_TIMEOUT_SECONDS = getattr(settings, 'OCR_WORKER_START_TIMEOUT_SECONDS', 120)
+# Jobs after which a worker is replaced, so fragmentation cannot creep up to the memory cap
+WORKER_MAX_JOBS = getattr(settings, 'OCR_WORKER_MAX_JOBS', 500)
+
+
+class OCRFailed(Exception):
+    """A document could not be read within its budgets; the message is the recorded reason."""
+
+
+def fit_page(page, dpi):
+    """
+    (dpi, pixels) to render `page` at: `dpi`, lowered when the page would
+    exceed MAX_PAGE_PIXELS. Raises OCRFailed when even MIN_DPI is too much.
+    """
+    width, height = page.rect.width / 72, page.rect.height / 72  # inches
+    pixels = width * height * dpi * dpi
+    if pixels > MAX_PAGE_PIXELS:
+        fitted = int(dpi * math.sqrt(MAX_PAGE_PIXELS / pixels))
+        if fitted < MIN_DPI:
+            raise OCRFailed(f"Page {page.number + 1} is too large to render ({width:.0f} x {height:.0f} in)")
+        logger.info(f"Rendering page {page.number + 1} at {fitted} dpi instead of {dpi} to stay within the pixel budget")
+        dpi, pixels = fitted, width * height * fitted * fitted
+    return dpi, int(pixels)
+
+
+def _limit_memory():
+    """Cap the worker's address space at what it has loaded plus WORKER_MEMORY_MB (Linux only)."""
+    if not WORKER_MEMORY_MB:
+        return
+    try:
+        import resource
+        with open('/proc/self/statm') as f:
+            loaded = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        limit = loaded + WORKER_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, OSError, ValueError) as e:
+        logger.debug(f"OCR worker memory limit not applied: {e}")
+
+
+def _call(func, args, kwargs):
+    try:
+        return ('result', func(*args, **kwargs))
+    except OCRFailed as e:
+        return ('failed', str(e))
+    except MemoryError:
+        return ('exhausted', f"Reading the document needed more than {WORKER_MEMORY_MB} MB")
+    except Exception as e:
+        return ('error', f"{type(e).__name__}: {e}")
+
+
+def _serve(conn):
+    """
+    Worker process: set up Django and load the OCR engines once, cap memory,
+    then run jobs from the pool until it hangs up. A worker that ran out of
+    memory exits after reporting it, so the pool starts a fresh one.
+    """
+    import django
+    django.setup()
+    for name in WORKER_PRELOAD:
+        importlib.import_module(name)
+    _limit_memory()
+    conn.send(('ready', None))
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        func, args, kwargs, report_progress = job
+        if report_progress:
+            kwargs['progress'] = lambda: conn.send(('progress', None))
+        message = _call(func, args, kwargs)
+        try:
+            conn.send(message)
+        except MemoryError:
+            message = ('exhausted', f"Reading the document needed more than {WORKER_MEMORY_MB} MB")
+            conn.send(message)
+        if message[0] == 'exhausted':
+            break
+    conn.close()
+
+
+class Worker:
+    """One pool process and the pipe jobs and their results travel over."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.jobs = 0
+
+    def recv(self):
+        try:
+            return self.conn.recv()
+        except EOFError:
+            self.process.join()
+            raise OCRFailed(f"The OCR worker stopped unexpectedly (exit code {self.process.exitcode})")
+
+    def wait_ready(self):
+        if self.ready:
+            return
+        if not self.conn.poll(WORKER_START_TIMEOUT_SECONDS):
+            raise OCRFailed(f"The OCR worker did not start within {WORKER_START_TIMEOUT_SECONDS} s")
+        self.recv()
+        self.ready = True
+
+    def stop(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.process.close()
+
+
+class WorkerPool:
+    """
+    Long-lived OCR worker processes, started from a clean single-threaded
+    process (forkserver or spawn) rather than forked from the server, whose
+    threads and OpenMP pools could leave a forked child holding a lock no one
+    will release. Each document still gets the time and memory budgets: a
+    worker that overruns is killed and replaced before the next job.
+    """
+
+    def __init__(self, size, start_method):
+        self.context = multiprocessing.get_context(start_method)
+        # Most recently used first, so a quiet server keeps reusing warm workers
+        self.idle = queue.LifoQueue()
+        for _ in range(size):
+            self.idle.put(Worker(self.context))
+
+    def run(self, func, args, kwargs, timeout, step_timeout):
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise OCRFailed(f"No OCR worker was free within {timeout} s")
+
+        reusable = False
+        try:
+            worker.wait_ready()
+            worker.conn.send((func, args, kwargs, bool(step_timeout)))
+            worker.jobs += 1
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                wait = min(remaining, step_timeout) if step_timeout else remaining
+                if wait <= 0 or not worker.conn.poll(wait):
+                    if step_timeout and wait == step_timeout:
+                        raise OCRFailed(f"A page took longer than {step_timeout} s to read")
+                    raise OCRFailed(f"Reading the document took longer than {timeout} s")
+                kind, value = worker.recv()
+                if kind == 'progress':
+                    continue
+                reusable = kind != 'exhausted' and worker.jobs < WORKER_MAX_JOBS
+                if kind == 'result':
+                    return value
+                if kind == 'error':
+                    raise RuntimeError(value)
+                raise OCRFailed(value)
+        finally:
+            if not reusable:
+                worker.stop()
+                worker = Worker(self.context)
+            self.idle.put(worker)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_method():
+    return START_METHOD if START_METHOD in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def start_pool():
+    """The process's OCR worker pool, started on first use; call early to have workers loaded before uploads arrive."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(WORKERS, start_method())
+        return _pool
+
+
+def isolation_available():
+    return ISOLATION == 'process'
+
+
+def run_isolated(func, *args, timeout=None, step_timeout=None, **kwargs):
+    """
+    func(*args, **kwargs) in an OCR worker process, killed once it has run
+    `timeout` seconds (default DOCUMENT_TIMEOUT_SECONDS). With `step_timeout`,
+    func also gets a `progress` callback to call after each page, and is
+    killed when that many seconds pass without one. func, its arguments and
+    its result travel between processes, so they must be picklable.
+
+    Returns func's result. Raises OCRFailed with the reason when a budget is
+    broken or the worker dies, and RuntimeError for any other error in func.
+    Without process isolation func runs in the calling thread.
+    """
+    timeout = timeout or DOCUMENT_TIMEOUT_SECONDS
+    if not isolation_available():
+        if step_timeout:
+            kwargs['progress'] = lambda: None
+        return func(*args, **kwargs)
+    return start_pool().run(func, args, kwargs, timeout, step_timeout)
@@ -0,0 +1,98 @@
+from django.conf import settings
+from PIL import ImageOps
+
+ENGINES = ('tesseract', 'paddle')
+PREPROCESSING = ('none', 'grayscale', 'binarize')
+
+
+class OCRProfile:
+    """
+    How hard verification tries to read a certificate: render resolution,
+    how many pages are read, which engine reads them and how the image is
+    cleaned up first, and how close a detail must match to be accepted.
+    A fallback engine, when set, re-reads a document before it is rejected.
+    """
+
+    def __init__(self, name, dpi, max_pages, engine, preprocess, match_threshold,
+                 tesseract_config='', fallback_engine=None):
+        if engine not in ENGINES or (fallback_engine and fallback_engine not in ENGINES):
+            raise ValueError(f"OCR profile {name!r}: engine must be one of {', '.join(ENGINES)}")
+        if preprocess not in PREPROCESSING:
+            raise ValueError(f"OCR profile {name!r}: preprocess must be one of {', '.join(PREPROCESSING)}")
+        self.name = name
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self.engine = engine
+        self.preprocess = preprocess
+        self.match_threshold = match_threshold
+        self.tesseract_config = tesseract_config
+        self.fallback_engine = fallback_engine
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"<OCRProfile {self.name}>"
+
+
+# 'balanced' is the pipeline as it was before profiles: PyMuPDF's default 72 dpi,
+# every page, Tesseract defaults and a threshold of 70.
+DEFAULT_PROFILES = {
+    'fast': dict(dpi=72, max_pages=1, engine='tesseract', preprocess='grayscale', match_threshold=70,
+                 tesseract_config='--psm 6'),
+    'balanced': dict(dpi=72, max_pages=None, engine='tesseract', preprocess='none', match_threshold=70),
+    'accurate': dict(dpi=200, max_pages=None, engine='tesseract', preprocess='binarize', match_threshold=75,
+                     tesseract_config='--psm 11', fallback_engine='paddle'),
+}
+
+
+def build_profiles():
+    """DEFAULT_PROFILES with per-deployment overrides from settings.OCR_PROFILES ({name: {option: value}})."""
+    overrides = getattr(settings, 'OCR_PROFILES', {})
+    return {
+        name: OCRProfile(name, **{**DEFAULT_PROFILES.get(name, {}), **overrides.get(name, {})})
+        for name in {**DEFAULT_PROFILES, **overrides}
+    }
+
+
+PROFILES = build_profiles()
+DEFAULT_PROFILE = getattr(settings, 'OCR_PROFILE', 'balanced')
+
+
+def get_profile(name=None):
+    """The named profile, or the deployment default; raises ValueError for unknown names."""
+    name = (name or DEFAULT_PROFILE).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown OCR profile '{name}'; choose one of {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+def otsu_threshold(image):
+    """Grey level that best separates ink from background in an 'L' image."""
+    histogram = image.histogram()
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = background_weighted = 0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if not background or background == total:
+            continue
+        background_weighted += level * count
+        foreground = total - background
+        mean_background = background_weighted / background
+        mean_foreground = (weighted_total - background_weighted) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def preprocess(image, mode):
+    if mode == 'none':
+        return image
+    image = ImageOps.autocontrast(ImageOps.grayscale(image))
+    if mode == 'binarize':
+        threshold = otsu_threshold(image)
+        image = image.point(lambda level: 255 if level > threshold else 0)
+    return image
@@ -0,0 +1,128 @@
+import io
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from PIL import Image
+
+from .fingerprint import render_first_page
+from .ocr_budget import run_isolated
+
+logger = logging.getLogger(__name__)
+
+# Thumbnail widths in pixels, keyed by the size name used in URLs.
+THUMBNAIL_SIZES = {
+    'small': 160,
+    'medium': 320,
+    'large': 640,
+}
+
+# Render resolution for thumbnails (2x = 144 dpi), at upload and when generated lazily alike.
+RENDER_ZOOM = 2.0
+
+# Thumbnails show the holder's name, so their URLs are signed for the owner's
+# listings and expire; a URL stays the same for a whole window so browsers can cache it.
+URL_MAX_AGE_SECONDS = getattr(settings, 'THUMBNAIL_URL_MAX_AGE_SECONDS', 3600)
+signer = signing.Signer(salt='certificate-thumbnail')
+
+PREVIEW_DIR = 'previews'
+
+# Wall-clock budget for rendering one certificate's thumbnails on a cache miss
+RENDER_TIMEOUT_SECONDS = getattr(settings, 'THUMBNAIL_RENDER_TIMEOUT_SECONDS', 15)
+
+
+def thumbnail_path(file_hash, size):
+    """Content-addressed storage path for a thumbnail: previews/ab/<hash>_<size>.jpg."""
+    return f"{PREVIEW_DIR}/{file_hash[:2]}/{file_hash}_{size}.jpg"
+
+
+def has_thumbnails(file_hash):
+    return all(default_storage.exists(thumbnail_path(file_hash, size)) for size in THUMBNAIL_SIZES)
+
+
+def generate_thumbnails(file_hash, image):
+    """Write every missing thumbnail size for `file_hash` from an already rendered page image."""
+    for size, width in THUMBNAIL_SIZES.items():
+        path = thumbnail_path(file_hash, size)
+        if default_storage.exists(path):
+            continue
+        thumb = image.copy()
+        thumb.thumbnail((width, width * 2), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumb.convert('RGB').save(buffer, format='JPEG', quality=80, optimize=True)
+        default_storage.save(path, ContentFile(buffer.getvalue()))
+
+
+@contextmanager
+def local_path(field_file):
+    """A path on disk for a stored file: its own for local storage, else a temporary copy."""
+    try:
+        yield field_file.path
+        return
+    except NotImplementedError:
+        pass
+    suffix = os.path.splitext(field_file.name)[1] or '.pdf'
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        with field_file.open('rb') as f:
+            for chunk in f.chunks():
+                tmp.write(chunk)
+    try:
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+
+def ensure_thumbnails(certificate):
+    """
+    Render and store thumbnails for a certificate whose previews were never
+    generated. The page is rendered from disk in an OCR worker, within the
+    OCR pixel budget and RENDER_TIMEOUT_SECONDS; raises OCRFailed otherwise.
+    """
+    if not certificate.file_hash or has_thumbnails(certificate.file_hash):
+        return
+    name = certificate.certificate_file.name
+    with local_path(certificate.certificate_file) as path:
+        image = run_isolated(render_first_page, path, name, zoom=RENDER_ZOOM, timeout=RENDER_TIMEOUT_SECONDS)
+    generate_thumbnails(certificate.file_hash, image)
+
+
+def url_expiry(now=None):
+    """End of the window after the current one: between one and two URL_MAX_AGE_SECONDS away."""
+    now = int(time.time() if now is None else now)
+    return (now // URL_MAX_AGE_SECONDS + 2) * URL_MAX_AGE_SECONDS
+
+
+def url_signature(file_hash, size, expires):
+    return signer.signature(f"{file_hash}/{size}/{expires}")
+
+
+def valid_signature(file_hash, size, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    return expires > time.time() and constant_time_compare(url_signature(file_hash, size, expires), signature or '')
+
+
+def thumbnail_urls(request, file_hash):
+    """Signed, expiring absolute thumbnail URLs for each size, for the owner's API listings."""
+    if not file_hash:
+        return None
+    expires = url_expiry()
+    return {
+        size: request.build_absolute_uri(
+            reverse('certificate_thumbnail', args=[file_hash, size]) + '?' + urlencode({
+                'expires': expires, 'signature': url_signature(file_hash, size, expires),
+            })
+        )
+        for size in THUMBNAIL_SIZES
+    }
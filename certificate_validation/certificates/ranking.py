@@ -0,0 +1,255 @@
+import bisect
+import logging
+import threading
+import time
+from array import array
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DecimalField, Sum
+from django.db.models.functions import Coalesce
+
+from .events import notify_rank
+from .models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+# UserProfile.total_weightage is DecimalField(max_digits=6, decimal_places=2)
+MAX_CENTS = 999999
+GENERATION_KEY = 'score-index:generation'
+# Writes in other processes are picked up through a generation counter in the
+# cache when it is shared; with a per-process cache, a rebuild after this long.
+MAX_AGE_SECONDS = getattr(settings, 'SCORE_INDEX_MAX_AGE_SECONDS', 60)
+# Shortest gap between rebuilds triggered by other processes' writes
+MIN_REBUILD_SECONDS = getattr(settings, 'SCORE_INDEX_MIN_REBUILD_SECONDS', 2)
+
+
+def to_cents(weightage):
+    return min(MAX_CENTS, max(0, int((Decimal(weightage) * 100).to_integral_value())))
+
+
+def from_cents(cents):
+    return Decimal(cents) / 100
+
+
+class ScoreIndex:
+    """
+    Users in the order update_user_ranks() ranks them (total weightage
+    descending, then email), for rank-of-user, users-around and top-N
+    queries without touching the database.
+
+    A Fenwick tree over one-cent weightage buckets counts the users above
+    any score in O(log buckets); each non-empty bucket keeps its users
+    sorted by email. Memory is a fixed 4 MB for the tree plus one dict
+    entry and one tuple per user. Built from the database on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.size = MAX_CENTS + 1
+        self._step = 1 << (self.size.bit_length() - 1)  # highest power of two <= size, for _find
+        self._tree = None
+        self._buckets = {}  # position -> sorted [(email, user_id)]
+        self._entries = {}  # user_id -> (position, email)
+        self.generation = None
+        self.loaded_at = None
+
+    # Bucket positions are 1-based with the highest score first, so prefix sums count users ranked above
+    def _position(self, weightage):
+        return MAX_CENTS - to_cents(weightage) + 1
+
+    def _add(self, position, delta):
+        tree = self._tree
+        while position <= self.size:
+            tree[position] += delta
+            position += position & -position
+
+    def _prefix(self, position):
+        total = 0
+        tree = self._tree
+        while position > 0:
+            total += tree[position]
+            position -= position & -position
+        return total
+
+    def _find(self, k):
+        """Smallest position whose prefix count reaches k (the bucket holding the k-th ranked user)."""
+        position, step, tree = 0, self._step, self._tree
+        while step:
+            following = position + step
+            if following <= self.size and tree[following] < k:
+                position = following
+                k -= tree[following]
+            step >>= 1
+        return position + 1
+
+    def build(self, rows):
+        """Replace the contents with (user_id, email, total_weightage) rows."""
+        counts = np.zeros(self.size + 1, dtype=np.int64)
+        buckets, entries = {}, {}
+        for user_id, email, weightage in rows:
+            position = self._position(weightage)
+            counts[position] += 1
+            buckets.setdefault(position, []).append((email, user_id))
+            entries[user_id] = (position, email)
+        for members in buckets.values():
+            members.sort()
+        # Fenwick node i covers (i - lowbit(i), i], i.e. a difference of prefix sums
+        prefix = np.cumsum(counts)
+        nodes = np.arange(1, self.size + 1)
+        tree = np.zeros(self.size + 1, dtype=np.int32)
+        tree[1:] = prefix[nodes] - prefix[nodes - (nodes & -nodes)]
+        with self._lock:
+            self._tree = array('i', tree.tobytes())
+            self._buckets, self._entries = buckets, entries
+
+    def load(self):
+        generation = cache.get(GENERATION_KEY)
+        self.build(UserProfile.objects.values_list('user_id', 'user__email', 'total_weightage').iterator(chunk_size=5000))
+        with self._lock:
+            self.generation = generation
+            self.loaded_at = time.monotonic()
+
+    def ensure_fresh(self):
+        with self._lock:
+            if self._tree is not None:
+                age = time.monotonic() - self.loaded_at
+                generation = cache.get(GENERATION_KEY)
+                written_elsewhere = generation is not None and generation != self.generation
+                if age < MAX_AGE_SECONDS and not (written_elsewhere and age >= MIN_REBUILD_SECONDS):
+                    return
+            self.load()
+
+    def set(self, user_id, email, weightage):
+        with self._lock:
+            if self._tree is None:
+                return  # built from the database on first use
+            position = self._position(weightage)
+            if self._entries.get(user_id) == (position, email):
+                return
+            self.discard(user_id)
+            bisect.insort(self._buckets.setdefault(position, []), (email, user_id))
+            self._entries[user_id] = (position, email)
+            self._add(position, 1)
+
+    def discard(self, user_id):
+        with self._lock:
+            entry = self._entries.pop(user_id, None) if self._tree is not None else None
+            if entry is None:
+                return
+            position, email = entry
+            members = self._buckets[position]
+            del members[bisect.bisect_left(members, (email, user_id))]
+            if not members:
+                del self._buckets[position]
+            self._add(position, -1)
+
+    def sync(self, rows):
+        """Apply a complete set of (user_id, email, total_weightage) rows: changed users move, missing ones go."""
+        with self._lock:
+            if self._tree is None:
+                return
+            seen = set()
+            for user_id, email, weightage in rows:
+                seen.add(user_id)
+                self.set(user_id, email, weightage)
+            for user_id in [user_id for user_id in self._entries if user_id not in seen]:
+                self.discard(user_id)
+        self.mark_written()
+
+    def mark_written(self):
+        """Tell other processes' indexes they are stale; this one already has the change."""
+        try:
+            cache.add(GENERATION_KEY, 0, timeout=None)
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            return
+        with self._lock:
+            if self.generation is not None and generation == self.generation + 1:
+                self.generation = generation
+
+    def __len__(self):
+        self.ensure_fresh()
+        return len(self._entries)
+
+    def rank(self, user_id):
+        """1-based rank as update_user_ranks() would assign it, or None for unknown users."""
+        with self._lock:
+            self.ensure_fresh()
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            position, email = entry
+            return self._prefix(position - 1) + bisect.bisect_left(self._buckets[position], (email, user_id)) + 1
+
+    def window(self, start, count):
+        """Up to `count` users from rank `start` on: dicts with rank, user_id, email and total_weightage."""
+        with self._lock:
+            self.ensure_fresh()
+            start = max(1, start)
+            result = []
+            total = len(self._entries)
+            rank = start
+            while rank <= total and len(result) < count:
+                position = self._find(rank)
+                members = self._buckets[position]
+                above = self._prefix(position - 1)
+                for email, user_id in members[rank - above - 1:]:
+                    result.append({
+                        'rank': rank, 'user_id': user_id, 'email': email,
+                        'total_weightage': from_cents(MAX_CENTS - position + 1),
+                    })
+                    rank += 1
+                    if len(result) == count:
+                        break
+            return result
+
+    def top(self, count):
+        return self.window(1, count)
+
+    def around(self, user_id, radius):
+        """The user and up to `radius` users ranked directly above and below them."""
+        with self._lock:
+            rank = self.rank(user_id)
+            if rank is None:
+                return []
+            return self.window(rank - radius, 2 * radius + 1 - max(0, radius + 1 - rank))
+
+
+score_index = ScoreIndex()
+
+
+def update_user_ranks():
+    """Update total_weightage and current_rank for all users based on certificate weightage."""
+    try:
+        users = UserProfile.objects.annotate(
+            cert_total_weightage=Coalesce(
+                Sum('user__certificate__weightage'),
+                Decimal('0.0'),
+                output_field=DecimalField()
+            )
+        ).select_related('user').order_by('-cert_total_weightage', 'user__email')
+
+        if not users.exists():
+            logger.info("No users found for rank and weightage update")
+            return
+
+        index_rows = []
+        for rank, user_profile in enumerate(users, 1):
+            # Update total_weightage if different
+            if user_profile.total_weightage != user_profile.cert_total_weightage:
+                user_profile.total_weightage = user_profile.cert_total_weightage
+                logger.info(f"Updated total_weightage for {user_profile.user.email} to {user_profile.total_weightage}")
+            # Update current_rank if different, and push the move to the user's open event streams
+            if user_profile.current_rank != rank:
+                notify_rank(user_profile.user_id, rank, user_profile.current_rank, user_profile.total_weightage)
+                user_profile.current_rank = rank
+                logger.info(f"Updated rank for {user_profile.user.email} to {rank}")
+            user_profile.save()
+            index_rows.append((user_profile.user_id, user_profile.user.email, user_profile.total_weightage))
+        score_index.sync(index_rows)
+        logger.info("User ranks and weightage updated successfully")
+    except Exception as e:
+        logger.error(f"update_user_ranks error: {str(e)}")
@@ -0,0 +1,200 @@
+import threading
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Lower, NullIf
+from django.utils import timezone
+
+from .classification import DEFAULT_DOMAIN
+from .models import Certificate, Domain, ScoringWeight, UserProfile, WeightVersion
+
+DEFAULT_WEIGHT = Decimal('5.0')
+UPDATE_BATCH_SIZE = 500
+
+# Weight tables by version id; safe to keep for the life of the process because
+# an activated version never changes.
+_weights_cache = {}
+_weights_lock = threading.Lock()
+
+
+def course_key(course_name):
+    return (course_name or '').strip().lower()
+
+
+def load_weights(version_id):
+    """({issuer: weight}, {course_key: weight}) for a weight version, read once per process."""
+    with _weights_lock:
+        weights = _weights_cache.get(version_id)
+    if weights is None:
+        weights = ({}, {})
+        rows = ScoringWeight.objects.filter(version_id=version_id).values_list('kind', 'name', 'weight')
+        for kind, name, weight in rows:
+            weights[0 if kind == 'issuer' else 1][name] = weight
+        with _weights_lock:
+            _weights_cache[version_id] = weights
+    return weights
+
+
+def active_version_id():
+    return WeightVersion.objects.filter(is_active=True).order_by('-pk').values_list('pk', flat=True).first()
+
+
+def active_weights():
+    """Weights of the active version; an indexed single-row lookup plus the per-process table cache."""
+    version_id = active_version_id()
+    return load_weights(version_id) if version_id else ({}, {})
+
+
+def compute_weightage(issuer, course_name, weights=None):
+    """Certificate weightage: the mean of the issuer and course weights, 5.0 for unknown ones."""
+    issuer_weights, course_weights = weights or active_weights()
+    issuer_weight = issuer_weights.get(issuer, DEFAULT_WEIGHT)
+    course_weight = course_weights.get(course_key(course_name), DEFAULT_WEIGHT)
+    return ((issuer_weight + course_weight) / 2).quantize(Decimal('0.01'))
+
+
+def with_course_key(queryset):
+    if 'course_key' in queryset.query.annotations:
+        return queryset
+    return queryset.annotate(course_key=Lower('course_name'))
+
+
+def weight_changes(old_weights, new_weights):
+    """Issuers and course keys whose weight differs between two tables (added and removed names included)."""
+    changed = []
+    for old, new in zip(old_weights, new_weights):
+        changed.append({
+            name for name in old.keys() | new.keys()
+            if old.get(name, DEFAULT_WEIGHT) != new.get(name, DEFAULT_WEIGHT)
+        })
+    return changed
+
+
+def affected_certificates(old_weights, new_weights):
+    """Certificates whose issuer or course weight changed, found through the issuer and course indexes."""
+    issuers, courses = weight_changes(old_weights, new_weights)
+    return with_course_key(Certificate.objects.all()).filter(
+        Q(issuer__in=issuers) | Q(course_key__in=courses)
+    )
+
+
+def plan_rescore(queryset, weights):
+    """
+    Work out what re-scoring `queryset` against `weights` would change,
+    without writing anything.
+
+    Returns a dict with the per (issuer, course) groups, and the weightage
+    deltas per user and per (user, domain) that keep the stored aggregates in
+    step with the new certificate weightages.
+    """
+    rows = with_course_key(queryset).order_by().values(
+        'issuer', 'course_key', 'user_id', 'domain'
+    ).annotate(count=Count('id'), total=Sum('weightage'))
+
+    groups = {}
+    user_deltas = defaultdict(Decimal)
+    domain_deltas = defaultdict(Decimal)
+    for row in rows:
+        key = (row['issuer'], row['course_key'])
+        if key not in groups:
+            groups[key] = {
+                'weightage': compute_weightage(row['issuer'], row['course_key'], weights),
+                'certificates': 0, 'old_total': Decimal('0.00'), 'delta': Decimal('0.00'),
+            }
+        group = groups[key]
+        delta = group['weightage'] * row['count'] - row['total']
+        group['certificates'] += row['count']
+        group['old_total'] += row['total']
+        group['delta'] += delta
+        if delta:
+            user_deltas[row['user_id']] += delta
+            # Unclassified certificates are counted under the default domain
+            domain_deltas[(row['user_id'], row['domain'] or DEFAULT_DOMAIN)] += delta
+
+    changed = {key: group for key, group in groups.items() if group['delta']}
+    return {'groups': changed, 'user_deltas': dict(user_deltas), 'domain_deltas': dict(domain_deltas)}
+
+
+def _apply_deltas(queryset, deltas, conditions):
+    """Add per-row deltas with one UPDATE per batch: SET total_weightage = total_weightage + CASE ... END."""
+    items = list(deltas.items())
+    for start in range(0, len(items), UPDATE_BATCH_SIZE):
+        batch = items[start:start + UPDATE_BATCH_SIZE]
+        whens = [When(conditions(key), then=Value(delta)) for key, delta in batch]
+        matching = Q()
+        for key, _ in batch:
+            matching |= conditions(key)
+        queryset.filter(matching).update(
+            total_weightage=F('total_weightage') + Case(*whens, default=Value(Decimal('0.00')),
+                                                        output_field=DecimalField())
+        )
+
+
+def apply_rescore(plan, queryset=None):
+    """
+    Write a plan from plan_rescore(): one UPDATE per changed (issuer, course)
+    group, delta updates to UserProfile and Domain totals. Ranks are left to
+    the caller so several plans can share one re-rank.
+    """
+    base = with_course_key(queryset if queryset is not None else Certificate.objects.all())
+    updated = 0
+    with transaction.atomic():
+        for (issuer, key), group in plan['groups'].items():
+            updated += base.filter(issuer=issuer, course_key=key).exclude(
+                weightage=group['weightage']
+            ).update(weightage=group['weightage'])
+        _apply_deltas(UserProfile.objects.all(), plan['user_deltas'], lambda user_id: Q(user_id=user_id))
+        _apply_deltas(Domain.objects.all(), plan['domain_deltas'],
+                      lambda key: Q(user_id=key[0], name=key[1]))
+    return updated
+
+
+def lock_certificates(queryset):
+    """Row-lock `queryset`'s certificates, in key order, for the rest of the current transaction."""
+    locked = queryset.select_for_update().order_by('pk').values_list('pk', flat=True)
+    for _ in locked.iterator(chunk_size=UPDATE_BATCH_SIZE):
+        pass
+
+
+def rescore_atomically(queryset, weights):
+    """
+    plan_rescore() and apply_rescore() in one transaction, with the
+    certificates locked so the plan's deltas still hold when applied.
+    Returns (plan, number of certificates updated).
+    """
+    with transaction.atomic():
+        lock_certificates(queryset)
+        plan = plan_rescore(queryset, weights)
+        return plan, apply_rescore(plan, queryset)
+
+
+def rebuild_domains(user_ids=None):
+    """
+    Recompute the per-domain aggregates from the certificates themselves, for
+    `user_ids` or for everyone. Call after certificates change owner, domain or
+    weightage outside the incremental upload and re-scoring paths.
+    """
+    certificates = Certificate.objects.order_by()
+    domains = Domain.objects.all()
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        certificates = certificates.filter(user_id__in=user_ids)
+        domains = domains.filter(user_id__in=user_ids)
+    # Unclassified certificates are counted under the default domain
+    totals = certificates.values(
+        'user_id', domain_name=Coalesce(NullIf('domain', Value('')), Value(DEFAULT_DOMAIN))
+    ).annotate(count=Count('id'), total=Sum('weightage'))
+    with transaction.atomic():
+        domains.delete()
+        Domain.objects.bulk_create(
+            (Domain(user_id=row['user_id'], name=row['domain_name'], certificate_count=row['count'],
+                    total_weightage=row['total']) for row in totals.iterator(chunk_size=UPDATE_BATCH_SIZE)),
+            batch_size=UPDATE_BATCH_SIZE
+        )
+
+
+def activate_version(version):
+    WeightVersion.objects.exclude(pk=version.pk).filter(is_active=True).update(is_active=False)
+    WeightVersion.objects.filter(pk=version.pk).update(is_active=True, activated_at=timezone.now())
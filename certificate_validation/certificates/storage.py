@@ -0,0 +1,123 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage, storages
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+from urllib.parse import urljoin
+
+CERTIFICATE_PREFIX = 'certificates'
+
+
+def content_path(file_hash, extension='', prefix=CERTIFICATE_PREFIX):
+    """Sharded, content-addressed name: certificates/ab/cd/abcd....pdf."""
+    return f"{prefix}/{file_hash[:2]}/{file_hash[2:4]}/{file_hash}{extension.lower()}"
+
+
+def certificate_upload_to(instance, filename):
+    """upload_to for Certificate.certificate_file; falls back to the flat layout when no hash is known."""
+    if not instance.file_hash:
+        return f"{CERTIFICATE_PREFIX}/{filename}"
+    return content_path(instance.file_hash, os.path.splitext(filename)[1])
+
+
+def certificate_storage():
+    """Storage backend for certificate files, configured as STORAGES['certificates']."""
+    return storages['certificates']
+
+
+class _SameContentSaved(Exception):
+    pass
+
+
+class ContentAddressedMixin:
+    """
+    Names are derived from file contents, so an existing name already holds
+    the same bytes: saving it again is a no-op instead of a renamed copy.
+    """
+    _saving = threading.local()
+
+    def get_available_name(self, name, max_length=None):
+        # FileSystemStorage._save() asks for another name when it loses the race to create
+        # the file; the winner is writing the same bytes, so stop there instead of retrying forever
+        if getattr(self._saving, 'name', None) == name:
+            raise _SameContentSaved
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        self._saving.name = name
+        try:
+            return super()._save(name, content)
+        except _SameContentSaved:
+            return name
+        finally:
+            self._saving.name = None
+
+
+@deconstructible(path='certificates.storage.ShardedContentStorage')
+class ShardedContentStorage(ContentAddressedMixin, FileSystemStorage):
+    """Certificate files on local disk under MEDIA_ROOT, sharded two levels deep by hash."""
+
+
+@deconstructible(path='certificates.storage.LocalObjectStorage')
+class LocalObjectStorage(ContentAddressedMixin, Storage):
+    """
+    Local stand-in for an S3-style object store.
+
+    Objects live in a flat bucket directory keyed by their escaped name and,
+    like a real object store, expose no filesystem path, so they are always
+    streamed by the media view rather than offloaded to the web server.
+    """
+
+    def __init__(self, location=None, base_url=None):
+        self.location = os.fspath(location or getattr(settings, 'OBJECT_STORAGE_ROOT', 'object_store'))
+        self.base_url = base_url or settings.MEDIA_URL
+
+    def _blob_path(self, name):
+        return os.path.join(self.location, name.replace('/', '%2F'))
+
+    def _open(self, name, mode='rb'):
+        return File(open(self._blob_path(name), mode), name=name)
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        os.makedirs(self.location, exist_ok=True)
+        # A temporary file per writer: concurrent saves of the same content each replace the blob whole
+        fd, tmp_path = tempfile.mkstemp(dir=self.location, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            os.replace(tmp_path, self._blob_path(name))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        try:
+            os.remove(self._blob_path(name))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, name):
+        return os.path.exists(self._blob_path(name))
+
+    def size(self, name):
+        return os.path.getsize(self._blob_path(name))
+
+    def url(self, name):
+        return urljoin(self.base_url, filepath_to_uri(name))
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        names = [blob.replace('%2F', '/') for blob in os.listdir(self.location) if not blob.endswith('.part')]
+        files = [n[len(prefix):] for n in names if n.startswith(prefix) and '/' not in n[len(prefix):]]
+        dirs = {n[len(prefix):].split('/')[0] for n in names if n.startswith(prefix) and '/' in n[len(prefix):]}
+        return sorted(dirs), sorted(files)
@@ -0,0 +1,41 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+def is_asgi(request):
+    # DRF's Request wraps the HttpRequest the handler built
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def aiterate(iterator, thread_sensitive=True, batch=1):
+    """
+    A blocking iterator as an async one, `batch` items at a time taken off the
+    event loop. Keep `thread_sensitive` for iterators holding a database
+    cursor, so every step runs on the request's connection thread.
+    """
+    iterator = iter(iterator)
+    step = sync_to_async(lambda: list(islice(iterator, batch)), thread_sensitive=thread_sensitive)
+    try:
+        while True:
+            items = await step()
+            if not items:
+                return
+            for item in items:
+                yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close:
+            await sync_to_async(close, thread_sensitive=thread_sensitive)()
+
+
+def streaming_content(request, iterator, thread_sensitive=True, batch=1):
+    """
+    Content for a StreamingHttpResponse that the server really streams:
+    Django collects a sync iterator into a list before sending it under ASGI
+    (and an async one under WSGI), so hand each server the kind it streams.
+    """
+    if is_asgi(request):
+        return aiterate(iterator, thread_sensitive, batch)
+    return iterator
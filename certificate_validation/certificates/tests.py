@@ -1,3 +1,1058 @@
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from PIL import Image
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import AsyncClient
+from django.test import Client
+from django.test import RequestFactory
 from django.test import TestCase
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+import fitz
+
+from . import verification
+from .admin import CertificateAdmin
+from .admission import TokenBucket
+from .anchoring import build_tree, leaf_hash, node_hash, verify_proof
+from .authentication import stream_token
+from .checks import trusted_proxies_check
+from .chunked import PageTextCache, append_chunk, create_upload, data_path, early_render, finish_hash
+from .classification import classify
+from .exports import stream_export
+from .extraction import extraction_fields, pack_pages, stored_pages, unpack_pages
+from .fingerprint import band_fields, find_near_duplicates
+from .jobs import claim_next_job, enqueue, fail_orphaned_jobs, job_queryset, run_job
+from .loadtest import outcome, percentile
+from .media import FILE_URL_MAX_AGE_SECONDS, certificate_file_url, is_public
+from .middleware import DisableCsrfForApiMiddleware
+from .models import BackgroundJob, Certificate, ChunkedUpload, Course, Domain, OCRExtraction, UserProfile
+from .normalization import NormalizedText, fix_confusions, fold, normalize
+from .oauth_standin import StandInGoogleOAuth2
+from .ocr_budget import OCRFailed, fit_page, run_isolated
+from .ocr_profiles import build_profiles, get_profile, otsu_threshold
+from .previews import URL_MAX_AGE_SECONDS, url_expiry, url_signature, valid_signature
+from .previews import thumbnail_urls
+from .ranking import ScoreIndex, update_user_ranks
+from .scoring import compute_weightage, rebuild_domains
+from .storage import LocalObjectStorage, ShardedContentStorage, content_path
+from .views import UploadRejected, extract_pages, read_and_match, similarity
+from .warmup import make_fork_safe, preload, timed_imports
+
+User = get_user_model()
+
+
+def make_certificate(user, name='Certificate', **fields):
+    defaults = {
+        'issuer': 'Coursera', 'course_name': 'Machine Learning', 'category': 'Technical',
+        'domain': 'Data Science', 'weightage': 5,
+    }
+    return Certificate.objects.create(user=user, name=name, **{**defaults, **fields})
+
+
+def flip(value, *bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def sleep_then(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def read_slowly(page_seconds, pages, progress):
+    for _ in range(pages):
+        time.sleep(page_seconds)
+        progress()
+    return pages
+
+
+def give_up(reason):
+    raise OCRFailed(reason)
+
+
+class FindNearDuplicatesTests(TestCase):
+    HASH = 0x0123456789ABCDEF
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='x')
+        self.other = User.objects.create_user(email='other@example.com', password='x')
+        self.certificate = make_certificate(self.owner, **band_fields(self.HASH))
+
+    def test_finds_hash_within_distance_spread_over_every_band(self):
+        # 7 flipped bits: two bands differ by 2, one by 2 and one by 1
+        probe = flip(self.HASH, 0, 1, 16, 17, 32, 33, 48)
+        self.assertEqual(find_near_duplicates(probe), [self.certificate])
+
+    def test_finds_hash_differing_only_in_one_band(self):
+        probe = flip(self.HASH, 0, 1, 2, 3, 4, 5, 6)
+        self.assertEqual(find_near_duplicates(probe), [self.certificate])
+
+    def test_ignores_hash_past_distance(self):
+        probe = flip(self.HASH, 0, 1, 16, 17, 32, 33, 48, 49)
+        self.assertEqual(find_near_duplicates(probe), [])
+
+    def test_excludes_given_certificate(self):
+        self.assertEqual(find_near_duplicates(self.HASH, exclude_pk=self.certificate.pk), [])
+
+    def test_limits_to_user(self):
+        self.assertEqual(find_near_duplicates(self.HASH, user_id=self.other.pk), [])
+        self.assertEqual(find_near_duplicates(self.HASH, user_id=self.owner.pk), [self.certificate])
+
+
+class ThumbnailSignatureTests(TestCase):
+    FILE_HASH = 'ab' * 32
+
+    def test_url_is_stable_within_a_window_and_expires_after_one(self):
+        start = 10 * URL_MAX_AGE_SECONDS
+        self.assertEqual(url_expiry(start), url_expiry(start + URL_MAX_AGE_SECONDS - 1))
+        self.assertGreaterEqual(url_expiry(start) - start, URL_MAX_AGE_SECONDS)
+
+    def test_accepts_own_signature(self):
+        expires = url_expiry()
+        self.assertTrue(valid_signature(self.FILE_HASH, 'small', str(expires), url_signature(self.FILE_HASH, 'small', expires)))
+
+    def test_rejects_signature_for_another_size_or_hash(self):
+        expires = url_expiry()
+        signature = url_signature(self.FILE_HASH, 'small', expires)
+        self.assertFalse(valid_signature(self.FILE_HASH, 'large', expires, signature))
+        self.assertFalse(valid_signature('cd' * 32, 'small', expires, signature))
+
+    def test_rejects_expired_or_missing_values(self):
+        expires = url_expiry()
+        signature = url_signature(self.FILE_HASH, 'small', expires)
+        with mock.patch('certificates.previews.time.time', return_value=expires + 1):
+            self.assertFalse(valid_signature(self.FILE_HASH, 'small', expires, signature))
+        self.assertFalse(valid_signature(self.FILE_HASH, 'small', None, signature))
+        self.assertFalse(valid_signature(self.FILE_HASH, 'small', expires, None))
+
+
+class DisableCsrfForApiMiddlewareTests(TestCase):
+    def test_async_chain_stays_async(self):
+        async def view(request):
+            return request
+        middleware = DisableCsrfForApiMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = async_to_sync(middleware)(RequestFactory().post('/api/signin/'))
+        self.assertTrue(request._dont_enforce_csrf_checks)
+
+    def test_sync_chain_only_exempts_api(self):
+        middleware = DisableCsrfForApiMiddleware(lambda request: request)
+        self.assertFalse(iscoroutinefunction(middleware))
+        self.assertTrue(middleware(RequestFactory().post('/api/signin/'))._dont_enforce_csrf_checks)
+        self.assertFalse(hasattr(middleware(RequestFactory().post('/admin/login/')), '_dont_enforce_csrf_checks'))
+
+
+class LoadTestOutcomeTests(TestCase):
+    def test_only_success_and_expected_statuses_are_ok(self):
+        self.assertEqual(outcome(SimpleNamespace(status_code=201)), 'ok')
+        self.assertEqual(outcome(SimpleNamespace(status_code=302), expected=(302,)), 'ok')
+        for code in (302, 400, 401, 403, 429):
+            self.assertEqual(outcome(SimpleNamespace(status_code=code)), 'rejected')
+        self.assertEqual(outcome(SimpleNamespace(status_code=503)), 'error')
+        self.assertEqual(outcome(None), 'error')
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+
+    def test_lost_create_race_returns_existing_name(self):
+        storage = ShardedContentStorage(location=self.root.name)
+        name = content_path('ab' * 32, '.pdf')
+        storage.save(name, ContentFile(b'same bytes'))
+        # The racing request checked exists() before the winner created the file
+        with mock.patch.object(ShardedContentStorage, 'exists', return_value=False):
+            self.assertEqual(storage.save(name, ContentFile(b'same bytes')), name)
+        with storage.open(name) as f:
+            self.assertEqual(f.read(), b'same bytes')
+
+    def test_object_storage_leaves_no_temporary_files(self):
+        storage = LocalObjectStorage(location=self.root.name)
+        name = content_path('cd' * 32, '.pdf')
+        storage.save(name, ContentFile(b'data'))
+        with mock.patch.object(LocalObjectStorage, 'exists', return_value=False):
+            storage.save(name, ContentFile(b'data'))
+        self.assertEqual(storage.listdir('certificates/cd/cd'), ([], [f"{'cd' * 32}.pdf"]))
+
+
+class MediaTests(TestCase):
+    def test_only_profile_images_are_public(self):
+        file_hash = hashlib.sha256(b'x').hexdigest()
+        self.assertFalse(is_public(content_path(file_hash, '.pdf')))
+        self.assertTrue(is_public('profile_images/me.png'))
+        self.assertFalse(is_public('certificates/Python Certificate.pdf'))
+        self.assertFalse(is_public(f"previews/{file_hash[:2]}/{file_hash}_small.jpg"))
+        self.assertFalse(is_public('ocr_extracted_certificates/scan.pdf'))
+
+    def test_certificate_files_need_a_signed_url_or_staff(self):
+        data = b'%PDF-1.4 certificate'
+        name = content_path(hashlib.sha256(data).hexdigest(), '.pdf')
+        with tempfile.TemporaryDirectory() as root, override_settings(MEDIA_ROOT=root):
+            ShardedContentStorage().save(name, ContentFile(data))
+            self.assertEqual(self.client.get(f"/media/{name}").status_code, 404)
+            url = certificate_file_url(RequestFactory().get('/'), name)
+            self.assertEqual(self.client.get(url.replace('signature=', 'signature=x')).status_code, 404)
+            with mock.patch('certificates.media.time.time', return_value=time.time() + FILE_URL_MAX_AGE_SECONDS + 1):
+                self.assertEqual(self.client.get(url).status_code, 404)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b''.join(response.streaming_content), data)
+            self.assertTrue(response['Cache-Control'].startswith('private, max-age='))
+            self.client.force_login(User.objects.create_user(email='staff@example.com', password='x', is_staff=True))
+            self.assertEqual(self.client.get(f"/media/{name}").status_code, 200)
+
+    def test_streams_asynchronously_under_asgi(self):
+        data = bytes(range(256)) * 1024
+        name = content_path(hashlib.sha256(data).hexdigest(), '.pdf')
+        with tempfile.TemporaryDirectory() as root, override_settings(MEDIA_ROOT=root):
+            ShardedContentStorage().save(name, ContentFile(data))
+            url = certificate_file_url(RequestFactory().get('/'), name)
+            response = async_to_sync(AsyncClient().get)(url, headers={'Range': 'bytes=10-'})
+            self.assertEqual(response.status_code, 206)
+            self.assertTrue(response.is_async)
+            self.assertEqual(b''.join(async_to_sync(self.collect)(response)), data[10:])
+            self.assertTrue(response['Cache-Control'].startswith('private'))
+
+    @staticmethod
+    async def collect(response):
+        return [chunk async for chunk in response.streaming_content]
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bucket = TokenBucket('test-bucket', capacity=3, refill_per_minute=60)
+
+    def take_all(self, *counts):
+        return [async_to_sync(self.bucket.take)('key', count) for count in counts]
+
+    def test_admits_up_to_capacity_then_reports_wait(self):
+        self.assertEqual(self.take_all(1, 1, 1, 1), [0, 0, 0, 1])
+        self.assertEqual(self.take_all(5), [3])
+
+    def test_concurrent_takes_never_overdraw(self):
+        async def race():
+            return await asyncio.gather(*(self.bucket.take('key') for _ in range(10)))
+
+        with mock.patch('certificates.admission.cache.aget', side_effect=self.slow(cache.aget)):
+            results = async_to_sync(race)()
+        self.assertEqual(results.count(0), 3)
+
+    def test_refund_restores_tokens_up_to_capacity(self):
+        self.take_all(3)
+        async_to_sync(self.bucket.refund)('key', 2)
+        self.assertEqual(self.take_all(2, 1), [0, 1])
+        async_to_sync(self.bucket.refund)('key', 10)
+        self.assertEqual(self.take_all(3, 1), [0, 1])
+
+    @staticmethod
+    def slow(aget):
+        async def wrapper(*args, **kwargs):
+            value = await aget(*args, **kwargs)
+            await asyncio.sleep(0.01)
+            return value
+        return wrapper
+
+
+class BatchUploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        self.user = User.objects.create_user(email='batch@example.com', password='x')
+        UserProfile.objects.create(user=self.user)
+        self.token = Token.objects.create(user=self.user)
+
+    async def prepared(self, user, certificate_file, name, issuer, course, profile=None):
+        if name == 'Unreadable':
+            raise UploadRejected('Certificate content does not match the entered details. Please ensure accuracy.')
+        data = certificate_file.read()
+        return {
+            'name': name, 'issuer': issuer, 'course': course, 'weightage': 5, 'domain': 'Data Science',
+            'category': 'Technical', 'file': certificate_file, 'file_hash': hashlib.sha256(data).hexdigest(),
+            'fingerprint': int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], 'big') >> 1,
+            'extraction': extraction_fields([], {}, 'tesseract', 10),
+        }
+
+    def post(self, files, metadata):
+        return self.client.post('/api/certificates/upload/batch/', {
+            'certificate_files': [SimpleUploadedFile(f'{index}.pdf', data) for index, data in enumerate(files)],
+            'metadata': json.dumps(metadata),
+        }, headers={'Authorization': f'Token {self.token.key}'})
+
+    def test_saves_accepted_files_together_and_reports_each(self):
+        metadata = [
+            {'name': 'First', 'issuer': 'Coursera', 'course_name': 'Machine Learning'},
+            {'name': 'Copy', 'issuer': 'Coursera', 'course_name': 'Machine Learning'},
+            {'name': 'Unreadable', 'issuer': 'Coursera', 'course_name': 'Machine Learning'},
+            {'name': 'Second', 'issuer': 'Coursera', 'course_name': 'Deep Learning'},
+        ]
+        with mock.patch('certificates.views.prepare_upload', self.prepared), \
+                mock.patch('certificates.views.store_thumbnails'):
+            response = self.post([b'one', b'one', b'three', b'four'], metadata)
+        self.assertEqual(response.status_code, 201)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], ['verified', 'rejected', 'rejected', 'verified'])
+        self.assertEqual(results[1]['error'], 'This certificate file has already been uploaded')
+        self.assertEqual(
+            sorted(Certificate.objects.filter(user=self.user).values_list('name', flat=True)), ['First', 'Second']
+        )
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.total_weightage, profile.current_rank), (Decimal('10.00'), 1))
+
+    def test_metadata_must_match_the_files(self):
+        response = self.post([b'one', b'two'], [{'name': 'Only one'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Certificate.objects.exists())
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CHUNKED_UPLOAD_DIR=directory.name))
+        self.user = User.objects.create_user(email='chunks@example.com', password='x')
+        self.upload = create_upload(self.user, 'c.pdf', 'Certificate', 'Coursera', 'Machine Learning', 10)
+
+    def stored(self):
+        with open(data_path(self.upload.id), 'rb') as f:
+            return f.read()
+
+    def test_appends_in_order_and_resumes_from_stored_offset(self):
+        self.assertEqual(append_chunk(self.upload, 0, b'abcd'), 4)
+        self.assertIsNone(append_chunk(self.upload, 0, b'abcd'))  # retried chunk
+        self.assertIsNone(append_chunk(self.upload, 6, b'gh'))  # gap
+        resumed = ChunkedUpload.objects.get(pk=self.upload.pk)
+        self.assertEqual(resumed.offset, 4)
+        self.assertEqual(append_chunk(resumed, 4, b'efghij'), 10)
+        self.assertIsNone(append_chunk(resumed, 10, b'k'))  # past total_size
+        self.assertEqual(self.stored(), b'abcdefghij')
+        self.assertEqual(finish_hash(resumed), hashlib.sha256(b'abcdefghij').hexdigest())
+
+    def test_losing_a_race_leaves_the_file_alone(self):
+        stale = ChunkedUpload.objects.get(pk=self.upload.pk)
+        append_chunk(self.upload, 0, b'abcd')
+        self.assertIsNone(append_chunk(stale, 0, b'WXYZ'))
+        self.assertEqual(self.stored(), b'abcd')
+
+    def test_appending_refreshes_updated_at(self):
+        ChunkedUpload.objects.filter(pk=self.upload.pk).update(updated_at=timezone.now() - timedelta(days=1))
+        append_chunk(self.upload, 0, b'abcd')
+        upload = ChunkedUpload.objects.get(pk=self.upload.pk)
+        self.assertGreater(upload.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_early_render_reads_complete_leading_pages_of_a_partial_file(self):
+        doc = fitz.open()
+        for number in range(3):
+            doc.new_page().insert_text((72, 72), f'Page {number + 1}')
+        data = doc.tobytes(garbage=0, deflate=False)
+        doc.close()
+        with open(data_path(self.upload.id), 'wb') as f:
+            f.write(data[:-200])  # no xref table or trailer yet
+        with mock.patch('builtins.open', wraps=open) as opened:
+            early_render(self.upload.id, lambda page: page.get_text().strip(), max_pages=2)
+        self.assertFalse(any(call.args[:1] == (data_path(self.upload.id),) for call in opened.call_args_list))
+        cache = PageTextCache(self.upload.id)
+        self.assertEqual([cache.digest(number) is not None for number in range(3)], [True, True, False])
+
+
+class ExportStreamingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='x')
+        for number in range(3):
+            make_certificate(self.admin, name=f'Certificate {number}')
+
+    def test_streams_asynchronously_under_asgi(self):
+        async def export():
+            token = await Token.objects.acreate(user=self.admin)
+            response = await AsyncClient().get(
+                '/api/exports/certificates.csv', headers={'Authorization': f'Token {token.key}'}
+            )
+            return response, [line async for line in response.streaming_content]
+
+        response, lines = async_to_sync(export)()
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join(lines).decode(), ''.join(stream_export('certificates', 'csv', {})))
+        self.assertEqual(len(lines), 4)
+
+    def test_csv_cells_cannot_start_formulas(self):
+        make_certificate(self.admin, name='=HYPERLINK("http://example.com")', issuer='@SUM(A1)', course_name='-1')
+        rows = list(csv.reader(''.join(stream_export('certificates', 'csv', {})).splitlines()))
+        row = dict(zip(rows[0], rows[-1]))
+        self.assertEqual((row['name'], row['issuer']), ('\'=HYPERLINK("http://example.com")', "'@SUM(A1)"))
+        self.assertEqual(row['weightage'], '5.00')
+        jsonl = ''.join(stream_export('certificates', 'jsonl', {})).splitlines()
+        self.assertEqual(json.loads(jsonl[-1])['name'], '=HYPERLINK("http://example.com")')
+
+
+class BackgroundJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='jobs@example.com', password='x')
+        self.certificates = [make_certificate(self.user, name=f'Certificate {number}') for number in range(5)]
+
+    def test_worker_runs_the_selection_in_batches(self):
+        job = enqueue('mark_verified', Certificate.objects.filter(name__in=['Certificate 1', 'Certificate 3', 'Certificate 4']))
+        self.assertEqual(job.total, 3)
+
+        with mock.patch('certificates.jobs.BATCH_SIZE', 2):
+            call_command('run_background_jobs', '--once', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('done', 3))
+        self.assertEqual(
+            set(Certificate.objects.filter(status='verified').values_list('name', flat=True)),
+            {'Certificate 1', 'Certificate 3', 'Certificate 4'}
+        )
+
+    def test_rows_matching_the_filter_after_queueing_are_left_alone(self):
+        job = enqueue('mark_verified', Certificate.objects.filter(status='pending'))
+        later = make_certificate(self.user, name='Uploaded later')
+        self.certificates[0].delete()
+        self.assertEqual(list(job_queryset(job).order_by('pk')), self.certificates[1:])
+
+        call_command('run_background_jobs', '--once', stdout=io.StringIO())
+        later.refresh_from_db()
+        self.assertEqual(later.status, 'pending')
+        self.assertEqual(Certificate.objects.filter(status='verified').count(), 4)
+
+    def test_stalled_running_jobs_are_failed(self):
+        now = timezone.now()
+        stalled = BackgroundJob.objects.create(kind='rescore', status='running', heartbeat_at=now - timedelta(hours=1))
+        active = BackgroundJob.objects.create(kind='rescore', status='running', heartbeat_at=now)
+        self.assertEqual(fail_orphaned_jobs(), 1)
+        stalled.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual((stalled.status, active.status), ('failed', 'running'))
+
+    def test_worker_stops_once_its_job_was_failed_as_orphaned(self):
+        enqueue('mark_verified', Certificate.objects.all())
+        job = claim_next_job()
+
+        def orphaned(*args):
+            fail_orphaned_jobs(stale_seconds=-60)
+            return []
+
+        with mock.patch('certificates.jobs.BATCH_SIZE', 2), \
+                mock.patch('certificates.jobs.notify_certificate_status', side_effect=orphaned):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed), ('failed', 0))
+        self.assertEqual(Certificate.objects.filter(status='verified').count(), 2)
+
+
+class RescoreCertificatesTests(TestCase):
+    def test_active_version_corrects_stale_weightages(self):
+        user = User.objects.create_user(email='scores@example.com', password='x')
+        UserProfile.objects.create(user=user, total_weightage=Decimal('10.00'))
+        # Scored before course weights were looked up case-insensitively: course weight 5.0
+        certificate = make_certificate(user, issuer='Udemy', course_name='Python', weightage=Decimal('6.00'))
+        make_certificate(user, name='Other', weightage=Decimal('4.00'))
+        expected = compute_weightage('Udemy', 'Python')
+        self.assertEqual(expected, Decimal('7.00'))
+
+        call_command('rescore_certificates', stdout=io.StringIO())
+
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.weightage, expected)
+        other_delta = compute_weightage('Coursera', 'Machine Learning') - Decimal('4.00')
+        self.assertEqual(UserProfile.objects.get(user=user).total_weightage,
+                         Decimal('10.00') + expected - Decimal('6.00') + other_delta)
+
+
+class CourseNameBackfillTests(TestCase):
+    def test_pairs_courses_by_creation_order_and_leaves_ambiguous_rows(self):
+        pair_course_names = import_module('certificates.migrations.0008_versioned_scoring_weights').pair_course_names
+        ann = User.objects.create_user(email='ann@example.com', password='x')
+        bob = User.objects.create_user(email='bob@example.com', password='x')
+        uploads = [(ann, 'Coursera', 'Machine Learning'), (ann, 'Coursera', 'Python'), (ann, 'Udemy', 'SQL'),
+                   (bob, 'Coursera', 'Java'), (bob, 'Coursera', 'Ruby')]
+        certificates = []
+        for number, (user, issuer, course) in enumerate(uploads):
+            certificates.append(make_certificate(user, f'Certificate {number}', issuer=issuer, course_name=''))
+            Course.objects.create(user=user, issuer=issuer, course_name=course)
+        certificates[3].delete()  # its Course row stays behind
+
+        paired, ambiguous = pair_course_names(Certificate, Course)
+        self.assertEqual(
+            paired, {certificates[0].pk: 'Machine Learning', certificates[1].pk: 'Python', certificates[2].pk: 'SQL'}
+        )
+        self.assertEqual(ambiguous, [certificates[4].pk])
+
+
+class ClassificationTests(TestCase):
+    CASES = [
+        # (course name, OCR text, expected (domain, category))
+        ('Python', '', ('Programming', 'Course Completion')),
+        ('  PYTHON ', '', ('Programming', 'Course Completion')),
+        ('Pyth0n', '', ('Programming', 'Course Completion')),
+        ('Intro to Deep Learning', '', ('AI & Machine Learning', 'Course Completion')),
+        ('Specialization in SQL', '', ('Databases', 'Specialization')),
+        ('', 'Certificate of participation in the AWS workshop', ('Cloud Computing', 'Workshop')),
+        ('Statistics', 'python python', ('Data Science', 'Course Completion')),
+        ('Underwater basket weaving', 'Certificate of completion', ('General', 'Course Completion')),
+        ('PMP exam prep', '', ('Project Management', 'Professional Certification')),
+        # Tie between two domains: the one listed first in DOMAIN_KEYWORDS wins
+        ('Django with Pandas', '', ('Web Development', 'Course Completion')),
+    ]
+
+    def test_classifies_domain_and_category(self):
+        for course, text, expected in self.CASES:
+            with self.subTest(course=course, text=text):
+                self.assertEqual(classify(course, text), expected)
+
+
+class DomainAggregateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='domains@example.com', password='x')
+        self.other = User.objects.create_user(email='other@example.com', password='x')
+        self.certificates = [make_certificate(self.user, name=f'Certificate {number}', weightage=4) for number in range(3)]
+        rebuild_domains()
+        self.admin = CertificateAdmin(Certificate, admin.site)
+        self.request = RequestFactory().post('/')
+
+    def domains(self):
+        return set(Domain.objects.values_list('user__email', 'name', 'certificate_count', 'total_weightage'))
+
+    def test_admin_edits_and_deletes_rebuild_owners_domains(self):
+        certificate = self.certificates[0]
+        certificate.user, certificate.domain = self.other, 'Cloud'
+        form = SimpleNamespace(changed_data=['user', 'domain'], initial={'user': self.user.pk})
+        self.admin.save_model(self.request, certificate, form, change=True)
+        self.assertEqual(self.domains(), {
+            ('domains@example.com', 'Data Science', 2, Decimal('8.00')),
+            ('other@example.com', 'Cloud', 1, Decimal('4.00')),
+        })
+
+        self.admin.delete_queryset(self.request, Certificate.objects.filter(pk=self.certificates[1].pk))
+        self.admin.delete_model(self.request, certificate)
+        self.assertEqual(self.domains(), {('domains@example.com', 'Data Science', 1, Decimal('4.00'))})
+
+    def test_one_row_per_user_and_domain(self):
+        with self.assertRaises(IntegrityError):
+            Domain.objects.create(user=self.user, name='Data Science')
+
+
+class OCRExtractionTests(TestCase):
+    PAGES = [
+        {'page': 1, 'source': 'tesseract', 'ms': 120, 'text': 'Certificate of Completion\nAnn Lee\n'},
+        {'page': 2, 'source': 'cache', 'ms': 0, 'text': 'Coursera — Machine Learning\n'},
+    ]
+
+    def test_pages_round_trip_compressed(self):
+        blob = pack_pages(self.PAGES)
+        self.assertEqual(unpack_pages(blob), self.PAGES)
+        self.assertEqual(unpack_pages(memoryview(blob)), self.PAGES)
+        self.assertEqual(unpack_pages(None), [])
+
+    def test_fields_record_matches_and_best_lines(self):
+        matches = {'name': (100, ' Ann Lee '), 'issuer': (90, 'Coursera — Machine Learning')}
+        fields = extraction_fields(self.PAGES, matches, 'tesseract', 120.7, 'balanced')
+        self.assertEqual(fields['page_count'], 2)
+        self.assertEqual(fields['duration_ms'], 120)
+        self.assertEqual(fields['match_scores'], {'name': 100, 'issuer': 90})
+        self.assertEqual((fields['extracted_name'], fields['extracted_issuer']), ('Ann Lee', 'Coursera — Machine Learning'))
+
+    def test_reverification_reuses_stored_pages(self):
+        user = User.objects.create_user(email='ann@example.com', password='x', first_name='Ann', last_name='Lee')
+        certificate = make_certificate(user, status='failed')
+        self.assertIsNone(stored_pages(certificate))
+        OCRExtraction.objects.create(
+            user=user, certificate=certificate, file_hash='', accepted=False, duration_ms=120,
+            **{key: value for key, value in extraction_fields(self.PAGES, {}, 'tesseract', 120).items()
+               if key != 'duration_ms'}
+        )
+        self.assertEqual(stored_pages(certificate), self.PAGES)
+
+        job = enqueue('reverify', Certificate.objects.filter(pk=certificate.pk))
+        with mock.patch('certificates.jobs.stored_file_pages') as ocr:
+            call_command('run_background_jobs', '--once', stdout=io.StringIO())
+        ocr.assert_not_called()
+        certificate.refresh_from_db()
+        extraction = OCRExtraction.objects.get(certificate=certificate)
+        self.assertEqual(certificate.status, 'verified')
+        self.assertTrue(extraction.accepted)
+        self.assertEqual(extraction.duration_ms, 120)
+        self.assertEqual(extraction.extracted_name, 'Ann Lee')
+        self.assertEqual(BackgroundJob.objects.get(pk=job.pk).status, 'done')
+
+    def test_fallback_reads_within_remaining_budget_and_tags_pages(self):
+        user = SimpleNamespace(first_name='Ann', last_name='Lee')
+        profile = get_profile('accurate')
+        readings = [
+            [{'page': 1, 'source': 'tesseract', 'ms': 5, 'text': 'Certificate\n'}],
+            [{'page': 1, 'source': 'paddle', 'ms': 5, 'text': 'Ann Lee\nCoursera\nMachine Learning\n'}],
+        ]
+        with mock.patch('certificates.views.read_pages', side_effect=readings) as read, \
+                mock.patch('certificates.views.OCR_DOCUMENT_TIMEOUT_SECONDS', 100), \
+                mock.patch('certificates.views.time.monotonic', side_effect=[0, 30]):
+            pages, accepted, _ = read_and_match(user, 'Coursera', 'Machine Learning', 'cert.pdf', None, profile)
+        self.assertTrue(accepted)
+        self.assertEqual(read.call_args.kwargs['timeout'], 70)
+        self.assertEqual([page.get('fallback', False) for page in pages], [False, True])
+        self.assertEqual(extraction_fields(pages, {}, 'tesseract+paddle', 10)['page_count'], 1)
+
+    def test_no_fallback_once_budget_is_spent(self):
+        user = SimpleNamespace(first_name='Ann', last_name='Lee')
+        profile = get_profile('accurate')
+        reading = [{'page': 1, 'source': 'tesseract', 'ms': 5, 'text': ''}]
+        with mock.patch('certificates.views.read_pages', return_value=reading) as read, \
+                mock.patch('certificates.views.OCR_DOCUMENT_TIMEOUT_SECONDS', 100), \
+                mock.patch('certificates.views.time.monotonic', side_effect=[0, 100]):
+            pages, accepted, _ = read_and_match(user, 'Coursera', 'Machine Learning', 'cert.pdf', None, profile)
+        self.assertFalse(accepted)
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(len(pages), 1)
+
+    def test_configured_profile_reaches_the_engine(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        pdf_path = f'{directory.name}/cert.pdf'
+        doc = fitz.open()
+        for _ in range(2):
+            doc.new_page(width=200, height=100).insert_text((20, 50), 'Ann Lee')
+        doc.save(pdf_path)
+        doc.close()
+
+        with override_settings(OCR_PROFILES={'fast': {'dpi': 96}}):
+            self.assertEqual(build_profiles()['fast'].dpi, 96)
+        with mock.patch('certificates.ocr_profiles.DEFAULT_PROFILE', 'fast'), \
+                mock.patch('certificates.views.pytesseract.image_to_string', return_value='Ann Lee') as tesseract:
+            pages = extract_pages(pdf_path)
+        # 'fast' reads one page, in greyscale, with its own Tesseract options
+        self.assertEqual([(page['page'], page['source']) for page in pages], [(1, 'tesseract')])
+        image, = tesseract.call_args.args
+        self.assertEqual((image.mode, tesseract.call_args.kwargs['config']), ('L', '--psm 6'))
+
+    def test_unknown_profile_is_rejected(self):
+        self.assertEqual(get_profile(' Accurate ').name, 'accurate')
+        with self.assertRaises(ValueError):
+            get_profile('thorough')
+
+        cache.clear()
+        token = Token.objects.create(user=User.objects.create_user(email='ann@example.com', password='x'))
+        with mock.patch('certificates.views.prepare_upload') as prepare:
+            response = self.client.post('/api/certificates/upload/', {
+                'certificate_file': SimpleUploadedFile('cert.pdf', b'%PDF-1.4'), 'issuer': 'Coursera',
+                'course_name': 'Machine Learning', 'profile': 'thorough',
+            }, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Unknown OCR profile 'thorough'", response.json()['error'])
+        prepare.assert_not_called()
+
+    def test_fallback_extraction_records_its_profile(self):
+        cache.clear()
+        user = User.objects.create_user(email='ann@example.com', password='x', first_name='Ann', last_name='Lee')
+        UserProfile.objects.create(user=user)
+        token = Token.objects.create(user=user)
+        readings = [
+            [{'page': 1, 'source': 'tesseract', 'ms': 5, 'text': 'Certificate\n'}],
+            [{'page': 1, 'source': 'paddle', 'ms': 5, 'text': 'Certificate of Completion\n'}],
+        ]
+        with mock.patch('certificates.views.run_isolated', return_value=Image.new('RGB', (64, 64))), \
+                mock.patch('certificates.views.read_pages', side_effect=readings) as read:
+            response = self.client.post('/api/certificates/upload/', {
+                'certificate_file': SimpleUploadedFile('cert.pdf', b'%PDF-1.4'), 'issuer': 'Coursera',
+                'course_name': 'Machine Learning', 'profile': 'accurate',
+            }, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 400)
+        accurate = get_profile('accurate')
+        self.assertEqual([call.args[2:] for call in read.call_args_list], [(accurate,), (accurate, 'paddle')])
+        extraction = OCRExtraction.objects.get(user=user)
+        self.assertEqual((extraction.profile, extraction.extractor), ('accurate', 'tesseract+paddle'))
+        self.assertEqual(len(unpack_pages(extraction.pages)), 2)
+
+    def test_otsu_threshold_separates_ink_from_background(self):
+        image = Image.new('L', (10, 10), 220)
+        image.paste(40, (0, 0, 10, 3))
+        self.assertTrue(40 <= otsu_threshold(image) < 220)
+        self.assertEqual(image.point(lambda level: 255 if level > otsu_threshold(image) else 0).histogram()[0], 30)
+        self.assertEqual(otsu_threshold(Image.new('L', (4, 4), 128)), 127)
+
+
+class NormalizationTests(TestCase):
+    def test_folds_ligatures_accents_and_case(self):
+        self.assertEqual(fold('Certiﬁcate Ré Æsop'), 'certificate re aesop')
+        self.assertEqual(normalize('  A|ice   Lée, Jr. '), 'alice lee jr')
+
+    def test_resolves_ocr_confusions_by_majority(self):
+        self.assertEqual(fix_confusions('a1ice'), 'alice')
+        self.assertEqual(fix_confusions('2o24'), '2024')
+        self.assertEqual(fix_confusions('python3'), 'python3')  # no reading for 3 as a letter
+
+    def test_indexes_lines_by_token(self):
+        text = NormalizedText('Certificate of Completion\n\n  \nAnn Lee\nCoursera: Machine Learning\n')
+        self.assertEqual(text.lines, ['certificate of completion', 'ann lee', 'coursera machine learning'])
+        self.assertEqual(text.raw_lines[1], 'Ann Lee')
+        self.assertEqual(text.line_tokens(2), ['coursera', 'machine', 'learning'])
+        self.assertEqual(text.candidate_lines(['machine', 'learning', 'lee']), [2, 1])
+
+    def test_similarity_reports_best_raw_line(self):
+        text = NormalizedText('Certificate of Completion\nAwarded to A1ice Smith\nCoursera')
+        self.assertEqual(similarity('Alice Smith', text), (100, 'Awarded to A1ice Smith'))
+        score, _ = similarity('Quantum Chemistry', text)
+        self.assertLess(score, 70)
+        # A plain string is normalised the same way
+        self.assertEqual(similarity('coursera', 'Certificate\nCOURSERA')[0], 100)
+
+
+class WarmStartTests(TestCase):
+    def test_import_failures_are_reported_not_raised(self):
+        report = timed_imports(['json', 'certificates.no_such_module'])
+        self.assertEqual([(name, error is None) for name, _, error in report],
+                         [('json', True), ('certificates.no_such_module', False)])
+        self.assertIn('ModuleNotFoundError', report[1][2])
+
+    def test_preload_logs_each_step_and_leaves_process_fork_safe(self):
+        lines = []
+        with override_settings(WARM_START_MODULES=['json']), \
+                mock.patch('certificates.warmup.warm_models', return_value=0.5), \
+                mock.patch('certificates.warmup.make_fork_safe') as fork_safe:
+            report = preload(log=lines.append)
+        fork_safe.assert_called_once_with()
+        self.assertEqual([name for name, _, _ in report], ['json'])
+        self.assertTrue(lines[0].startswith('Warm start: preloaded 1 modules'))
+        self.assertIn('500.0 ms', lines[-1])
+
+    def test_fork_safe_closes_connections_and_freezes_collector(self):
+        with mock.patch('certificates.warmup.connections.close_all') as close_all, \
+                mock.patch('certificates.warmup.gc.freeze', create=True) as freeze:
+            make_fork_safe()
+        close_all.assert_called_once_with()
+        freeze.assert_called_once_with()
+
+
+class LoadTestReportTests(TestCase):
+    def test_percentile_is_nearest_rank(self):
+        samples = list(range(1, 11))
+        self.assertEqual([percentile(samples, pct) for pct in (5, 25, 50, 95, 100)], [1, 3, 5, 10, 10])
+        # 2.5 and 4.5 ranks round up, not to the even neighbour
+        self.assertEqual(percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(percentile([1, 2, 3, 4], 62.5), 3)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_oauth_standin_needs_debug_or_loadtest_mode(self):
+        with override_settings(DEBUG=False, LOADTEST_MODE=False), self.assertRaises(ImproperlyConfigured):
+            StandInGoogleOAuth2()
+        with override_settings(DEBUG=False, LOADTEST_MODE=True):
+            StandInGoogleOAuth2()
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='events@example.com', password='x')
+        UserProfile.objects.create(user=self.user)
+        self.api_token = Token.objects.create(user=self.user)
+
+    async def open_stream(self, query):
+        response = await AsyncClient().get(f'/api/events/?{query}')
+        if response.status_code != 200:
+            return response, []
+        stream = response.streaming_content
+        chunks = [await anext(stream), await anext(stream)]
+        await stream.aclose()
+        return response, chunks
+
+    def test_stream_token_opens_stream_under_asgi(self):
+        response = async_to_sync(AsyncClient().post)(
+            '/api/events/token/', headers={'Authorization': f'Token {self.api_token.key}'}
+        )
+        response, chunks = async_to_sync(self.open_stream)(f"stream_token={response.json()['stream_token']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'event: snapshot', chunks[1])
+
+    def test_api_tokens_and_expired_stream_tokens_are_refused(self):
+        response, _ = async_to_sync(self.open_stream)(f'token={self.api_token.key}')
+        self.assertEqual(response.status_code, 401)
+        response, _ = async_to_sync(self.open_stream)(f'stream_token={self.api_token.key}')
+        self.assertEqual(response.status_code, 401)
+        with mock.patch('certificates.authentication.STREAM_TOKEN_MAX_AGE_SECONDS', -1):
+            response, _ = async_to_sync(self.open_stream)(f'stream_token={stream_token(self.user)}')
+        self.assertEqual(response.status_code, 401)
+
+    def test_not_served_under_wsgi(self):
+        response = Client().get(f'/api/events/?stream_token={stream_token(self.user)}')
+        self.assertEqual(response.status_code, 501)
+        response = Client().post('/api/events/token/', headers={'Authorization': f'Token {self.api_token.key}'})
+        self.assertEqual(response.status_code, 501)
+
+
+class MerkleTreeTests(TestCase):
+    @staticmethod
+    def hashes(count):
+        return [hashlib.sha256(str(number).encode()).hexdigest() for number in range(count)]
+
+    def test_every_proof_verifies_for_odd_and_even_leaf_counts(self):
+        for count in (1, 2, 3, 5, 6, 7, 8, 13):
+            leaves = self.hashes(count)
+            root, proofs = build_tree(leaves)
+            for leaf, proof in zip(leaves, proofs):
+                self.assertTrue(verify_proof(leaf, proof, root), (count, leaf))
+                self.assertLessEqual(len(proof), (count - 1).bit_length())
+
+    def test_unpaired_node_is_carried_up_not_duplicated(self):
+        a, b, c = self.hashes(3)
+        root, proofs = build_tree([a, b, c])
+        self.assertEqual(root, node_hash(node_hash(leaf_hash(a), leaf_hash(b)), leaf_hash(c)).hex())
+        self.assertEqual(proofs[2], [['L', node_hash(leaf_hash(a), leaf_hash(b)).hex()]])
+        self.assertEqual(build_tree([a]), (leaf_hash(a).hex(), [[]]))
+
+    def test_rejects_wrong_leaf_root_or_malformed_proof(self):
+        leaves = self.hashes(5)
+        root, proofs = build_tree(leaves)
+        self.assertFalse(verify_proof(leaves[0], proofs[1], root))
+        self.assertFalse(verify_proof(leaves[0], proofs[0], build_tree(leaves[:4])[0]))
+        self.assertFalse(verify_proof(leaves[0], [['L', 'not hex']], root))
+        # An inner node cannot be passed off as a leaf
+        inner = node_hash(leaf_hash(leaves[0]), leaf_hash(leaves[1])).hex()
+        self.assertFalse(verify_proof(inner, proofs[2][1:], root))
+        with self.assertRaises(ValueError):
+            build_tree([])
+
+
+class PublicVerificationTests(TestCase):
+    def test_rate_limit_keys_on_forwarded_client_address(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.9')
+        self.assertEqual(verification.client_address(request), '10.0.0.1')
+        with mock.patch.object(verification, 'CLIENT_ADDRESS_HEADER', 'HTTP_X_FORWARDED_FOR'):
+            # The client chose 6.6.6.6; the proxy appended the address it saw
+            self.assertEqual(verification.client_address(request), '203.0.113.9')
+            with mock.patch.object(verification, 'TRUSTED_PROXIES', 3):
+                self.assertEqual(verification.client_address(request), '10.0.0.1')
+            with mock.patch.object(verification, 'TRUSTED_PROXIES', 0):
+                self.assertEqual(verification.client_address(request), '10.0.0.1')
+
+    def test_negative_trusted_proxies_fail_checks(self):
+        for trusted_proxies, errors in [(0, []), (2, []), (-1, ['certificates.E001'])]:
+            with self.subTest(trusted_proxies=trusted_proxies), \
+                    override_settings(PUBLIC_VERIFY_TRUSTED_PROXIES=trusted_proxies):
+                self.assertEqual([error.id for error in trusted_proxies_check(None)], errors)
+
+    def test_answers_and_misses_are_cached_until_forgotten(self):
+        cache.clear()
+        user = User.objects.create_user(email='holder@example.com', password='x')
+        known, unknown = hashlib.sha256(b'known').hexdigest(), hashlib.sha256(b'unknown').hexdigest()
+        make_certificate(user, file_hash=known, status='verified')
+
+        def verify(file_hash):
+            response = self.client.get(f'/api/verify/{file_hash}/')
+            return response.status_code, response['X-Cache']
+
+        self.assertEqual(verify(known), (200, 'MISS'))
+        self.assertEqual(verify(known), (200, 'HIT'))
+        self.assertEqual(verify(unknown), (404, 'MISS'))
+        self.assertEqual(verify(unknown), (404, 'HIT'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_certificate(user, file_hash=unknown, status='verified')
+            verification.forget([unknown])
+        self.assertEqual(verify(unknown), (200, 'MISS'))
+        self.assertEqual(verify(known), (200, 'HIT'))
+
+    def test_oversized_body_is_refused_before_parsing(self):
+        with mock.patch('django.http.request.HttpRequest._load_post_and_files') as parse:
+            response = self.client.post(
+                '/api/verify/', data=b'x', content_type='multipart/form-data; boundary=x',
+                CONTENT_LENGTH=str(verification.MAX_UPLOAD_BYTES + verification.MULTIPART_OVERHEAD_BYTES + 1)
+            )
+        self.assertEqual(response.status_code, 413)
+        parse.assert_not_called()
+
+
+class ScoreIndexTests(TestCase):
+    WEIGHTAGES = {'eve': [5, 5], 'bob': [10], 'ann': [10], 'cid': [2.5], 'dee': []}
+
+    def setUp(self):
+        for name, weightages in self.WEIGHTAGES.items():
+            user = User.objects.create_user(email=f'{name}@example.com', password='x')
+            UserProfile.objects.create(user=user)
+            for weightage in weightages:
+                make_certificate(user, weightage=weightage)
+        update_user_ranks()
+        self.index = ScoreIndex()
+
+    def ranks(self):
+        return dict(UserProfile.objects.values_list('user_id', 'current_rank'))
+
+    def test_rank_matches_update_user_ranks(self):
+        ranks = self.ranks()
+        self.assertEqual({user_id: self.index.rank(user_id) for user_id in ranks}, ranks)
+        self.assertEqual(len(self.index), 5)
+        self.assertIsNone(self.index.rank(0))
+
+    def test_window_and_around_follow_rank_order(self):
+        ordered = list(UserProfile.objects.order_by('current_rank').values_list('user__email', flat=True))
+        self.assertEqual(ordered, [f'{name}@example.com' for name in ('ann', 'bob', 'eve', 'cid', 'dee')])
+        window = self.index.window(2, 3)
+        self.assertEqual([row['email'] for row in window], ordered[1:4])
+        self.assertEqual([row['rank'] for row in window], [2, 3, 4])
+        self.assertEqual(window[2]['total_weightage'], Decimal('2.5'))
+        self.assertEqual([row['email'] for row in self.index.top(2)], ordered[:2])
+        ann = User.objects.get(email='ann@example.com')
+        self.assertEqual([row['email'] for row in self.index.around(ann.pk, 2)], ordered[:3])
+        self.assertEqual(self.index.window(5, 10)[0]['email'], ordered[4])
+
+    def test_sync_follows_reranking(self):
+        self.index.rank(0)  # build before the change
+        dee = User.objects.get(email='dee@example.com')
+        make_certificate(dee, weightage=20)
+        User.objects.get(email='bob@example.com').delete()
+        with mock.patch('certificates.ranking.score_index', self.index):
+            update_user_ranks()
+        ranks = self.ranks()
+        self.assertEqual(ranks[dee.pk], 1)
+        self.assertEqual({user_id: self.index.rank(user_id) for user_id in ranks}, ranks)
+        self.assertEqual(len(self.index), 4)
+
+
+class OCRBudgetTests(TestCase):
+    def page(self, width_in, height_in):
+        return SimpleNamespace(rect=SimpleNamespace(width=width_in * 72, height=height_in * 72), number=0)
+
+    def test_fit_page_lowers_dpi_for_oversized_pages(self):
+        with mock.patch('certificates.ocr_budget.MAX_PAGE_PIXELS', 1_000_000):
+            self.assertEqual(fit_page(self.page(8, 10), 100), (100, 800_000))
+            dpi, pixels = fit_page(self.page(8, 10), 200)
+            self.assertLess(dpi, 200)
+            self.assertLessEqual(pixels, 1_000_000)
+            with mock.patch('certificates.ocr_budget.MIN_DPI', 50), self.assertRaises(OCRFailed):
+                fit_page(self.page(100, 100), 200)
+
+    def test_run_isolated_returns_result_and_failure_reason(self):
+        self.assertEqual(run_isolated(sleep_then, 0, {'pages': 2}, timeout=5), {'pages': 2})
+        with self.assertRaisesRegex(OCRFailed, 'unreadable'):
+            run_isolated(give_up, 'unreadable', timeout=5)
+
+    @mock.patch('certificates.ocr_budget.ISOLATION', 'process')
+    def test_run_isolated_kills_overrunning_documents_and_pages(self):
+        with self.assertRaisesRegex(OCRFailed, 'longer than 0.2 s'):
+            run_isolated(sleep_then, 5, None, timeout=0.2)
+        with self.assertRaisesRegex(OCRFailed, 'A page took longer'):
+            run_isolated(read_slowly, 5, 1, timeout=10, step_timeout=0.2)
+        self.assertEqual(run_isolated(read_slowly, 0.1, 3, timeout=10, step_timeout=1), 3)
+
+    @mock.patch('certificates.ocr_budget.ISOLATION', 'process')
+    def test_workers_are_reused_until_they_overrun(self):
+        pid = run_isolated(os.getpid, timeout=30)
+        self.assertNotEqual(pid, os.getpid())
+        self.assertEqual(run_isolated(os.getpid, timeout=30), pid)
+        with self.assertRaises(OCRFailed):
+            run_isolated(sleep_then, 5, None, timeout=0.2)
+        self.assertNotEqual(run_isolated(os.getpid, timeout=30), pid)
+
+
+class ThumbnailEndpointTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=directory.name))
+        doc = fitz.open()
+        doc.new_page(width=200, height=100).insert_text((20, 50), 'Ann Lee')
+        data = doc.tobytes()
+        doc.close()
+        self.file_hash = hashlib.sha256(data).hexdigest()
+        user = User.objects.create_user(email='thumbs@example.com', password='x')
+        make_certificate(user, file_hash=self.file_hash, certificate_file=ContentFile(data, name='scan.pdf'))
+
+    def url(self, size='small'):
+        return thumbnail_urls(RequestFactory().get('/'), self.file_hash)[size]
+
+    def test_signed_url_renders_and_serves_thumbnail(self):
+        response = self.client.get(self.url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['ETag'], f'"{self.file_hash}-small"')
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+        self.assertEqual(self.client.get(self.url(), headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+    def test_tampered_expired_and_unknown_size_are_refused(self):
+        url = self.url()
+        self.assertEqual(self.client.get(url[:-2] + 'xx').status_code, 403)
+        self.assertEqual(self.client.get(url.replace('/small.jpg', '/large.jpg')).status_code, 403)
+        with mock.patch('certificates.previews.time.time', return_value=url_expiry() + 1):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url.replace('/small.jpg', '/huge.jpg')).status_code, 404)
+
+    def test_render_outside_the_page_budget_is_not_served(self):
+        # Pool workers do not see patched budgets, so render in this process
+        with mock.patch('certificates.ocr_budget.ISOLATION', 'thread'), \
+                mock.patch('certificates.ocr_budget.MAX_PAGE_PIXELS', 100):
+            self.assertEqual(self.client.get(self.url()).status_code, 404)
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch('certificates.views.score_index', ScoreIndex()))
+        self.user = User.objects.create_user(email='ann@example.com', password='x', first_name='Ann')
+        other = User.objects.create_user(email='bob@example.com', password='x')
+        for user in (self.user, other):
+            UserProfile.objects.create(user=user)
+        make_certificate(self.user, 'Deep Learning', weightage=4)
+        make_certificate(self.user, 'Cloud Basics', domain='Cloud', weightage=2)
+        make_certificate(other, 'Statistics', weightage=10)
+        rebuild_domains()
+        update_user_ranks()
+        self.headers = {'Authorization': f'Token {Token.objects.create(user=self.user).key}'}
+
+    async def get(self, url, headers=None):
+        response = await AsyncClient().get(url, headers=self.headers if headers is None else headers)
+        return response.status_code, response.json()
+
+    async def test_certificate_list_is_the_users_own_and_filtered(self):
+        code, body = await self.get('/api/certificates/')
+        self.assertEqual(code, 200)
+        self.assertEqual([cert['name'] for cert in body['certificates']], ['Cloud Basics', 'Deep Learning'])
+        code, body = await self.get('/api/certificates/?domain=Cloud')
+        self.assertEqual([cert['name'] for cert in body['certificates']], ['Cloud Basics'])
+
+    async def test_dashboard_and_profile_report_rank_and_totals(self):
+        code, body = await self.get('/api/dashboard/')
+        self.assertEqual(code, 200)
+        self.assertEqual(body['stats']['total_certificates'], 2)
+        self.assertEqual(body['stats']['current_rank'], 2)
+        self.assertEqual(len(body['recent_certificates']), 2)
+        code, body = await self.get('/api/profile/')
+        self.assertEqual(code, 200)
+        self.assertEqual((body['profile']['first_name'], body['profile']['total_weightage']), ('Ann', 6.0))
+        self.assertEqual(sorted(domain['name'] for domain in body['domains']), ['Cloud', 'Data Science'])
+
+    async def test_leaderboard_overall_around_me_and_by_domain(self):
+        code, body = await self.get('/api/leaderboard/')
+        self.assertEqual(code, 200)
+        self.assertEqual(
+            [(entry['user__email'], entry['current_rank'], entry['certificate_count']) for entry in body['leaderboard']],
+            [('bob@example.com', 1, 1), ('ann@example.com', 2, 2)]
+        )
+        code, body = await self.get('/api/leaderboard/?around=me&radius=0')
+        self.assertEqual([entry['user__email'] for entry in body['leaderboard']], ['ann@example.com'])
+        code, body = await self.get('/api/leaderboard/?domain=Cloud')
+        self.assertEqual([entry['user__email'] for entry in body['leaderboard']], ['ann@example.com'])
 
-# Create your tests here.
+    async def test_requests_without_a_valid_token_are_refused(self):
+        for url in ('/api/certificates/', '/api/dashboard/', '/api/profile/', '/api/leaderboard/'):
+            for headers in ({}, {'Authorization': 'Token not-a-token'}):
+                code, _ = await self.get(url, headers)
+                self.assertEqual(code, 401, url)
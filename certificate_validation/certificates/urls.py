@@ -1,8 +1,9 @@
 from django.urls import path, include
 from .views import (
     SignupView, SigninView, LogoutView, google_auth_complete,
-    DashboardView, CertificateListView, CertificateUploadView,
-    LeaderboardView, ProfileView
+    DashboardView, CertificateListView, CertificateUploadView, CertificateBatchUploadView,
+    ChunkedUploadInitView, ChunkedUploadView, ChunkedUploadFinalizeView,
+    LeaderboardView, ProfileView, EventStreamView, EventStreamTokenView, PublicVerificationView, certificate_thumbnail, UploadAdmissionMetricsView, ExportView
 )
 from social_django.urls import urlpatterns as social_urls
 
@@ -14,7 +15,18 @@ urlpatterns = [
     path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
     path('api/certificates/', CertificateListView.as_view(), name='certificate_list'),
     path('api/certificates/upload/', CertificateUploadView.as_view(), name='certificate_upload'),
+    path('api/certificates/upload/batch/', CertificateBatchUploadView.as_view(), name='certificate_batch_upload'),
+    path('api/certificates/upload/chunked/', ChunkedUploadInitView.as_view(), name='chunked_upload_init'),
+    path('api/certificates/upload/chunked/<uuid:upload_id>/', ChunkedUploadView.as_view(), name='chunked_upload'),
+    path('api/certificates/upload/chunked/<uuid:upload_id>/finalize/', ChunkedUploadFinalizeView.as_view(), name='chunked_upload_finalize'),
+    path('certificates/thumbnails/<str:file_hash>/<str:size>.jpg', certificate_thumbnail, name='certificate_thumbnail'),
     path('api/leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
     path('api/profile/', ProfileView.as_view(), name='profile'),
+    path('api/events/', EventStreamView.as_view(), name='events'),
+    path('api/events/token/', EventStreamTokenView.as_view(), name='events_token'),
+    path('api/verify/', PublicVerificationView.as_view(), name='public_verify'),
+    path('api/verify/<str:file_hash>/', PublicVerificationView.as_view(), name='public_verify_hash'),
+    path('api/exports/<str:kind>.<str:fmt>', ExportView.as_view(), name='export'),
+    path('api/metrics/uploads/', UploadAdmissionMetricsView.as_view(), name='upload_metrics'),
     path('', include((social_urls, 'social'), namespace='social')),
 ]
\ No newline at end of file
@@ -0,0 +1,111 @@
+import hashlib
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from .admission import TokenBucket
+from .anchoring import inclusion_proof
+from .models import BlockchainVerification, Certificate
+
+# Public lookups by file hash for third parties (employers etc.). Answers are
+# cached per hash; misses are cached too, for less time, so repeated probes
+# for unknown hashes never reach the database. Writes that change what a hash
+# resolves to call forget() so neither kind of entry outlives the change.
+HIT_SECONDS = getattr(settings, 'PUBLIC_VERIFY_CACHE_SECONDS', 300)
+MISS_SECONDS = getattr(settings, 'PUBLIC_VERIFY_MISS_CACHE_SECONDS', 60)
+MAX_UPLOAD_BYTES = getattr(settings, 'PUBLIC_VERIFY_MAX_UPLOAD_BYTES', 20 * 1024 * 1024)
+
+# Room for the multipart boundaries and headers around an uploaded file of MAX_UPLOAD_BYTES
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Behind a reverse proxy REMOTE_ADDR is the proxy's address, so clients are told
+# apart by the header it fills in (a META key such as 'HTTP_X_FORWARDED_FOR').
+# Only the entry added by the nearest TRUSTED_PROXIES proxies counts: anything
+# before it is whatever the client chose to send; with TRUSTED_PROXIES = 0 there is
+# no proxy to trust and REMOTE_ADDR is used (negative counts fail checks.py).
+CLIENT_ADDRESS_HEADER = getattr(settings, 'PUBLIC_VERIFY_CLIENT_ADDRESS_HEADER', None)
+TRUSTED_PROXIES = getattr(settings, 'PUBLIC_VERIFY_TRUSTED_PROXIES', 1)
+
+FILE_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+MISSING = 'missing'
+
+verify_bucket = TokenBucket(
+    'verify-bucket:ip',
+    capacity=getattr(settings, 'PUBLIC_VERIFY_BURST', 30),
+    refill_per_minute=getattr(settings, 'PUBLIC_VERIFY_RATE_PER_MINUTE', 60),
+)
+
+
+def client_address(request):
+    """Address the rate limit is keyed on: from CLIENT_ADDRESS_HEADER when configured, else REMOTE_ADDR."""
+    if CLIENT_ADDRESS_HEADER and TRUSTED_PROXIES > 0:
+        addresses = [address.strip() for address in request.META.get(CLIENT_ADDRESS_HEADER, '').split(',')]
+        addresses = [address for address in addresses if address]
+        if len(addresses) >= TRUSTED_PROXIES:
+            return addresses[-TRUSTED_PROXIES]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def cache_key(file_hash):
+    return f"public-verify:{file_hash}"
+
+
+def hash_upload(uploaded_file):
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def lookup(file_hash):
+    """Public view of the certificate with this file hash, preferring a verified one, or None."""
+    certificate = (
+        Certificate.objects.filter(file_hash=file_hash)  # file_hash is indexed
+        .select_related('user', 'blockchainverification__batch')
+        .order_by(Case(When(status='verified', then=Value(0)), default=Value(1), output_field=IntegerField()),
+                  '-upload_date')
+        .first()
+    )
+    if certificate is None:
+        return None
+
+    try:
+        verification = certificate.blockchainverification
+    except BlockchainVerification.DoesNotExist:
+        verification = None
+    return {
+        'file_hash': file_hash,
+        'verified': certificate.status == 'verified',
+        'status': certificate.status,
+        'name': certificate.name,
+        'issuer': certificate.issuer,
+        'course': certificate.course_name,
+        'holder': f"{certificate.user.first_name} {certificate.user.last_name}".strip(),
+        'verification_date': certificate.verification_date,
+        'anchor': inclusion_proof(verification) if verification and verification.batch_id else None,
+    }
+
+
+async def cached_lookup(file_hash):
+    """lookup() through the cache; returns (result or None, whether it came from the cache)."""
+    cached = await cache.aget(cache_key(file_hash))
+    if cached is not None:
+        return (None if cached == MISSING else cached), True
+
+    result = await sync_to_async(lookup)(file_hash)
+    if result is None:
+        await cache.aset(cache_key(file_hash), MISSING, timeout=MISS_SECONDS)
+    else:
+        await cache.aset(cache_key(file_hash), result, timeout=HIT_SECONDS)
+    return result, False
+
+
+def forget(file_hashes):
+    """Drop cached answers (including cached misses) once the surrounding transaction commits."""
+    keys = [cache_key(file_hash) for file_hash in file_hashes if file_hash]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
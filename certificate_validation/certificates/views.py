@@ -1,5 +1,6 @@
 from django.contrib.auth import authenticate
-from django.http import HttpResponseRedirect
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseRedirect, FileResponse, HttpResponse, Http404, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -7,10 +8,47 @@ from django.contrib.auth import get_user_model
 from social_django.views import complete
 from rest_framework.authtoken.models import Token
 from django.utils import timezone
-from django.db.models import Sum, Count
-from django.db.models.functions import Coalesce
-from django.db.models import DecimalField
-from .models import Certificate, UserProfile, Domain, RankHistory, BlockchainVerification, OCRExtraction , Course
+from django.db.models import Count, F
+from django.db import transaction
+from .models import Certificate, UserProfile, Domain, RankHistory, BlockchainVerification, OCRExtraction , Course, ChunkedUpload
+from .chunked import (
+    create_upload, append_chunk, finish_hash, discard_upload, data_path,
+    PageTextCache, schedule_early_render, pending_early_render
+)
+from django.core.files import File
+from .scoring import compute_weightage
+from .classification import classify
+from .extraction import extraction_fields, pages_text
+from .normalization import NormalizedText, normalize
+from .ocr_profiles import get_profile, preprocess
+from .ocr_budget import (
+    DOCUMENT_TIMEOUT_SECONDS as OCR_DOCUMENT_TIMEOUT_SECONDS, MAX_DOCUMENT_PIXELS, MAX_PAGES as OCR_MAX_PAGES,
+    PAGE_TIMEOUT_SECONDS as OCR_PAGE_TIMEOUT_SECONDS,
+    OCRFailed, fit_page, run_isolated
+)
+from .ranking import score_index, update_user_ranks
+from .exports import (
+    CHUNK_SIZE as EXPORT_CHUNK_SIZE, EXPORTS, FORMATS as EXPORT_FORMATS, parse_filters as parse_export_filters,
+    stream_export
+)
+from .fingerprint import render_first_page, dhash, band_fields, find_near_duplicates, hamming_distance
+from .fingerprint import MAX_DISTANCE as PHASH_MAX_DISTANCE
+from .previews import THUMBNAIL_SIZES, thumbnail_path, ensure_thumbnails, thumbnail_urls, valid_signature
+from django.core.files.storage import default_storage
+from .media import certificate_file_url
+from .streaming import is_asgi, streaming_content
+from django.views import View
+from asgiref.sync import sync_to_async
+from .authentication import AsyncTokenAuthMixin, STREAM_TOKEN_MAX_AGE_SECONDS, json_response, stream_token
+from .events import broker, event_stream, notify_certificate_status, TooManyStreams
+from .verification import (
+    FILE_HASH_RE, MAX_UPLOAD_BYTES as VERIFY_MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES, cached_lookup,
+    client_address, forget as forget_verification, hash_upload, verify_bucket
+)
+from .admission import user_upload_bucket, global_upload_bucket, upload_admission
+from rest_framework.permissions import IsAdminUser
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
 import urllib.parse
 from rest_framework.permissions import IsAuthenticated
@@ -22,10 +60,10 @@ from fuzzywuzzy import fuzz
 from fuzzywuzzy import process
 import tempfile
 import time
-import hashlib
 import fitz  # PyMuPDF
 import io
 from PIL import Image
+import numpy as np
 import pytesseract
 from paddleocr import PaddleOCR 
 import re
@@ -42,103 +80,189 @@ ALLOWED_COURSES = ["python", "java", "ruby", "sql", "mongodb"]
 
 ocr_engine = PaddleOCR(use_angle_cls=True, lang='en')
 
-ISSUER_WEIGHTS = {
-    "Coursera": 9.5,
-    "Udemy": 7.0,
-    "LinkedIn Learning": 8.5,
-    "Microsoft Learn": 8.5,
-    "Amazon Web Services (AWS)": 9.0,
-    "edX": 9.5,
-    "Udacity": 9.0,
-    "PMP": 10.0,
-    "ITIL": 9.0,
-    "HubSpot Academy": 7.0,
-    "FutureLearn": 6.5,
-    "Great Learning": 7.5,
-    "Skillshare": 6.0,
-    "Alison": 6.5,
-    "freeCodeCamp": 8.0,
-    "CodeSignal": 8.5,
-    "OpenLearn": 6.5,
-    "NPTEL": 8.5,
-    "SWAYAM": 8.0,
-    "Google": 9.0,
-    "LetsUpgrade": 7.0,
-}
-
-COURSE_WEIGHTS = {
-    "Python": 7.0,
-    "Java": 7.5,
-    "Ruby": 6.0,
-    "SQL": 7.0,
-    "MongoDB": 7.5,
-}
-
-def update_user_ranks():
-    """Update total_weightage and current_rank for all users based on certificate weightage."""
-    try:
-        users = UserProfile.objects.annotate(
-            cert_total_weightage=Coalesce(
-                Sum('user__certificate__weightage'),
-                Decimal('0.0'),
-                output_field=DecimalField()
-            )
-        ).order_by('-cert_total_weightage', 'user__email')
-
-        if not users.exists():
-            logger.info("No users found for rank and weightage update")
-            return
-
-        for rank, user_profile in enumerate(users, 1):
-            # Update total_weightage if different
-            if user_profile.total_weightage != user_profile.cert_total_weightage:
-                user_profile.total_weightage = user_profile.cert_total_weightage
-                logger.info(f"Updated total_weightage for {user_profile.user.email} to {user_profile.total_weightage}")
-            # Update current_rank if different
-            if user_profile.current_rank != rank:
-                user_profile.current_rank = rank
-                logger.info(f"Updated rank for {user_profile.user.email} to {rank}")
-            user_profile.save()
-        logger.info("User ranks and weightage updated successfully")
-    except Exception as e:
-        logger.error(f"update_user_ranks error: {str(e)}")
-
-def clean_text(text):
-    """Remove special characters, collapse whitespace."""
-    return re.sub(r'\W+', ' ', text).strip().lower()
-
-def is_similar(needle, haystack, threshold=70):
+# Rendering and Tesseract run here instead of on the request thread/event loop.
+# Tesseract executes in a subprocess, so threads give real parallelism for OCR.
+ocr_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'OCR_WORKERS', os.cpu_count() or 2),
+    thread_name_prefix='ocr',
+)
+
+MATCH_THRESHOLD = 70
+
+def similarity(needle, haystack, threshold=MATCH_THRESHOLD):
+    """
+    Partial-ratio score of `needle` against the full text or any single line,
+    plus the line that matched best (recorded with the extraction).
+
+    Pass a NormalizedText to reuse one normalisation across several needles.
+    The lines sharing the most tokens with the needle are scored first; the
+    rest are only scanned when neither they nor the full text clear `threshold`.
+    """
+    if not isinstance(haystack, NormalizedText):
+        haystack = NormalizedText(haystack)
+    needle_clean = normalize(needle)
+    score = fuzz.partial_ratio(needle_clean, haystack.text)
+
+    best_line, best_line_score = '', -1
+    candidates = haystack.candidate_lines(needle_clean.split())
+    for lines in (candidates, [i for i in range(len(haystack.lines)) if i not in candidates]):
+        for index in lines:
+            line_score = fuzz.partial_ratio(needle_clean, haystack.lines[index])
+            if line_score > best_line_score:
+                best_line, best_line_score = haystack.raw_lines[index], line_score
+        if max(score, best_line_score) >= threshold and best_line:
+            break
+    return max(score, best_line_score), best_line
+
+def is_similar(needle, haystack, threshold=MATCH_THRESHOLD):
     """Improved similarity check: checks both lines and full text."""
-    needle_clean = clean_text(needle)
-    haystack_clean = clean_text(haystack)
+    return similarity(needle, haystack, threshold)[0] >= threshold
+
+
+def paddle_text(img):
+    """PaddleOCR's recognised lines for one image, top to bottom."""
+    result = ocr_engine.ocr(np.array(img.convert('RGB')), cls=True)
+    return '\n'.join(line[1][0] for block in result or [] for line in block or [])
 
-    # Compare with the entire OCR text
-    if fuzz.partial_ratio(needle_clean, haystack_clean) >= threshold:
-        return True
 
-    # Compare line by line
-    lines = haystack.splitlines()
-    for line in lines:
-        line_clean = clean_text(line)
-        if fuzz.partial_ratio(needle_clean, line_clean) >= threshold:
-            return True
-    return False
+def ocr_page(page, profile=None, engine=None):
+    """Render one PDF page to an image and OCR it, as the OCR profile (default: the deployment's) says."""
+    profile = profile or get_profile()
+    dpi, _ = fit_page(page, profile.dpi)
+    # Raw samples straight into PIL (no PNG round trip); greyscale up front when preprocessing drops colour anyway
+    gray = profile.preprocess != 'none'
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY if gray else fitz.csRGB, alpha=False)
+    img = preprocess(Image.frombytes('L' if gray else 'RGB', (pix.width, pix.height), pix.samples), profile.preprocess)
+    if (engine or profile.engine) == 'paddle':
+        return paddle_text(img)
+    try:
+        return pytesseract.image_to_string(img, config=profile.tesseract_config, timeout=OCR_PAGE_TIMEOUT_SECONDS)
+    except RuntimeError as e:
+        # pytesseract kills Tesseract and raises a plain RuntimeError when the timeout passes
+        if 'timeout' not in str(e).lower():
+            raise
+        raise OCRFailed(f"Page {page.number + 1} took longer than {OCR_PAGE_TIMEOUT_SECONDS} s to OCR")
 
 
-def extract_text_from_pdf(pdf_path):
+def extract_pages(pdf_path, page_cache=None, profile=None, engine=None, progress=None):
     """
     Converts each page of a PDF to an image and applies OCR to extract text.
+
+    Returns one dict per page with its text, where the text came from and
+    how long the page took. The profile limits how many pages are read, and
+    at most OCR_MAX_PAGES are read whatever it says. Pages already OCRed
+    while a chunked upload was still arriving are taken from `page_cache`
+    when their content is unchanged. `progress` is called after each page.
+    Raises OCRFailed when the document is unreadable or over its pixel budget.
+    """
+    profile = profile or get_profile()
+    engine = engine or profile.engine
+    try:
+        doc = fitz.open(pdf_path)
+    except fitz.FileDataError as e:
+        raise OCRFailed(f"The document could not be opened: {e}")
+    pages = []
+    rendered = 0
+    try:
+        page_count = min(len(doc), profile.max_pages or len(doc))
+        if page_count > OCR_MAX_PAGES:
+            logger.info(f"Reading the first {OCR_MAX_PAGES} of {len(doc)} pages of {pdf_path}")
+            page_count = OCR_MAX_PAGES
+        for page_num in range(page_count):
+            started = time.monotonic()
+            page = doc.load_page(page_num)
+            cached = page_cache.lookup(page) if page_cache else None
+            if cached is None:
+                rendered += fit_page(page, profile.dpi)[1]
+                if rendered > MAX_DOCUMENT_PIXELS:
+                    raise OCRFailed(f"The document needs more than {MAX_DOCUMENT_PIXELS:,} rendered pixels to read")
+            pages.append({
+                'page': page_num + 1,
+                'text': cached if cached is not None else ocr_page(page, profile, engine),
+                'source': 'early-render' if cached is not None else engine,
+                'ms': round((time.monotonic() - started) * 1000),
+            })
+            if progress:
+                progress()
+    finally:
+        doc.close()
+    return pages
+
+
+def read_pages(pdf_path, page_cache=None, profile=None, engine=None, timeout=None):
+    """
+    extract_pages() in a worker process that is killed when a page or the
+    whole document overruns its time budget (`timeout` seconds, default
+    OCR_DOCUMENT_TIMEOUT_SECONDS).
+    """
+    return run_isolated(
+        extract_pages, pdf_path, page_cache, profile, engine, timeout=timeout, step_timeout=OCR_PAGE_TIMEOUT_SECONDS
+    )
+
+
+def match_extraction(user, issuer, course, pages, threshold=MATCH_THRESHOLD):
+    """Score the entered details against OCR pages; returns (accepted, {detail: (score, best line)})."""
+    text = NormalizedText(pages_text(pages))
+    full_name = f"{user.first_name} {user.last_name}".strip()
+    matches = {
+        'name': similarity(full_name, text, threshold),
+        'issuer': similarity(issuer, text, threshold),
+        'course': similarity(course, text, threshold),
+    }
+    return all(score >= threshold for score, _ in matches.values()), matches
+
+
+def read_and_match(user, issuer, course, pdf_path, page_cache=None, profile=None):
+    """
+    OCR a certificate and match the entered details, as one profile says.
+    Returns (pages, accepted, matches). When the profile has a fallback
+    engine, a document that does not match is read again with it, within
+    what is left of the document's time budget, and matched against both
+    readings before being rejected. Pages of that second reading are marked
+    'fallback'.
+    """
+    profile = profile or get_profile()
+    deadline = time.monotonic() + OCR_DOCUMENT_TIMEOUT_SECONDS
+    pages = read_pages(pdf_path, page_cache, profile)
+    accepted, matches = match_extraction(user, issuer, course, pages, profile.match_threshold)
+    if not accepted and profile.fallback_engine and profile.fallback_engine != profile.engine:
+        remaining = deadline - time.monotonic()
+        if remaining < 1:
+            logger.info(f"No time left to read {pdf_path} again with {profile.fallback_engine}")
+            return pages, accepted, matches
+        try:
+            fallback = read_pages(pdf_path, None, profile, profile.fallback_engine, timeout=remaining)
+        except Exception as e:
+            logger.error(f"Fallback OCR ({profile.fallback_engine}) failed: {str(e)}")
+        else:
+            pages += [{**page, 'fallback': True} for page in fallback]
+            accepted, matches = match_extraction(user, issuer, course, pages, profile.match_threshold)
+    return pages, accepted, matches
+
+
+# How closely another user's name must appear in an upload that looks like their certificate for it to count as a copy
+COPY_HOLDER_THRESHOLD = 90
+
+
+def confirmed_copies(candidates, file_hash, text):
+    """
+    Other users' look-alike certificates (from find_near_duplicates) that this
+    upload really is a copy of: the identical file, or one whose text names
+    their holder. Certificates sharing an issuer template name different people.
     """
-    doc = fitz.open(pdf_path)
-    text = ""
+    normalized = NormalizedText(text)
+    copies = []
+    for certificate in candidates:
+        holder = f"{certificate.user.first_name} {certificate.user.last_name}".strip()
+        if certificate.file_hash == file_hash or (
+                holder and similarity(holder, normalized, COPY_HOLDER_THRESHOLD)[0] >= COPY_HOLDER_THRESHOLD):
+            copies.append(certificate)
+    return copies
 
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        pix = page.get_pixmap()
-        img = Image.open(io.BytesIO(pix.tobytes()))
-        text += pytesseract.image_to_string(img)
 
-    return text
+def extractor_path(pages):
+    """Engines that produced the text, in page order, e.g. 'early-render+tesseract'."""
+    return '+'.join(dict.fromkeys(page['source'] for page in pages))
 
 # Authentication Views
 class SignupView(APIView):
@@ -276,55 +400,58 @@ def google_auth_complete(request, *args, **kwargs):
         return HttpResponseRedirect(f'{frontend_url}?{query_params}')
     return Response({'error': 'Google authentication failed'}, status=status.HTTP_400_BAD_REQUEST)
 
-# Other Views
-class DashboardView(APIView):
-    permission_classes = [IsAuthenticated]
+async def current_rank(profile):
+    """Rank from the in-process score index; the stored rank if the index does not know the user yet."""
+    return await sync_to_async(score_index.rank)(profile.user_id) or profile.current_rank
 
-    def get(self, request):
+
+# Other Views
+class DashboardView(AsyncTokenAuthMixin, View):
+    async def get(self, request):
         try:
             user = request.user
-            profile = user.userprofile
+
+            # Ranks and weightage are recomputed on every write path (and pushed over /api/events/),
+            # so reads no longer re-rank every user; the rank itself comes from the score index
+
+            profile = await UserProfile.objects.aget(user=user)
             certificates = Certificate.objects.filter(user=user)
             domains = Domain.objects.filter(user=user)
 
-            # Ensure ranks and weightage are up-to-date
-            update_user_ranks()
-
-            total_weightage = profile.total_weightage
-            total_certificates = certificates.count()
-            current_rank = profile.current_rank
+            total_certificates = await certificates.acount()
 
-            recent_certificates = certificates.order_by('-upload_date')[:5].values(
-                'id', 'name', 'status', 'upload_date'
-            )
+            recent_certificates = [
+                {**cert, 'thumbnails': thumbnail_urls(request, cert['file_hash'])}
+                async for cert in certificates.order_by('-upload_date')[:5].values(
+                    'id', 'name', 'status', 'upload_date', 'file_hash'
+                )
+            ]
 
-            domain_progress = domains.values('name', 'certificate_count', 'total_weightage')
+            domain_progress = [
+                domain async for domain in domains.values('name', 'certificate_count', 'total_weightage')
+            ]
 
-            return Response({
+            return json_response({
                 'stats': {
-                    'total_weightage': total_weightage,
+                    'total_weightage': profile.total_weightage,
                     'total_certificates': total_certificates,
-                    'current_rank': current_rank
+                    'current_rank': await current_rank(profile)
                 },
-                'recent_certificates': list(recent_certificates),
-                'domain_progress': list(domain_progress)
+                'recent_certificates': recent_certificates,
+                'domain_progress': domain_progress
             }, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"DashboardView error: {str(e)}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-# ... [all other imports and code remain unchanged] ...
-
-class CertificateListView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
+class CertificateListView(AsyncTokenAuthMixin, View):
+    async def get(self, request):
         try:
             user = request.user
-            search = request.query_params.get('search', '')
-            domain = request.query_params.get('domain', '')
-            cert_status = request.query_params.get('status', '')
+            search = request.GET.get('search', '')
+            domain = request.GET.get('domain', '')
+            cert_status = request.GET.get('status', '')
 
             certificates = Certificate.objects.filter(user=user)
             if search:
@@ -335,135 +462,670 @@ class CertificateListView(APIView):
                 certificates = certificates.filter(status=cert_status)
 
             certificates = certificates.order_by('-upload_date').values(
-                'id', 'name', 'issuer', 'category', 'domain', 'weightage', 'status', 'upload_date', 'certificate_file'
+                'id', 'name', 'issuer', 'category', 'domain', 'weightage', 'status', 'upload_date', 'certificate_file', 'file_hash'
             )
             certificates = [
                 {
                     **cert,
-                    'certificate_file': request.build_absolute_uri(f"{settings.MEDIA_URL}{cert['certificate_file']}") if cert['certificate_file'] else None
+                    'certificate_file': certificate_file_url(request, cert['certificate_file']),
+                    'thumbnails': thumbnail_urls(request, cert['file_hash'])
                 }
-                for cert in certificates
+                async for cert in certificates
             ]
-            return Response({'certificates': list(certificates)}, status=status.HTTP_200_OK)
+            return json_response({'certificates': certificates}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"CertificateListView error: {str(e)}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-# ... [all other functions remain unchanged] ...
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CertificateUploadView(APIView):
-    permission_classes = [IsAuthenticated]
+def certificate_thumbnail(request, file_hash, size):
+    """
+    Serve a first-page thumbnail on a signed URL from thumbnail_urls(). The
+    image shows the holder's name, so only browsers of someone who was handed
+    the URL may cache it, and only until it expires.
+    """
+    if size not in THUMBNAIL_SIZES or not FILE_HASH_RE.match(file_hash):
+        raise Http404('Unknown thumbnail')
+    expires = request.GET.get('expires')
+    if not valid_signature(file_hash, size, expires, request.GET.get('signature')):
+        raise PermissionDenied('Invalid or expired thumbnail URL')
+
+    etag = f'"{file_hash}-{size}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        path = thumbnail_path(file_hash, size)
+        if not default_storage.exists(path):
+            certificate = Certificate.objects.filter(file_hash=file_hash).first()
+            if certificate is None:
+                raise Http404('Certificate not found')
+            try:
+                ensure_thumbnails(certificate)
+            except Exception as e:
+                logger.error(f"certificate_thumbnail error: {str(e)}")
+                raise Http404('Preview unavailable')
+        response = FileResponse(default_storage.open(path, 'rb'), content_type='image/jpeg')
+
+    response['ETag'] = etag
+    response['Cache-Control'] = f"private, max-age={max(0, int(expires) - int(time.time()))}"
+    return response
+
+class PublicVerificationView(View):
+    """
+    Unauthenticated certificate check for third parties such as employers:
+    GET api/verify/<file_hash>/, or POST api/verify/ with either `file_hash`
+    or the certificate `file` itself. Answers come from the verification
+    cache and requests are rate-limited per client address.
+    """
 
-    def post(self, request):
+    async def rate_limited(self, request):
+        retry_after = await verify_bucket.take(client_address(request))
+        if retry_after:
+            return too_many_requests('Verification rate limit exceeded, please retry later', retry_after)
+        return None
+
+    async def get(self, request, file_hash=''):
+        return await self.rate_limited(request) or await self.verify(file_hash.lower())
+
+    async def post(self, request, file_hash=''):
+        # Under ASGI the body has already been spooled before the view runs (under WSGI it is read
+        # on first access to request.FILES); limiting first and checking the declared size still
+        # spare rejected and oversized requests the multipart parsing and hashing
+        rejection = await self.rate_limited(request)
+        if rejection:
+            return rejection
         try:
-            user = request.user
-            data = request.data
-            certificate_file = request.FILES.get('certificate_file')
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > VERIFY_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            return json_response({'error': 'File too large'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        uploaded = request.FILES.get('file')
+        if uploaded is not None:
+            if uploaded.size > VERIFY_MAX_UPLOAD_BYTES:
+                return json_response({'error': 'File too large'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            file_hash = await run_cpu_bound(hash_upload, uploaded)
+        else:
+            file_hash = request.POST.get('file_hash', file_hash).strip().lower()
+        return await self.verify(file_hash)
+
+    async def verify(self, file_hash):
+        try:
+            if not FILE_HASH_RE.match(file_hash):
+                return json_response({'error': 'Provide a certificate file or its SHA-256 file_hash'},
+                                     status=status.HTTP_400_BAD_REQUEST)
+
+            result, cached = await cached_lookup(file_hash)
+            if result is None:
+                response = json_response({'file_hash': file_hash, 'verified': False, 'error': 'Certificate not found'},
+                                         status=status.HTTP_404_NOT_FOUND)
+            else:
+                response = json_response(result, status=status.HTTP_200_OK)
+            response['X-Cache'] = 'HIT' if cached else 'MISS'
+            return response
+        except Exception as e:
+            logger.error(f"PublicVerificationView error: {str(e)}")
+            return json_response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            if not certificate_file:
-                return Response({'error': 'Certificate file is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            certificate_name = data.get('name', certificate_file.name)
+async def run_cpu_bound(func, *args):
+    """Run blocking render/OCR work on the OCR executor so the event loop keeps serving other requests."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(ocr_executor, func, *args)
 
-            if Certificate.objects.filter(user=user, name=certificate_name).exists():
-                return Response({'error': 'Certificate with this name already exists'}, status=status.HTTP_400_BAD_REQUEST)
 
-            file_bytes = certificate_file.read()
-            certificate_file.seek(0)
+class UploadRejected(Exception):
+    """A certificate failed validation or verification; the message is returned to the client."""
 
-            file_hash = hashlib.sha256(file_bytes).hexdigest()
 
-            if Certificate.objects.filter(user=user, file_hash=file_hash).exists():
-                return Response({'error': 'This certificate file has already been uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+class UploadFailed(UploadRejected):
+    """A certificate could not be read within the OCR budgets; `reason` says why."""
 
-            input_issuer = data.get("issuer", "").strip()
-            input_course = data.get("course_name", "").strip()
+    def __init__(self, reason):
+        super().__init__(f"Certificate could not be read: {reason}")
+        self.reason = reason
 
-            if not input_issuer or not input_course:
-                return Response({'error': 'Issuer and course_name are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # 🔍 OCR + Similarity Check
-            temp_pdf_path = 'temp_certificate.pdf'
-            with open(temp_pdf_path, 'wb+') as destination:
-                for chunk in certificate_file.chunks():
-                    destination.write(chunk)
+def rejection_response(rejection):
+    if isinstance(rejection, UploadFailed):
+        return json_response({'error': str(rejection), 'status': 'failed', 'reason': rejection.reason},
+                             status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return json_response({'error': str(rejection)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+async def read_within_budget(user, file_hash, profile, func, *args):
+    """run_cpu_bound(func, *args); a document over its OCR budgets is recorded as a failed extraction."""
+    started = time.monotonic()
+    try:
+        return await run_cpu_bound(func, *args)
+    except OCRFailed as e:
+        reason = str(e)[:255]
+        logger.warning(f"OCR of {file_hash} failed: {reason}")
+        await OCRExtraction.objects.acreate(
+            user=user, file_hash=file_hash, accepted=False, profile=profile.name,
+            duration_ms=int((time.monotonic() - started) * 1000), failure_reason=reason
+        )
+        raise UploadFailed(reason)
+
+
+async def prepare_upload(user, certificate_file, certificate_name, input_issuer, input_course,
+                         file_hash=None, pdf_path=None, page_cache=None, profile=None):
+    """
+    Run duplicate checks, fingerprinting and OCR for one uploaded file.
+
+    Chunked uploads pass the hash computed while receiving, the path of the
+    assembled file and their early-render page cache. `profile` is the OCR
+    profile to verify with (default: the deployment's).
+    Returns the values needed to save the certificate, or raises UploadRejected.
+    """
+    profile = profile or get_profile()
+    if not input_issuer or not input_course:
+        raise UploadRejected('Issuer and course_name are required')
 
-            pdf_text = extract_text_from_pdf(temp_pdf_path)
+    if await Certificate.objects.filter(user=user, name=certificate_name).aexists():
+        raise UploadRejected('Certificate with this name already exists')
 
-            print("\n--- Extracted Text from Certificate ---\n", pdf_text)  
-            
-            full_name = f"{user.first_name} {user.last_name}".strip()
-            username_match = is_similar(full_name, pdf_text)
-            issuer_match = is_similar(input_issuer, pdf_text)
-            course_match = is_similar(input_course, pdf_text)
+    # The file is hashed in chunks and rendered from disk, never held in memory whole
+    if file_hash is None:
+        file_hash = await run_cpu_bound(hash_upload, certificate_file)
 
-            if not (username_match and issuer_match and course_match):
-                return Response({
-                    'error': 'Certificate content does not match the entered details. Please ensure accuracy.'
-                }, status=status.HTTP_400_BAD_REQUEST)
+    if await Certificate.objects.filter(user=user, file_hash=file_hash).aexists():
+        raise UploadRejected('This certificate file has already been uploaded')
 
-            # 🧮 Weightage Logic
-            issuer_weight = ISSUER_WEIGHTS.get(input_issuer, 5.0)
-            course_weight = COURSE_WEIGHTS.get(input_course.lower(), 5.0)
-            final_weightage = round((issuer_weight + course_weight) / 2, 2)
+    temp_pdf_path = None
+    try:
+        if pdf_path is None and hasattr(certificate_file, 'temporary_file_path'):
+            pdf_path = certificate_file.temporary_file_path()
+        elif pdf_path is None:
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as destination:
+                temp_pdf_path = pdf_path = destination.name
+                for chunk in certificate_file.chunks():
+                    destination.write(chunk)
 
+        # 🖼️ Perceptual fingerprint: reject re-scanned / re-exported copies before OCR
+        first_page = await read_within_budget(
+            user, file_hash, profile, run_isolated, render_first_page, pdf_path, certificate_file.name
+        )
+        fingerprint = dhash(first_page)
+        look_alikes = await sync_to_async(find_near_duplicates)(fingerprint)
+        if any(certificate.user_id == user.pk for certificate in look_alikes):
+            raise UploadRejected('A near-identical certificate has already been uploaded')
+
+        # 🔍 OCR + Similarity Check
+        ocr_started = time.monotonic()
+        pages, accepted, matches = await read_within_budget(
+            user, file_hash, profile, read_and_match, user, input_issuer, input_course, pdf_path, page_cache, profile
+        )
+        ocr_ms = (time.monotonic() - ocr_started) * 1000
+    finally:
+        if temp_pdf_path and os.path.exists(temp_pdf_path):
+            os.remove(temp_pdf_path)
+
+    pdf_text = pages_text(pages)
+    logger.debug(f"Extracted text from certificate:\n{pdf_text}")
+
+    extraction = extraction_fields(pages, matches, extractor_path(pages), ocr_ms, profile.name)
+
+    if not accepted:
+        # 🗂️ Keep what was read so a disputed rejection can be reviewed without re-running OCR
+        await OCRExtraction.objects.acreate(user=user, file_hash=file_hash, accepted=False, **extraction)
+        raise UploadRejected('Certificate content does not match the entered details. Please ensure accuracy.')
+
+    # 👥 Another user's look-alike only blocks the upload once OCR shows it is the same certificate
+    others = [certificate.pk for certificate in look_alikes if certificate.user_id != user.pk]
+    if others:
+        candidates = await sync_to_async(list)(Certificate.objects.filter(pk__in=others).select_related('user'))
+        if confirmed_copies(candidates, file_hash, pdf_text):
+            raise UploadRejected('A near-identical certificate has already been uploaded')
+
+    # 🧮 Weightage Logic
+    final_weightage = await sync_to_async(compute_weightage)(input_issuer, input_course)
+
+    # 🏷️ Domain / category from the course catalog and the OCR text
+    domain, category = classify(input_course, pdf_text)
+
+    return {
+        'name': certificate_name,
+        'issuer': input_issuer,
+        'course': input_course,
+        'weightage': final_weightage,
+        'domain': domain,
+        'category': category,
+        'file': certificate_file,
+        'file_hash': file_hash,
+        'fingerprint': fingerprint,
+        'extraction': extraction,
+    }
+
+
+def save_verified_certificates(user, uploads):
+    """Persist verified uploads in one transaction, update the owner's aggregates, then re-rank once."""
+    certificates = []
+    total_weightage = Decimal('0.0')
+    domain_totals = {}
+    with transaction.atomic():
+        for upload in uploads:
             # 📝 Save Certificate
-            certificate = Certificate.objects.create(
+            certificates.append(Certificate.objects.create(
                 user=user,
-                name=certificate_name,
-                issuer=input_issuer,
-                weightage=final_weightage,
+                name=upload['name'],
+                issuer=upload['issuer'],
+                course_name=upload['course'],
+                domain=upload['domain'],
+                category=upload['category'],
+                weightage=upload['weightage'],
                 status='pending',
-                certificate_file=certificate_file,
-                file_hash=file_hash
+                certificate_file=upload['file'],
+                file_hash=upload['file_hash'],
+                **band_fields(upload['fingerprint'])
+            ))
+            OCRExtraction.objects.create(
+                user=user, certificate=certificates[-1], file_hash=upload['file_hash'], accepted=True,
+                **upload['extraction']
             )
-
-            Course.objects.create(
-                user=user,
-                course_name=input_course,
-                issuer=input_issuer
+            total_weightage += Decimal(str(upload['weightage']))
+            count, weightage = domain_totals.get(upload['domain'], (0, Decimal('0.0')))
+            domain_totals[upload['domain']] = (count + 1, weightage + Decimal(str(upload['weightage'])))
+
+        notify_certificate_status((cert.id, user.id, cert.name, cert.status) for cert in certificates)
+        forget_verification(cert.file_hash for cert in certificates)
+
+        Course.objects.bulk_create([
+            Course(user=user, course_name=upload['course'], issuer=upload['issuer'])
+            for upload in uploads
+        ])
+
+        # F() updates so concurrent uploads for the same user cannot overwrite each other's totals
+        UserProfile.objects.filter(user=user).update(total_weightage=F('total_weightage') + total_weightage)
+
+        # Per-domain aggregates are kept incrementally; domain leaderboards read them instead of scanning certificates
+        for name, (count, weightage) in domain_totals.items():
+            domain, _ = Domain.objects.get_or_create(user=user, name=name)
+            Domain.objects.filter(pk=domain.pk).update(
+                certificate_count=F('certificate_count') + count,
+                total_weightage=F('total_weightage') + weightage
             )
 
-            profile = user.userprofile
-            profile.total_weightage += Decimal(str(final_weightage))
-            profile.save()
+    update_user_ranks()
+    return certificates
 
-            domain, _ = Domain.objects.get_or_create(user=user, name='General')
-            domain.certificate_count += 1
-            domain.total_weightage += Decimal(str(final_weightage))  # Fixed line
-            domain.save()
 
-            update_user_ranks()
+async def store_thumbnails(certificates):
+    # Rendered from the stored file like lazily generated thumbnails, so every path gives the same quality
+    for certificate in certificates:
+        try:
+            await run_cpu_bound(ensure_thumbnails, certificate)
+        except Exception as e:
+            logger.error(f"Thumbnail generation failed for {certificate.file_hash}: {str(e)}")
 
-            return Response({
+
+def requested_profile(request):
+    """OCR profile named by the request's `profile` field or query parameter; (profile, None) or (None, 400 response)."""
+    try:
+        return get_profile(request.POST.get('profile') or request.GET.get('profile')), None
+    except ValueError as e:
+        return None, json_response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def too_many_requests(message, retry_after):
+    response = json_response({'error': message, 'retry_after': retry_after}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+async def admit_upload(user, count=1):
+    """Apply per-user and global rate limits; return (started, None) when admitted or (None, 429 response)."""
+    retry_after = await user_upload_bucket.take(user.pk, count)
+    if not retry_after:
+        retry_after = await global_upload_bucket.take(count=count)
+        if retry_after:
+            # The user's tokens were not used: the upload never ran
+            await user_upload_bucket.refund(user.pk, count)
+    if retry_after:
+        upload_admission.record_rate_limited()
+        return None, too_many_requests('Upload rate limit exceeded, please retry later', retry_after)
+
+    started = upload_admission.try_acquire(count)
+    if started is None:
+        return None, too_many_requests('Verification capacity is saturated, please retry later',
+                                       upload_admission.retry_after())
+    return started, None
+
+
+class CertificateUploadView(AsyncTokenAuthMixin, View):
+    async def post(self, request):
+        profile, error = requested_profile(request)
+        if error:
+            return error
+        started, rejection = await admit_upload(request.user)
+        if rejection:
+            return rejection
+        try:
+            return await self.verify(request, profile)
+        finally:
+            upload_admission.release(started)
+
+    async def verify(self, request, profile):
+        try:
+            user = request.user
+            data = request.POST
+            certificate_file = request.FILES.get('certificate_file')
+
+            if not certificate_file:
+                return json_response({'error': 'Certificate file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+            input_course = data.get("course_name", "").strip()
+            try:
+                upload = await prepare_upload(
+                    user, certificate_file, data.get('name', certificate_file.name),
+                    data.get("issuer", "").strip(), input_course, profile=profile
+                )
+            except UploadRejected as e:
+                return rejection_response(e)
+
+            certificate, = await sync_to_async(save_verified_certificates)(user, [upload])
+            await store_thumbnails([certificate])
+
+            return json_response({
                 'message': 'Certificate uploaded and verified successfully',
                 'certificate': {
                     'id': certificate.id,
                     'name': certificate.name,
                     'issuer': certificate.issuer,
                     'course': input_course,
-                    'weightage': final_weightage,
+                    'weightage': upload['weightage'],
+                    'domain': certificate.domain,
+                    'category': certificate.category,
                 }
             }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
             logger.error(f"CertificateUploadView error: {str(e)}", exc_info=True)
-            return Response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return json_response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class ProfileView(APIView):
-    permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+class CertificateBatchUploadView(AsyncTokenAuthMixin, View):
+    """
+    Verify several certificates in one request.
+
+    Expects multipart `certificate_files` (repeated) and `metadata`, a JSON list
+    of {"name", "issuer", "course_name"} objects in the same order as the files,
+    and optionally the OCR `profile` for the whole batch.
+    Files are verified concurrently; all that pass are saved in one transaction
+    followed by a single rank update.
+    """
+
+    async def post(self, request):
+        files = request.FILES.getlist('certificate_files')
+        if not files:
+            return json_response({'error': 'At least one certificate file is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+            return json_response({'error': f'At most {settings.BATCH_UPLOAD_MAX_FILES} files per batch'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            metadata = json.loads(request.POST.get('metadata', '[]'))
+        except json.JSONDecodeError:
+            return json_response({'error': 'Invalid metadata JSON'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(metadata, list) or len(metadata) != len(files) or not all(isinstance(m, dict) for m in metadata):
+            return json_response({'error': 'metadata must be a list with one object per file'}, status=status.HTTP_400_BAD_REQUEST)
+        profile, error = requested_profile(request)
+        if error:
+            return error
+
+        started, rejection = await admit_upload(request.user, len(files))
+        if rejection:
+            return rejection
+        try:
+            return await self.verify_batch(request.user, files, metadata, profile)
+        finally:
+            upload_admission.release(started, len(files))
+
+    async def verify_batch(self, user, files, metadata, profile):
+        try:
+            results = await asyncio.gather(*[
+                prepare_upload(
+                    user, certificate_file, str(meta.get('name') or certificate_file.name),
+                    str(meta.get('issuer', '')).strip(), str(meta.get('course_name', '')).strip(),
+                    profile=profile
+                )
+                for certificate_file, meta in zip(files, metadata)
+            ], return_exceptions=True)
+
+            outcomes = []
+            accepted = []
+            seen_names, seen_hashes, seen_fingerprints = set(), set(), []
+            for index, (certificate_file, result) in enumerate(zip(files, results)):
+                outcome = {'index': index, 'file': certificate_file.name}
+                if isinstance(result, UploadRejected):
+                    error = str(result)
+                elif isinstance(result, Exception):
+                    logger.error(f"CertificateBatchUploadView error for {certificate_file.name}: {str(result)}", exc_info=result)
+                    error = 'An unexpected error occurred'
+                elif result['name'] in seen_names:
+                    error = 'Certificate with this name already exists'
+                elif result['file_hash'] in seen_hashes:
+                    error = 'This certificate file has already been uploaded'
+                elif any(hamming_distance(result['fingerprint'], fp) <= PHASH_MAX_DISTANCE for fp in seen_fingerprints):
+                    error = 'A near-identical certificate has already been uploaded'
+                else:
+                    error = None
+                    seen_names.add(result['name'])
+                    seen_hashes.add(result['file_hash'])
+                    seen_fingerprints.append(result['fingerprint'])
+                    accepted.append((outcome, result))
+
+                outcome['status'] = 'rejected' if error else 'verified'
+                if error:
+                    outcome['error'] = error
+                if isinstance(result, UploadFailed):
+                    outcome['status'] = 'failed'
+                    outcome['reason'] = result.reason
+                outcomes.append(outcome)
+
+            if accepted:
+                uploads = [upload for _, upload in accepted]
+                certificates = await sync_to_async(save_verified_certificates)(user, uploads)
+                for (outcome, upload), certificate in zip(accepted, certificates):
+                    outcome['certificate'] = {
+                        'id': certificate.id,
+                        'name': certificate.name,
+                        'issuer': certificate.issuer,
+                        'course': upload['course'],
+                        'weightage': upload['weightage'],
+                        'domain': certificate.domain,
+                        'category': certificate.category,
+                    }
+                await store_thumbnails(certificates)
+
+            return json_response({
+                'message': f'{len(accepted)} of {len(files)} certificates uploaded and verified',
+                'results': outcomes
+            }, status=status.HTTP_201_CREATED if accepted else status.HTTP_400_BAD_REQUEST)
+
+        except Exception as e:
+            logger.error(f"CertificateBatchUploadView error: {str(e)}", exc_info=True)
+            return json_response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+async def get_chunked_upload(request, upload_id):
+    try:
+        return await ChunkedUpload.objects.aget(pk=upload_id, user=request.user)
+    except ChunkedUpload.DoesNotExist:
+        return None
+
+
+class ChunkedUploadInitView(AsyncTokenAuthMixin, View):
+    """
+    Start a resumable upload.
+
+    Protocol: POST here with filename, size, issuer, course_name (and optional
+    name) to get an upload_id; PATCH raw bytes to .../<upload_id>/?offset=N;
+    GET .../<upload_id>/ to find the offset to resume from; finally POST
+    .../<upload_id>/finalize/ to verify the certificate.
+    """
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+            filename = str(data.get('filename', '')).strip()
+            input_issuer = str(data.get('issuer', '')).strip()
+            input_course = str(data.get('course_name', '')).strip()
+            try:
+                total_size = int(data.get('size', 0))
+            except (TypeError, ValueError):
+                total_size = 0
+
+            if not filename or total_size <= 0:
+                return json_response({'error': 'filename and a positive size are required'}, status=status.HTTP_400_BAD_REQUEST)
+            if total_size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+                return json_response({'error': f'Files larger than {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes are not accepted'}, status=status.HTTP_400_BAD_REQUEST)
+            if not input_issuer or not input_course:
+                return json_response({'error': 'Issuer and course_name are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+            upload = await sync_to_async(create_upload)(
+                request.user, filename, str(data.get('name') or filename), input_issuer, input_course, total_size
+            )
+            return json_response({
+                'upload_id': str(upload.id),
+                'offset': 0,
+                'total_size': total_size,
+                'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE
+            }, status=status.HTTP_201_CREATED)
+        except json.JSONDecodeError:
+            return json_response({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"ChunkedUploadInitView error: {str(e)}", exc_info=True)
+            return json_response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ChunkedUploadView(AsyncTokenAuthMixin, View):
+    async def get(self, request, upload_id):
+        upload = await get_chunked_upload(request, upload_id)
+        if upload is None:
+            return json_response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        return json_response({'upload_id': str(upload.id), 'offset': upload.offset, 'total_size': upload.total_size})
+
+    async def patch(self, request, upload_id):
+        try:
+            upload = await get_chunked_upload(request, upload_id)
+            if upload is None:
+                return json_response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+            try:
+                offset = int(request.GET.get('offset', ''))
+            except ValueError:
+                return json_response({'error': 'offset query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+            new_offset = await sync_to_async(append_chunk)(upload, offset, request.body)
+            if new_offset is None:
+                await upload.arefresh_from_db(fields=['offset'])
+                return json_response({
+                    'error': 'Chunk does not continue the upload; resume from the returned offset',
+                    'offset': upload.offset
+                }, status=status.HTTP_409_CONFLICT)
+
+            # Overlap OCR of early pages with the rest of the transfer when OCR workers are idle
+            if (new_offset < upload.total_size and upload.filename.lower().endswith('.pdf')
+                    and upload_admission.in_flight < upload_admission.workers):
+                early_pages = settings.CHUNKED_UPLOAD_EARLY_RENDER_PAGES
+                schedule_early_render(upload.id, ocr_executor, ocr_page, min(early_pages, get_profile().max_pages or early_pages))
+
+            return json_response({'upload_id': str(upload.id), 'offset': new_offset, 'total_size': upload.total_size})
+        except Exception as e:
+            logger.error(f"ChunkedUploadView error: {str(e)}", exc_info=True)
+            return json_response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    async def delete(self, request, upload_id):
+        upload = await get_chunked_upload(request, upload_id)
+        if upload is None:
+            return json_response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        await sync_to_async(discard_upload)(upload.id)
+        return json_response({'message': 'Upload cancelled'})
+
+
+class ChunkedUploadFinalizeView(AsyncTokenAuthMixin, View):
+    async def post(self, request, upload_id):
+        upload = await get_chunked_upload(request, upload_id)
+        if upload is None:
+            return json_response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if upload.offset != upload.total_size:
+            return json_response({
+                'error': 'Upload is incomplete',
+                'offset': upload.offset,
+                'total_size': upload.total_size
+            }, status=status.HTTP_409_CONFLICT)
+
+        profile, error = requested_profile(request)
+        if error:
+            return error
+
+        started, rejection = await admit_upload(request.user)
+        if rejection:
+            return rejection
+        try:
+            return await self.verify(request.user, upload, profile)
+        finally:
+            upload_admission.release(started)
+
+    async def verify(self, user, upload, profile):
+        try:
+            early = pending_early_render(upload.id)
+            if early is not None:
+                await asyncio.wrap_future(early)
+
+            file_hash = await sync_to_async(finish_hash)(upload)
+            path = data_path(upload.id)
+            with open(path, 'rb') as f:
+                try:
+                    prepared = await prepare_upload(
+                        user, File(f, name=upload.filename), upload.name, upload.issuer, upload.course_name,
+                        file_hash=file_hash, pdf_path=path, profile=profile,
+                        # Early renders read pages with the deployment's profile
+                        page_cache=PageTextCache(upload.id) if profile is get_profile() else None
+                    )
+                except UploadRejected as e:
+                    # A definitive answer: the same bytes would be rejected again
+                    await sync_to_async(discard_upload)(upload.id)
+                    return rejection_response(e)
+                certificate, = await sync_to_async(save_verified_certificates)(user, [prepared])
+            await sync_to_async(discard_upload)(upload.id)
+            await store_thumbnails([certificate])
+
+            return json_response({
+                'message': 'Certificate uploaded and verified successfully',
+                'certificate': {
+                    'id': certificate.id,
+                    'name': certificate.name,
+                    'issuer': certificate.issuer,
+                    'course': upload.course_name,
+                    'weightage': prepared['weightage'],
+                    'domain': certificate.domain,
+                    'category': certificate.category,
+                }
+            }, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            # The upload is kept so finalize can be retried; purge_chunked_uploads removes it if not
+            logger.error(f"ChunkedUploadFinalizeView error: {str(e)}", exc_info=True)
+            return json_response({'error': 'An unexpected error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ProfileView(AsyncTokenAuthMixin, View):
+    async def get(self, request):
         try:
             user = request.user
-            profile = user.userprofile
-            domains = Domain.objects.filter(user=user)
-            rank_history = RankHistory.objects.filter(user=user).order_by('month').values('month', 'rank')
 
-            # Ensure ranks and weightage are up-to-date
-            update_user_ranks()
+            # Ranks and weightage are recomputed on every write path (and pushed over /api/events/),
+            # so reads no longer re-rank every user; the rank itself comes from the score index
 
-            return Response({
+            profile = await UserProfile.objects.aget(user=user)
+            domains = [
+                domain async for domain in Domain.objects.filter(user=user).values(
+                    'name', 'certificate_count', 'total_weightage'
+                )
+            ]
+            rank_history = [
+                entry async for entry in RankHistory.objects.filter(user=user).order_by('month').values('month', 'rank')
+            ]
+
+            return json_response({
                 'profile': {
                     'email': user.email,
                     'first_name': user.first_name,
@@ -471,45 +1133,156 @@ class ProfileView(APIView):
                     'department': profile.department,
                     'join_date': profile.join_date.isoformat(),
                     'total_weightage': float(profile.total_weightage),
-                    'current_rank': profile.current_rank
+                    'current_rank': await current_rank(profile)
                 },
-                'domains': list(domains.values('name', 'certificate_count', 'total_weightage')),
-                'rank_history': list(rank_history)
+                'domains': domains,
+                'rank_history': rank_history
             }, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"ProfileView error: {str(e)}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class LeaderboardView(APIView):
-    permission_classes = [IsAuthenticated]
+def event_streams_unsupported():
+    return json_response({'error': 'Event streams need the ASGI server'}, status=status.HTTP_501_NOT_IMPLEMENTED)
 
-    def get(self, request):
+
+class EventStreamTokenView(AsyncTokenAuthMixin, View):
+    """
+    Short-lived ?stream_token= for EventStreamView, which EventSource cannot
+    send headers to. Answers 501 where streams are not served, so clients
+    poll instead of retrying.
+    """
+
+    async def post(self, request):
+        if not is_asgi(request):
+            return event_streams_unsupported()
+        return json_response({'stream_token': stream_token(request.user), 'expires_in': STREAM_TOKEN_MAX_AGE_SECONDS})
+
+
+class EventStreamView(AsyncTokenAuthMixin, View):
+    """
+    Server-sent events for the signed-in user: `certificate.status` when a
+    certificate is saved or its status changes, `rank` when the user's rank
+    moves. Opens with a `snapshot` event so the client can stop polling the
+    dashboard. Authenticates with a ?stream_token= from EventStreamTokenView.
+    Only served under ASGI: a WSGI worker would be held for as long as the
+    stream stays open.
+    """
+    allow_stream_token = True
+
+    async def get(self, request):
+        if not is_asgi(request):
+            return event_streams_unsupported()
+        user = request.user
         try:
-            domain = request.query_params.get('domain', '')
-            users = UserProfile.objects.all()
+            entry = broker.subscribe(user.id)
+        except TooManyStreams:
+            return json_response({'error': 'Too many open event streams'}, status=status.HTTP_429_TOO_MANY_REQUESTS)
 
-            if domain:
-                users = users.filter(user__certificate__domain=domain).distinct()
-
-            leaderboard = users.annotate(
-                certificate_count=Count('user__certificate'),
-                cert_total_weightage=Coalesce(
-                    Sum('user__certificate__weightage'),
-                    Decimal('0.0'),
-                    output_field=DecimalField()
-                )
-            ).order_by('-cert_total_weightage', 'certificate_count').values(
-                'user__email', 'cert_total_weightage', 'certificate_count'
-            )[:50]
-
-            # Assign ranks dynamically
-            leaderboard_with_ranks = [
-                {**entry, 'current_rank': index + 1}
-                for index, entry in enumerate(leaderboard)
-            ]
+        try:
+            profile = await UserProfile.objects.aget(user=user)
+        except UserProfile.DoesNotExist:
+            broker.unsubscribe(user.id, entry)
+            return json_response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        broker.publish(user.id, 'snapshot', {
+            'current_rank': await current_rank(profile),
+            'total_weightage': float(profile.total_weightage),
+        })
+
+        response = StreamingHttpResponse(event_stream(user.id, entry), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+        return response
+
+
+class LeaderboardView(AsyncTokenAuthMixin, View):
+    """
+    Top 50 overall or, with ?domain=, within one domain. ?around=me (with
+    optional ?radius=, default 5) returns the overall neighbourhood of the
+    requesting user instead. Overall positions come from the in-process
+    score index, so they match current_rank.
+    """
+    SIZE = 50
+    MAX_RADIUS = 25
+
+    async def get(self, request):
+        try:
+            domain = request.GET.get('domain', '')
 
-            return Response({'leaderboard': leaderboard_with_ranks}, status=status.HTTP_200_OK)
+            if domain:
+                # Precomputed per-domain totals, read in index order
+                leaderboard = Domain.objects.filter(name=domain, certificate_count__gt=0).order_by(
+                    '-total_weightage', 'certificate_count'
+                ).values(
+                    'user__email', 'certificate_count', cert_total_weightage=F('total_weightage')
+                )[:self.SIZE]
+
+                # Assign ranks dynamically
+                leaderboard_with_ranks = [
+                    {**entry, 'current_rank': index + 1}
+                    for index, entry in enumerate([entry async for entry in leaderboard])
+                ]
+            else:
+                if request.GET.get('around') == 'me':
+                    try:
+                        radius = min(max(int(request.GET.get('radius', 5)), 0), self.MAX_RADIUS)
+                    except ValueError:
+                        return json_response({'error': 'radius must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+                    window = await sync_to_async(score_index.around)(request.user.id, radius)
+                else:
+                    window = await sync_to_async(score_index.top)(self.SIZE)
+
+                certificate_counts = {
+                    row['user_id']: row['certificate_count'] async for row in Certificate.objects.filter(
+                        user_id__in=[entry['user_id'] for entry in window]
+                    ).order_by().values('user_id').annotate(certificate_count=Count('id'))
+                }
+                leaderboard_with_ranks = [
+                    {
+                        'user__email': entry['email'],
+                        'cert_total_weightage': entry['total_weightage'],
+                        'certificate_count': certificate_counts.get(entry['user_id'], 0),
+                        'current_rank': entry['rank'],
+                    }
+                    for entry in window
+                ]
+
+            return json_response({'leaderboard': leaderboard_with_ranks}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"LeaderboardView error: {str(e)}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return json_response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UploadAdmissionMetricsView(APIView):
+    """Upload admission counters for this worker process, for sizing OCR capacity."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'upload_admission': upload_admission.snapshot()}, status=status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """
+    Stream certificates, courses or leaderboard standings as CSV or JSONL.
+
+    Optional filters: date_from, date_to (YYYY-MM-DD), domain, status.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, kind, fmt):
+        if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+            return Response({'error': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            filters = parse_export_filters(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        # Under ASGI the rows are fetched a database chunk at a time on the request's thread
+        content = streaming_content(request, stream_export(kind, fmt, filters), batch=EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        filename = f"{kind}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
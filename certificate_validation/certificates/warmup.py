@@ -0,0 +1,82 @@
+import gc
+import importlib
+import logging
+import sys
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Imported once in the server's master process so forked workers inherit them
+HEAVY_MODULES = [
+    'numpy',
+    'cv2',
+    'PIL.Image',
+    'fitz',
+    'pytesseract',
+    'fuzzywuzzy.fuzz',
+    'paddleocr',
+    'certificates.views',  # builds the PaddleOCR engine at import time
+]
+
+
+def timed_imports(modules):
+    """Import each module, returning (module, seconds, error) in order; already-loaded modules cost ~0."""
+    results = []
+    for name in modules:
+        started = time.perf_counter()
+        error = None
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results.append((name, time.perf_counter() - started, error))
+    return results
+
+
+def warm_models():
+    """Run each OCR engine once so lazily built predictors and weights are loaded before forking."""
+    from .views import ocr_engine
+    import numpy as np
+
+    blank = np.full((32, 128, 3), 255, dtype=np.uint8)
+    started = time.perf_counter()
+    try:
+        ocr_engine.ocr(blank, cls=False)
+    except Exception as e:
+        logger.warning(f"PaddleOCR warm-up failed: {str(e)}")
+    return time.perf_counter() - started
+
+
+def make_fork_safe():
+    """
+    Leave nothing in the master that must not be shared with forked workers,
+    and keep inherited pages shared: DB connections are closed, and the
+    objects loaded so far are moved out of the garbage collector's reach so
+    collections in the workers do not write to (and so copy) those pages.
+    """
+    connections.close_all()
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+
+def preload(log=logger.info):
+    """
+    Warm-start hook for a pre-forking server master, e.g. gunicorn with
+    preload_app (see gunicorn.conf.py). Imports the heavy modules, warms the
+    OCR models, prepares the process for forking and logs what each step cost.
+    """
+    started = time.perf_counter()
+    modules = getattr(settings, 'WARM_START_MODULES', HEAVY_MODULES)
+    report = timed_imports(modules)
+    warm_seconds = warm_models() if 'certificates.views' in sys.modules else 0.0
+    make_fork_safe()
+
+    log(f"Warm start: preloaded {len(modules)} modules in {time.perf_counter() - started:.2f}s")
+    for name, seconds, error in sorted(report, key=lambda row: -row[1]):
+        log(f"  import {name:<24} {seconds * 1000:>9.1f} ms{'  FAILED ' + error if error else ''}")
+    log(f"  warm OCR models {'':<16} {warm_seconds * 1000:>9.1f} ms")
+    return report
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings. The app is loaded and warmed once in the master process
+before workers are forked, so workers share the imported modules and OCR
+models copy-on-write instead of each loading their own copy.
+
+    gunicorn certificate_validation.wsgi -c gunicorn.conf.py
+    gunicorn certificate_validation.asgi:application -k uvicorn.workers.UvicornWorker -c gunicorn.conf.py
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported and before the first worker is forked
+    from certificates.warmup import preload
+
+    preload(log=server.log.info)
+
+
+def post_worker_init(worker):
+    # Start the OCR worker pool before the worker serves requests or starts OCR threads
+    from certificates.ocr_budget import isolation_available, start_pool
+
+    if isolation_available():
+        start_pool()
@@ -25,6 +25,8 @@ interface Certificate {
   status: string;
   upload_date: string;
   certificate_file?: string;
+  // Signed, expiring first-page previews keyed by size; null when the file has no hash yet
+  thumbnails?: { small: string; medium: string; large: string } | null;
 }
 
 export function CertificateTable() {
@@ -154,8 +156,25 @@ export function CertificateTable() {
               sortedCertificates.map((certificate) => (
                 <TableRow key={certificate.id} className="hover:bg-muted/50">
                   <TableCell>
-                    <div className="font-medium">{certificate.name}</div>
-                    <div className="text-xs text-muted-foreground">{certificate.issuer}</div>
+                    <div className="flex items-center gap-3">
+                      {certificate.thumbnails ? (
+                        <img
+                          src={certificate.thumbnails.small}
+                          srcSet={`${certificate.thumbnails.small} 1x, ${certificate.thumbnails.medium} 2x`}
+                          alt=""
+                          loading="lazy"
+                          className="h-12 w-10 rounded border object-cover object-top"
+                        />
+                      ) : (
+                        <div className="flex h-12 w-10 items-center justify-center rounded border bg-muted">
+                          <FileText size={16} className="text-muted-foreground" />
+                        </div>
+                      )}
+                      <div>
+                        <div className="font-medium">{certificate.name}</div>
+                        <div className="text-xs text-muted-foreground">{certificate.issuer}</div>
+                      </div>
+                    </div>
                   </TableCell>
                   <TableCell>{certificate.category}</TableCell>
                   <TableCell>{certificate.domain}</TableCell>
@@ -10,6 +10,8 @@ interface Certificate {
   upload_date: string;
   status: string;
   domain: string;
+  // Signed, expiring first-page preview URLs keyed by size
+  thumbnails: Record<"small" | "medium" | "large", string> | null;
 }
 
 export function RecentCertificates() {
@@ -50,9 +52,20 @@ export function RecentCertificates() {
               key={cert.id}
               className="p-4 hover:bg-muted/50 transition-colors flex flex-col sm:flex-row justify-between items-start sm:items-center gap-2"
             >
-              <div>
-                <h4 className="font-medium">{cert.name}</h4>
-                <div className="text-sm text-muted-foreground">{cert.issuer}</div>
+              <div className="flex items-center gap-3">
+                {cert.thumbnails && (
+                  <img
+                    src={cert.thumbnails.small}
+                    srcSet={`${cert.thumbnails.small} 1x, ${cert.thumbnails.medium} 2x`}
+                    alt=""
+                    loading="lazy"
+                    className="h-14 w-10 rounded border object-cover object-top"
+                  />
+                )}
+                <div>
+                  <h4 className="font-medium">{cert.name}</h4>
+                  <div className="text-sm text-muted-foreground">{cert.issuer}</div>
+                </div>
               </div>
               <div className="flex flex-col sm:flex-row gap-2 sm:items-center">
                 <div className="text-xs text-muted-foreground">
@@ -20,6 +20,8 @@ interface DashboardData {
     name: string;
     status: string;
     upload_date: string;
+    file_hash: string | null;
+    thumbnails: Record<"small" | "medium" | "large", string> | null;
   }>;
   domain_progress: Array<{
     name: string;
@@ -51,6 +53,61 @@ export default function Dashboard() {
     };
 
     fetchDashboardData();
+
+    // Rank moves and certificate status changes are pushed by the server instead of polled.
+    // EventSource cannot send the auth header, so the stream opens with a short-lived stream token;
+    // once the browser gives up reconnecting (e.g. the token expired), a fresh one is fetched after
+    // a delay that doubles up to RETRY_MAX_MS. A server without streams (WSGI) answers the token
+    // request with 501, and the dashboard is then polled instead.
+    const RETRY_MIN_MS = 5000;
+    const RETRY_MAX_MS = 5 * 60 * 1000;
+    const POLL_MS = 60000;
+    let events: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let poll: ReturnType<typeof setInterval> | undefined;
+    let retryDelay = RETRY_MIN_MS;
+    let closed = false;
+    const updateStats = (event: MessageEvent) => {
+      retryDelay = RETRY_MIN_MS;
+      const { current_rank, total_weightage } = JSON.parse(event.data);
+      setDashboardData((data) => data && { ...data, stats: { ...data.stats, current_rank, total_weightage } });
+    };
+    const retryLater = () => {
+      if (closed) return;
+      retry = setTimeout(openEvents, retryDelay);
+      retryDelay = Math.min(retryDelay * 2, RETRY_MAX_MS);
+    };
+    const openEvents = async () => {
+      try {
+        const response = await axios.post(`${import.meta.env.VITE_API_BASE_URL}/api/events/token/`, null, {
+          headers: { Authorization: `Token ${localStorage.getItem('authToken')}` }
+        });
+        if (closed) return;
+        events = new EventSource(
+          `${import.meta.env.VITE_API_BASE_URL}/api/events/?stream_token=${encodeURIComponent(response.data.stream_token)}`
+        );
+        events.addEventListener('snapshot', updateStats);
+        events.addEventListener('rank', updateStats);
+        events.addEventListener('certificate.status', fetchDashboardData);
+        events.onerror = () => {
+          if (events?.readyState === EventSource.CLOSED) retryLater();
+        };
+      } catch (err: any) {
+        if (err.response?.status === 501) {
+          if (!closed) poll = setInterval(fetchDashboardData, POLL_MS);
+          return;
+        }
+        console.error(err);
+        retryLater();
+      }
+    };
+    openEvents();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      clearInterval(poll);
+      events?.close();
+    };
   }, []);
 
   if (loading) return <div>Loading...</div>;